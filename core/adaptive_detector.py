@@ -0,0 +1,141 @@
+import os
+import numpy as np
+
+
+class AdaptiveDetector:
+    """YOLOX person detector whose input size follows the subject size and frame shape
+
+    A trainee filling a large part of the frame is found just as reliably at
+    a smaller detector input, so the input size is picked from the previous
+    frame's largest bbox. If the smaller input finds nobody, the frame is
+    detected again at full size, and detection stays at full size until a
+    subject is found again, so frames without anyone in them cost a single
+    full-size run rather than a reduced and a full one.
+
+    Portrait and landscape frames use input shapes of roughly their own
+    aspect ratio instead of being letterboxed into a square, so almost no
+    compute goes to padding. Boxes are mapped back by YOLOX's own ratio.
+
+    The bundled YOLOX export has fixed input shapes, so every size needs its
+    own model file next to the full-size one, named <name>_<h>x<w>.onnx.
+    Sizes without a file are skipped.
+    """
+
+    # (minimum bbox area as fraction of the frame, input size (h, w)), largest subjects first
+    SIZE_STEPS = {
+        'square': [
+            (0.25, (256, 256)),
+            (0.10, (320, 320)),
+            (0.0, (416, 416))
+        ],
+        # 9:16, the largest shape gives at least the 416 square's resolution on the subject
+        'portrait': [
+            (0.25, (320, 192)),
+            (0.10, (384, 224)),
+            (0.0, (448, 256))
+        ],
+        'landscape': [
+            (0.25, (192, 320)),
+            (0.10, (224, 384)),
+            (0.0, (256, 448))
+        ]
+    }
+
+    # Long side / short side from which a frame counts as portrait or landscape (4:3 stays square)
+    ORIENTATION_RATIO = 1.5
+
+    def __init__(self, det_path, full_size, load_session):
+        self.det_path = det_path
+        self.full_size = tuple(full_size)
+        self.sessions = {}  # input size (h, w) -> YOLOX
+        self.size_counts = {}  # input size -> frames detected at that size
+        self.fallbacks = 0  # Frames re-detected at full size
+        self.last_area_ratio = None
+        self.searching = True  # No subject on the last frame, detect at full size only
+
+        for size in self.all_sizes():
+            path = self.variant_path(det_path, size, self.full_size)
+            if os.path.exists(path) and size not in self.sessions:
+                self.sessions[size] = load_session(path, size)
+        if self.full_size not in self.sessions:
+            self.sessions[self.full_size] = load_session(det_path, self.full_size)
+
+    @staticmethod
+    def variant_path(det_path, size, full_size):
+        """Get model file of a detector input size"""
+        if tuple(size) == tuple(full_size):
+            return det_path
+        root, ext = os.path.splitext(det_path)
+        return f"{root}_{size[0]}x{size[1]}{ext}"
+
+    @classmethod
+    def all_sizes(cls):
+        """Get every input size of every orientation"""
+        return [size for steps in cls.SIZE_STEPS.values() for _, size in steps]
+
+    @classmethod
+    def has_variants(cls, det_path, full_size):
+        """Check whether any other-size model file exists"""
+        return any(os.path.exists(cls.variant_path(det_path, size, full_size))
+                   for size in cls.all_sizes() if tuple(size) != tuple(full_size))
+
+    def model_paths(self):
+        """Get model files of all loaded sizes"""
+        return [self.variant_path(self.det_path, size, self.full_size) for size in self.sessions]
+
+    def orientation(self, image):
+        """Classify frame shape as 'portrait', 'landscape' or 'square'"""
+        h, w = image.shape[:2]
+        if h >= w * self.ORIENTATION_RATIO:
+            return 'portrait'
+        if w >= h * self.ORIENTATION_RATIO:
+            return 'landscape'
+        return 'square'
+
+    def loaded_steps(self, image):
+        """Get size steps of the frame's orientation that have a session"""
+        all_steps = self.SIZE_STEPS[self.orientation(image)]
+        steps = [(r, size) for r, size in all_steps if size in self.sessions]
+        # Full shape for this orientation not built, letterbox into the square sizes
+        if not steps or steps[-1][1] != all_steps[-1][1]:
+            steps = [(r, size) for r, size in self.SIZE_STEPS['square'] if size in self.sessions]
+        return steps
+
+    def full_size_for(self, image):
+        """Get the largest loaded input size for the frame's orientation"""
+        return self.loaded_steps(image)[-1][1]
+
+    def select_size(self, image):
+        """Pick the smallest loaded input size suitable for the previous subject size
+
+        While searching for a subject after a miss, always the full size.
+        """
+        steps = self.loaded_steps(image)
+        if not self.searching and self.last_area_ratio is not None:
+            for min_ratio, size in steps:
+                if self.last_area_ratio >= min_ratio:
+                    return size
+        return steps[-1][1]
+
+    def _largest_area_ratio(self, bboxes, image):
+        if bboxes is None or len(bboxes) == 0:
+            return None
+        bboxes = np.asarray(bboxes)
+        areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+        return float(areas.max()) / (image.shape[0] * image.shape[1])
+
+    def __call__(self, image):
+        size = self.select_size(image)
+        bboxes = self.sessions[size](image)
+
+        full_size = self.full_size_for(image)
+        if len(bboxes) == 0 and size != full_size:
+            # Subject lost at reduced resolution, retry at full resolution
+            self.fallbacks += 1
+            size = full_size
+            bboxes = self.sessions[size](image)
+
+        self.size_counts[size] = self.size_counts.get(size, 0) + 1
+        self.last_area_ratio = self._largest_area_ratio(bboxes, image)
+        self.searching = self.last_area_ratio is None
+        return bboxes
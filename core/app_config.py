@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+
+
+class AppConfig:
+    """Application settings stored as JSON next to the workout data"""
+
+    DEFAULTS = {
+        "backend": "auto",  # auto, onnxruntime, openvino, opencv
+        "auto_backend_choice": {},  # Benchmark winners of "auto", keyed by machine, runtime versions and mode
+        "inference_engine": "builtin",  # builtin (preallocated ONNX Runtime pipeline) or rtmlib
+        "model_mirror_dir": "",  # Extra local directory searched for model files (never downloaded)
+        "model_pool_max_mb": 512,  # Memory cap for preloaded model sessions
+        "pipelined_inference": False,  # Overlap detector and pose stages of consecutive frames
+        "inference_process": False,  # Run inference in a separate worker process
+        "inference_server_address": "127.0.0.1:6150",  # Shared by all UI instances on this machine, loopback only
+        "adaptive_quality": False,  # Let the QoS controller pick the model mode
+        "latency_budget_ms": 33.0,  # Per-frame inference budget for the QoS controller
+        "dual_resolution": False,  # Detect on a downscaled frame, crop pose input from full resolution
+        "capture_size": [1920, 1080],  # Camera capture size (w, h) when dual resolution is on
+        "inference_decimation": False,  # Skip model runs when motion is slow, extrapolate keypoints
+        "decimation_max_interval": 4,  # Most frames between model runs at rest
+        "keypoint_filter": False,  # One-Euro keypoint smoothing before counting (steadier small models)
+        "fused_preprocessing": False,  # Models read raw capture frames, no separate downscale for inference
+        "thread_profile": "balanced",  # balanced, latency, efficiency or default (library defaults)
+        "thread_affinity": False,  # Pin capture and inference threads to separate cores (Linux)
+        "fixed_zone": False,  # Pose model on a fixed workout zone, detector only to recalibrate
+        "fixed_zone_rect": None,  # Marked zone as relative [x1, y1, x2, y2], None calibrates automatically
+        "shared_model_weights": False  # Memory-map model weights so inference processes share them
+    }
+
+    def __init__(self, filename="app_settings.json"):
+        self.data_dir = self._get_data_directory()
+        self.config_file = os.path.join(self.data_dir, filename)
+        self.settings = self.load()
+
+    def _get_data_directory(self):
+        """Get data directory path, compatible with development and packaged environments"""
+        if getattr(sys, 'frozen', False):
+            # Packaged environment, use data folder next to the exe file
+            return os.path.join(os.path.dirname(sys.executable), "data")
+        # Development environment, use data folder under project directory
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, "data")
+
+    def load(self):
+        """Load settings, missing keys fall back to defaults"""
+        settings = dict(self.DEFAULTS)
+        if os.path.exists(self.config_file):
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    settings.update(json.load(f))
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Failed to load settings: {e}")
+        return settings
+
+    def save(self):
+        """Save settings to disk"""
+        try:
+            os.makedirs(self.data_dir, exist_ok=True)
+            with open(self.config_file, 'w', encoding='utf-8') as f:
+                json.dump(self.settings, f, ensure_ascii=False, indent=2)
+        except IOError as e:
+            print(f"Failed to save settings: {e}")
+
+    def get(self, key, default=None):
+        """Get a setting value"""
+        return self.settings.get(key, self.DEFAULTS.get(key, default))
+
+    def get_address(self, key):
+        """Get a "host:port" setting as a (host, port) tuple"""
+        host, _, port = str(self.get(key)).rpartition(':')
+        return (host or '127.0.0.1', int(port))
+
+    def set(self, key, value):
+        """Set a setting value and save"""
+        self.settings[key] = value
+        self.save()
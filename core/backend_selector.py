@@ -0,0 +1,89 @@
+import os
+import time
+import platform
+import importlib
+import importlib.util
+import numpy as np
+
+
+class BackendSelector:
+    """Detects available inference backends and ranks them with a short self-benchmark"""
+
+    # Backends supported by rtmlib, in order of preference when timings are equal
+    BACKENDS = ['onnxruntime', 'openvino', 'opencv']
+    MODULES = {
+        'onnxruntime': 'onnxruntime',
+        'openvino': 'openvino',
+        'opencv': 'cv2'
+    }
+
+    def __init__(self, warmup_runs=1, benchmark_runs=3, frame_size=(360, 640)):
+        self.warmup_runs = warmup_runs
+        self.benchmark_runs = benchmark_runs
+        self.frame_size = frame_size
+        self.last_results = {}
+
+    @classmethod
+    def available_backends(cls):
+        """Get backends whose runtime package is installed"""
+        return [b for b in cls.BACKENDS if importlib.util.find_spec(cls.MODULES[b]) is not None]
+
+    @classmethod
+    def environment_key(cls, mode, backends, device='cpu'):
+        """Key a benchmark result is valid for: machine, runtime versions, device and mode
+
+        A cached choice is only reused while this key stays the same, so a
+        new machine, runtime upgrade or newly installed backend benchmarks again.
+        """
+        versions = []
+        for backend in backends:
+            try:
+                version = getattr(importlib.import_module(cls.MODULES[backend]), '__version__', '?')
+            except Exception:
+                version = 'unavailable'
+            versions.append(f"{backend}={version}")
+        machine = [platform.node(), platform.machine(), platform.processor(), str(os.cpu_count())]
+        return "|".join(machine + [device, mode] + versions)
+
+    def make_test_frame(self):
+        """Create a deterministic noise frame for benchmarking"""
+        rng = np.random.default_rng(0)
+        h, w = self.frame_size
+        return rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+
+    def benchmark(self, factory, backends=None):
+        """Load and time the pose pipeline on each backend
+
+        Args:
+            factory (callable): factory(backend) -> callable pose pipeline
+            backends (list): Backends to try, defaults to all available
+
+        Returns:
+            list: (mean_ms, backend, pipeline) tuples sorted fastest first,
+                  backends that fail to load or run are left out
+        """
+        backends = backends or self.available_backends()
+        frame = self.make_test_frame()
+        ranked = []
+        self.last_results = {}
+
+        for backend in backends:
+            try:
+                pipeline = factory(backend)
+                for _ in range(self.warmup_runs):
+                    pipeline(frame)
+                start = time.perf_counter()
+                for _ in range(self.benchmark_runs):
+                    pipeline(frame)
+                mean_ms = (time.perf_counter() - start) / self.benchmark_runs * 1000
+            except Exception as e:
+                print(f"Backend {backend} unavailable: {e}")
+                self.last_results[backend] = None
+                continue
+
+            print(f"Backend {backend}: {mean_ms:.1f} ms/frame")
+            self.last_results[backend] = mean_ms
+            ranked.append((mean_ms, backend, pipeline))
+
+        ranked.sort(key=lambda item: (item[0], self.BACKENDS.index(item[1])))
+        return ranked
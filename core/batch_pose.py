@@ -0,0 +1,135 @@
+import os
+import numpy as np
+from rtmlib.tools.pose_estimation.post_processings import get_simcc_maximum
+
+
+def batch_variant_path(model_path):
+    """Get the dynamic-batch copy of a model file, built by core/batch_variants.py"""
+    root, ext = os.path.splitext(model_path)
+    return f"{root}_batch{ext}"
+
+
+class PoseMicroBatcher:
+    """Batching layer in front of an RTMPose session
+
+    Crops of every (image, bboxes) request handed over together, e.g. all
+    subjects of a frame, the frames of an offline chunk or one tick of the
+    inference server's streams, are stacked into one (N, 3, H, W) tensor and
+    run as a single inference, then the keypoints are routed back to the
+    request they came from. Models with a fixed batch size or non-ONNX Runtime
+    backends fall back to one run per crop.
+
+    The published RTMPose exports have a fixed batch size of 1, python -m
+    core.batch_variants writes dynamic-batch copies that ModelPool loads instead.
+    """
+
+    _reported = set()  # Fixed batch-size model files already reported
+
+    def __init__(self, pose_model, max_batch=16):
+        self.pose_model = pose_model
+        self.max_batch = max_batch
+
+        # Statistics
+        self.batches = 0
+        self.crops = 0
+        self.report_fixed_batch()
+
+    def set_pose_model(self, pose_model):
+        """Swap the pose session (e.g. after a model mode change)"""
+        self.pose_model = pose_model
+        self.report_fixed_batch()
+
+    def supports_batching(self, pose_model=None):
+        """Check whether the session accepts more than one crop per run"""
+        pose_model = pose_model or self.pose_model
+        if getattr(pose_model, 'backend', None) != 'onnxruntime':
+            return False
+        batch_dim = pose_model.session.get_inputs()[0].shape[0]
+        return not isinstance(batch_dim, int) or batch_dim > 1
+
+    def report_fixed_batch(self):
+        """Print once per model file if its export can only run one crop at a time"""
+        pose_model = self.pose_model
+        if getattr(pose_model, 'backend', None) != 'onnxruntime' or self.supports_batching(pose_model):
+            return
+        name = os.path.basename(pose_model.onnx_model)
+        if name not in self._reported:
+            self._reported.add(name)
+            print(f"{name} has a fixed batch size of 1, pose crops run one at a time. "
+                  f"Run 'python -m core.batch_variants' to build a dynamic-batch copy")
+
+    def average_batch_size(self):
+        """Get mean number of crops per run"""
+        return self.crops / self.batches if self.batches else 0.0
+
+    def _run(self, pose_model, crops):
+        """Run preprocessed crops, returns (simcc_x, simcc_y) with one row per crop"""
+        if len(crops) > 1 and self.supports_batching(pose_model):
+            session = pose_model.session
+            input_name = session.get_inputs()[0].name
+            output_names = [out.name for out in session.get_outputs()]
+            simcc_x, simcc_y = [], []
+            for start in range(0, len(crops), self.max_batch):
+                chunk = crops[start:start + self.max_batch]
+                batch = np.ascontiguousarray(np.stack(chunk).transpose(0, 3, 1, 2), dtype=np.float32)
+                outputs = session.run(output_names, {input_name: batch})
+                simcc_x.append(outputs[0])
+                simcc_y.append(outputs[1])
+                self.batches += 1
+            self.crops += len(crops)
+            return np.concatenate(simcc_x), np.concatenate(simcc_y)
+
+        outputs = [pose_model.inference(crop) for crop in crops]
+        self.batches += len(crops)
+        self.crops += len(crops)
+        return (np.concatenate([o[0] for o in outputs]),
+                np.concatenate([o[1] for o in outputs]))
+
+    def infer_batch(self, requests, simcc_split_ratio=2.0):
+        """Estimate poses for several (image, bboxes) requests in one batched run
+
+        Args:
+            requests (list): (image, bboxes) pairs, an empty bboxes list means
+                             the whole image like RTMPose does
+
+        Returns:
+            list: (keypoints, scores) per request, shapes (N, K, 2) and (N, K)
+        """
+        pose_model = self.pose_model
+        if hasattr(pose_model, 'infer_batch'):
+            # In-house engine batches into its own bound input tensor
+            results = pose_model.infer_batch(requests, simcc_split_ratio)
+            crops = sum(len(keypoints) for keypoints, _ in results)
+            self.batches += -(-crops // pose_model.batch_size)
+            self.crops += crops
+            return results
+
+        crops, centers, scales, owners = [], [], [], []
+        for index, (image, bboxes) in enumerate(requests):
+            if bboxes is None or len(bboxes) == 0:
+                bboxes = [[0, 0, image.shape[1], image.shape[0]]]
+            for bbox in bboxes:
+                crop, center, scale = pose_model.preprocess(image, bbox)
+                crops.append(crop)
+                centers.append(center)
+                scales.append(scale)
+                owners.append(index)
+
+        if not crops:
+            return []
+
+        simcc_x, simcc_y = self._run(pose_model, crops)
+
+        # Decode all crops at once, same math as RTMPose.postprocess
+        locs, scores = get_simcc_maximum(simcc_x, simcc_y)
+        centers = np.array(centers)[:, None, :]
+        scales = np.array(scales)[:, None, :]
+        keypoints = locs / simcc_split_ratio / pose_model.model_input_size * scales
+        keypoints = keypoints + centers - scales / 2
+
+        owners = np.array(owners)
+        return [(keypoints[owners == i], scores[owners == i]) for i in range(len(requests))]
+
+    def estimate(self, image, bboxes):
+        """Estimate poses of all people in one image in a single batched run"""
+        return self.infer_batch([(image, bboxes)])[0]
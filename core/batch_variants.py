@@ -0,0 +1,134 @@
+import os
+import argparse
+import numpy as np
+import onnx
+from onnx import numpy_helper
+
+from core.rtmpose_processor import RTMPoseProcessor
+from core.batch_pose import batch_variant_path
+
+
+class BatchVariantBuilder:
+    """Builds dynamic-batch copies of models exported with a batch size of 1
+
+    Besides the batch dimension of the graph inputs and outputs, such exports
+    bake the 1 into Reshape targets (e.g. flattening the SimCC head input).
+    Those leading 1s become 0, which makes Reshape copy the batch size of its
+    input. Every written model is run on a batch and on its single images,
+    a model whose rows influence each other is deleted again.
+    """
+
+    BATCH_DIM = 'batch'
+
+    def __init__(self, check_batch=3):
+        self.check_batch = check_batch
+
+    def _reshape_targets(self, graph):
+        """Get (tensor, setter) of every constant Reshape target shape"""
+        names = {node.input[1] for node in graph.node if node.op_type == 'Reshape'}
+        targets = []
+        for init in graph.initializer:
+            if init.name in names:
+                targets.append((init, init.CopyFrom))
+        for node in graph.node:
+            if node.op_type == 'Constant' and node.output[0] in names:
+                for attr in node.attribute:
+                    if attr.name == 'value':
+                        targets.append((attr.t, attr.t.CopyFrom))
+        return targets
+
+    def convert(self, model):
+        """Make the batch dimension of a model symbolic in place
+
+        Returns:
+            int: Number of Reshape targets rewritten
+
+        Raises:
+            ValueError: If the model has no fixed batch-1 input
+        """
+        graph = model.graph
+        weights = {init.name for init in graph.initializer}
+        inputs = [value for value in graph.input if value.name not in weights]
+        shapes = [value.type.tensor_type.shape.dim for value in inputs + list(graph.output)]
+        fixed = [len(dims) > 0 and dims[0].dim_value == 1 for dims in shapes]
+        if not any(fixed[:len(inputs)]):
+            raise ValueError("model has no fixed batch size of 1")
+        for dims, is_fixed in zip(shapes, fixed):
+            if is_fixed:
+                dims[0].dim_param = self.BATCH_DIM
+
+        rewritten = 0
+        for tensor, set_tensor in self._reshape_targets(graph):
+            shape = numpy_helper.to_array(tensor)
+            if shape.ndim == 1 and len(shape) > 1 and shape[0] == 1:
+                shape = shape.copy()
+                shape[0] = 0
+                set_tensor(numpy_helper.from_array(shape, tensor.name))
+                rewritten += 1
+        # Intermediate shapes still say 1, let the runtime infer them
+        del graph.value_info[:]
+        return rewritten
+
+    def check(self, path):
+        """Check that a batch gives the same outputs as its images run one by one
+
+        Raises:
+            ValueError: On any difference
+        """
+        import onnxruntime as ort
+        session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+        meta = session.get_inputs()[0]
+        rng = np.random.default_rng(0)
+        batch = rng.uniform(-2, 2, (self.check_batch, *meta.shape[1:])).astype(np.float32)
+        try:
+            batched = session.run(None, {meta.name: batch})
+        except Exception as e:
+            raise ValueError(f"{os.path.basename(path)} fails on a batch: {e}")
+        for row in range(self.check_batch):
+            single = session.run(None, {meta.name: batch[row:row + 1]})
+            for output, expected in zip(batched, single):
+                if output.shape[1:] != expected.shape[1:] or not np.allclose(output[row:row + 1], expected,
+                                                                             rtol=1e-4, atol=1e-4):
+                    raise ValueError(f"{os.path.basename(path)} gives different outputs in a batch")
+
+    def save(self, model, out_path):
+        """Write and check a converted model, returns the output path"""
+        onnx.checker.check_model(model)
+        onnx.save(model, out_path)
+        try:
+            self.check(out_path)
+        except Exception:
+            os.remove(out_path)
+            raise
+        return out_path
+
+    def build(self, model_path, out_path=None):
+        """Write the dynamic-batch copy of a model, returns the output path"""
+        out_path = out_path or batch_variant_path(model_path)
+        model = onnx.load(model_path)
+        rewritten = self.convert(model)
+        self.save(model, out_path)
+        print(f"Built {os.path.basename(out_path)} ({rewritten} reshapes rewritten)")
+        return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build dynamic-batch copies of the pose models")
+    parser.add_argument('--models-dir', default=None, help="Model directory (default: ./models)")
+    args = parser.parse_args()
+
+    models_dir = args.models_dir or RTMPoseProcessor.get_models_dir()
+    builder = BatchVariantBuilder()
+    names = sorted({config['pose'] for config in RTMPoseProcessor.MODEL_CONFIGS.values()})
+    for name in names:
+        path = os.path.join(models_dir, name)
+        if not os.path.exists(path):
+            continue
+        try:
+            builder.build(path)
+        except ValueError as e:
+            print(f"Skipped {name}: {e}")
+
+
+if __name__ == "__main__":
+    main()
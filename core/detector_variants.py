@@ -0,0 +1,162 @@
+import os
+import argparse
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper, shape_inference
+
+from core.rtmpose_processor import RTMPoseProcessor
+from core.adaptive_detector import AdaptiveDetector
+from core.batch_pose import batch_variant_path
+from core.batch_variants import BatchVariantBuilder
+
+
+class DetectorVariantBuilder:
+    """Builds fixed-shape YOLOX models for other input sizes
+
+    The exported YOLOX graph bakes its input size into a few constants: the
+    Focus reshape, the anchor grid and strides of the box decoder and the
+    number of candidate boxes. The convolution weights don't depend on the
+    input size, so rewriting those constants gives a model for any size that
+    is a multiple of 32.
+
+    The NMS at the end of the graph only handles one image, so the batched
+    copy for offline analysis stops at the decoded boxes and class scores
+    and OnnxYOLOX.decode_scored runs the same NMS in numpy.
+    """
+
+    STRIDES = [8, 16, 32]
+
+    def __init__(self, det_path, full_size=(416, 416)):
+        self.det_path = det_path
+        self.full_size = tuple(full_size)
+
+    def _grids(self, size):
+        """Anchor offsets (x, y) and strides for an input size, in decoder order"""
+        grids, strides = [], []
+        for stride in self.STRIDES:
+            h, w = size[0] // stride, size[1] // stride
+            xv, yv = np.meshgrid(np.arange(w), np.arange(h))
+            grids.append(np.stack((xv, yv), 2).reshape(-1, 2) * stride)
+            strides.append(np.full((h * w, 2), stride))
+        return (np.concatenate(grids).astype(np.float32),
+                np.concatenate(strides).astype(np.float32))
+
+    def build(self, size, out_path=None):
+        """Write the detector for input size (h, w), returns the output path"""
+        size = tuple(size)
+        if size[0] % 32 or size[1] % 32:
+            raise ValueError(f"Detector input size must be a multiple of 32, got {size}")
+        out_path = out_path or AdaptiveDetector.variant_path(self.det_path, size, self.full_size)
+
+        model = onnx.load(self.det_path)
+        full_grid, full_strides = self._grids(self.full_size)
+        grid, strides = self._grids(size)
+        full_anchors = len(full_grid)
+        half_h = self.full_size[0] // 2
+        half_w = self.full_size[1] // 2
+
+        replaced = 0
+        for init in model.graph.initializer:
+            value = numpy_helper.to_array(init)
+            new_value = None
+            if value.shape == full_grid.shape and np.array_equal(value, full_grid):
+                new_value = grid
+            elif value.shape == full_strides.shape and np.array_equal(value, full_strides):
+                new_value = strides
+            elif value.dtype == np.int64 and value.shape == (1,) and value[0] == full_anchors:
+                # TopK and index offsets over all candidate boxes
+                new_value = np.array([len(grid)], dtype=np.int64)
+            elif value.dtype == np.int64 and value.tolist() == [1, 3, half_h, 2, -1, 2]:
+                # Focus: space-to-depth of the input
+                new_value = np.array([1, 3, size[0] // 2, 2, -1, 2], dtype=np.int64)
+            elif value.dtype == np.int64 and value.tolist() == [1, 12, half_h, half_w]:
+                new_value = np.array([1, 12, size[0] // 2, size[1] // 2], dtype=np.int64)
+            if new_value is not None:
+                init.CopyFrom(numpy_helper.from_array(new_value.astype(value.dtype), init.name))
+                replaced += 1
+
+        if replaced == 0:
+            raise ValueError(f"{os.path.basename(self.det_path)} has no size-dependent constants to rewrite")
+
+        dims = model.graph.input[0].type.tensor_type.shape.dim
+        dims[2].dim_value = size[0]
+        dims[3].dim_value = size[1]
+        # Intermediate shapes are stale now, let the runtime infer them
+        del model.graph.value_info[:]
+
+        onnx.checker.check_model(model)
+        onnx.save(model, out_path)
+        print(f"Built {os.path.basename(out_path)} ({replaced} constants rewritten)")
+        return out_path
+
+
+    def build_batched(self, out_path=None):
+        """Write a dynamic-batch copy of the detector without its NMS, returns the output path
+
+        Outputs are boxes (N, anchors, 4) in input pixels and class scores
+        (N, anchors, classes), the tensors the in-graph NMS reads.
+        """
+        out_path = out_path or batch_variant_path(self.det_path)
+        model = shape_inference.infer_shapes(onnx.load(self.det_path))
+        graph = model.graph
+        producers = {output: node for node in graph.node for output in node.output}
+        nms = next((node for node in graph.node if node.op_type == 'NonMaxSuppression'), None)
+        if nms is None:
+            raise ValueError(f"{os.path.basename(self.det_path)} has no NMS in the graph")
+
+        # NMS gets both in score order (Gather) and the scores class-major (Transpose)
+        sources = {'boxes': producers[nms.input[0]].input[0],
+                   'scores': producers[producers[nms.input[1]].input[0]].input[0]}
+        shapes = {value.name: value for value in graph.value_info}
+        outputs = []
+        for name, source in sources.items():
+            graph.node.append(helper.make_node('Identity', [source], [name]))
+            value = shapes[source]
+            value.name = name
+            outputs.append(value)
+        del graph.output[:]
+        graph.output.extend(outputs)
+
+        # Keep only what the new outputs depend on
+        needed, kept = set(sources), []
+        for node in reversed(graph.node):
+            if any(output in needed for output in node.output):
+                kept.append(node)
+                needed.update(node.input)
+        del graph.node[:]
+        graph.node.extend(reversed(kept))
+        initializers = [init for init in graph.initializer if init.name in needed]
+        del graph.initializer[:]
+        graph.initializer.extend(initializers)
+
+        batch_builder = BatchVariantBuilder()
+        rewritten = batch_builder.convert(model)
+        batch_builder.save(model, out_path)
+        print(f"Built {os.path.basename(out_path)} ({rewritten} reshapes rewritten, NMS removed)")
+        return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build reduced-size YOLOX detector models")
+    parser.add_argument('--models-dir', default=None, help="Model directory (default: ./models)")
+    parser.add_argument('--sizes', nargs='*', default=None,
+                        help="Input sizes as HxW (default: all adaptive and orientation sizes)")
+    parser.add_argument('--batched', action='store_true',
+                        help="Build the dynamic-batch copy for offline analysis instead")
+    args = parser.parse_args()
+
+    models_dir = args.models_dir or RTMPoseProcessor.get_models_dir()
+    builder = DetectorVariantBuilder(os.path.join(models_dir, RTMPoseProcessor.DET_MODEL))
+    if args.batched:
+        builder.build_batched()
+        return
+    if args.sizes:
+        sizes = [tuple(int(v) for v in s.lower().split('x')) for s in args.sizes]
+    else:
+        sizes = [size for size in AdaptiveDetector.all_sizes() if size != builder.full_size]
+    for size in sizes:
+        builder.build(size)
+
+
+if __name__ == "__main__":
+    main()
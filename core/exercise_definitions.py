@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import math
+from core.translations import Translations as T
+
+
+class ExerciseDefinitions:
+    """Exercises defined in data files, compiled into counter tables at load time
+
+    data/exercise_definitions.json holds the built-in exercises, an optional
+    data/custom_exercises.json in the same format adds or replaces entries,
+    so new exercises need no code changes. Each exercise names its joints
+    by COCO keypoint name and picks a counting mode:
+
+    - bilateral: smoothed mean angle of both sides with up/down hysteresis
+    - unilateral: each side counts on its own (leg exercises)
+    - phases: named phases with angle conditions on several measures and a
+      sequence to walk through, one rep per completed sequence (burpees)
+
+    An angle is given by three keypoints, the middle one is the joint. Two
+    keypoints give the tilt of the segment from the first to the second
+    away from straight up: 0 upright, 90 level, 180 upside down.
+
+    Compiling resolves names to keypoint indices and turns a phase sequence
+    into a transition table indexed by the current phase, so a frame only
+    checks the conditions of the next phase. Broken entries are reported
+    and skipped.
+    """
+
+    FILE = "exercise_definitions.json"
+    CUSTOM_FILE = "custom_exercises.json"
+    MODES = ('bilateral', 'unilateral', 'phases')
+    UP = -1  # Last point of a tilt measure's triplet: straight up from the middle keypoint
+    KEYPOINT_NAMES = [
+        "nose", "left_eye", "right_eye", "left_ear", "right_ear",
+        "left_shoulder", "right_shoulder", "left_elbow", "right_elbow",
+        "left_wrist", "right_wrist", "left_hip", "right_hip",
+        "left_knee", "right_knee", "left_ankle", "right_ankle"
+    ]
+
+    _default = None
+
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir or self._get_data_directory()
+        self.configs = {}  # exercise -> compiled config, in definition order
+        builtin_path = os.path.join(self.data_dir, self.FILE)
+        if not os.path.exists(builtin_path):
+            print(f"Exercise definitions not found: {builtin_path}")
+        builtin = self._load_json(builtin_path)
+        custom = self._load_json(os.path.join(self.data_dir, self.CUSTOM_FILE))
+
+        defaults = builtin.get('defaults', {})
+        for source in (builtin, custom):
+            for exercise, definition in source.get('exercises', {}).items():
+                try:
+                    self.configs[exercise] = self.compile(definition, defaults)
+                except (KeyError, ValueError, TypeError, AttributeError) as e:
+                    print(f"Skipping exercise definition {exercise}: {e!r}")
+
+    @classmethod
+    def default(cls):
+        """Definitions from the data directory, loaded once per process"""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def _get_data_directory(self):
+        """Get data directory path, compatible with development and packaged environments"""
+        if getattr(sys, 'frozen', False):
+            return os.path.join(os.path.dirname(sys.executable), "data")
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, "data")
+
+    def _load_json(self, path):
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Failed to load {os.path.basename(path)}: {e}")
+            return {}
+
+    def _joints(self, joints):
+        """Keypoint indices of one angle, first, middle, last
+
+        A segment (2 keypoints) becomes (end, start, UP), its tilt from vertical.
+        """
+        if len(joints) not in (2, 3):
+            raise ValueError(f"an angle needs 3 keypoints or a segment 2, got {joints}")
+        indices = []
+        for joint in joints:
+            if isinstance(joint, int) and 0 <= joint < len(self.KEYPOINT_NAMES):
+                indices.append(joint)
+            elif joint in self.KEYPOINT_NAMES:
+                indices.append(self.KEYPOINT_NAMES.index(joint))
+            else:
+                raise ValueError(f"unknown keypoint {joint}")
+        if len(indices) == 2:
+            return [indices[1], indices[0], self.UP]
+        return indices
+
+    def _sides(self, sides):
+        return {'left': self._joints(sides['left']), 'right': self._joints(sides['right'])}
+
+    def compile(self, definition, defaults=None):
+        """Compile one exercise definition into the config ExerciseCounter runs"""
+        spec = dict(defaults or {})
+        spec.update(definition)
+        timing = dict((defaults or {}).get('timing', {}))
+        timing.update(definition.get('timing', {}))
+
+        mode = spec.get('mode', 'bilateral')
+        if mode not in self.MODES:
+            raise ValueError(f"unknown mode {mode}")
+        if mode == 'phases':
+            measures = {name: self._sides(sides) for name, sides in spec['measures'].items()}
+        else:
+            measures = {'angle': self._sides(spec['joints'])}
+        if not measures:
+            raise ValueError("no joints to measure")
+        first = next(iter(measures.values()))
+        display = self._joints(spec['display']) if 'display' in spec else first['right']
+        if self.UP in display:
+            raise ValueError("the shown angle needs 3 keypoints")
+
+        highlight = spec.get('highlight', {})
+        config = {
+            'mode': mode,
+            'keypoints': first,  # Angle shown while counting
+            'measures': measures,
+            'display': display,
+            'min_rep_time': float(timing.get('min_rep_time', 0.5)),
+            'highlight': (float(highlight.get('below', -math.inf)), float(highlight.get('above', math.inf))),
+            'color': spec.get('color'),
+            'goal': int(spec.get('goal', 0)),
+            'name': spec.get('name', {})  # Display names by language for exercises without a translation
+        }
+        if mode == 'phases':
+            config.update(self._compile_phases(spec, list(measures), timing))
+        else:
+            config['up_angle'] = float(spec['up_angle'])
+            config['down_angle'] = float(spec['down_angle'])
+        return config
+
+    def _compile_phases(self, spec, measure_names, timing):
+        """Build the transition table of a phase sequence
+
+        The counter's phase is the index of the last sequence step reached,
+        -1 before the first. transitions[phase + 1] holds the conditions of
+        the next step as (measure slot, above, below) and what reaching it
+        does: the stage to show, whether it completes a rep and the phase
+        to continue from.
+        """
+        slots = {name: slot for slot, name in enumerate(measure_names)}
+        phases = {}
+        for name, phase in spec['phases'].items():
+            stage = phase.get('stage')
+            if stage not in (None, 'up', 'down'):
+                raise ValueError(f"phase {name} has unknown stage {stage}")
+            conditions = tuple(
+                (slots[measure], float(bounds.get('above', -math.inf)), float(bounds.get('below', math.inf)))
+                for measure, bounds in phase['when'].items()
+            )
+            phases[name] = (conditions, stage)
+
+        sequence = spec['sequence']
+        if len(sequence) < 2:
+            raise ValueError("a phase sequence needs at least 2 steps")
+        last = len(sequence) - 1
+        # A sequence ending where it started continues straight into the next rep
+        restart = 0 if sequence[-1] == sequence[0] else -1
+        transitions = []
+        for step, name in enumerate(sequence):
+            conditions, stage = phases[name]
+            counts = step == last
+            transitions.append((conditions, stage, counts, restart if counts else step))
+        return {
+            'transitions': transitions,
+            'max_phase_time': float(timing.get('max_phase_time', math.inf))  # Back to the start if exceeded
+        }
+
+    def exercises(self):
+        """Exercise codes in definition order"""
+        return list(self.configs)
+
+    def display_name(self, exercise):
+        """Exercise name in the current language"""
+        if exercise in T.translations:
+            return T.get(exercise)
+        names = self.configs.get(exercise, {}).get('name', {})
+        return names.get(T.current_language) or names.get('en') or exercise.replace('_', ' ').title()
+
+    def display_names(self):
+        """Get {exercise code: name in the current language}"""
+        return {exercise: self.display_name(exercise) for exercise in self.configs}
+
+    def colors(self):
+        """Get {name in the current language: color} of exercises that define one"""
+        return {self.display_name(exercise): config['color']
+                for exercise, config in self.configs.items() if config['color']}
+
+    def default_goals(self):
+        """Get {exercise code: default daily goal}"""
+        return {exercise: config['goal'] for exercise, config in self.configs.items()}
+
+    def highlight(self, exercise, angle):
+        """Check whether an angle is at one of the exercise's key points"""
+        config = self.configs.get(exercise)
+        if config is None:
+            return False
+        below, above = config['highlight']
+        return angle < below or angle > above
@@ -0,0 +1,148 @@
+import numpy as np
+from core.model_pool import estimate_full_resolution
+
+
+class FixedZoneEstimator:
+    """Pose-only inference on a fixed workout zone, the detector runs only to (re)calibrate
+
+    With a fixed camera and a trainee working out in one spot, the detector
+    keeps finding the same box. The zone is either given or calibrated from
+    the union of detected boxes over the first frames, expanded by a margin
+    so the whole range of motion fits. After that the pose model runs on the
+    zone crop alone. When the mean keypoint confidence stays below
+    collapse_threshold for patience frames the detector runs again, and a
+    calibrated zone is recalibrated around wherever the person was found.
+    A marked zone keeps its size and moves to the person if they are found
+    outside it. While the detector finds nobody it runs alone on every frame
+    and no pose is reported.
+
+    Zones are kept relative to the frame size, (x1, y1, x2, y2) in 0..1.
+    """
+
+    def __init__(self, zone=None, calibration_frames=30, margin=0.15, collapse_threshold=0.3, patience=3):
+        self.calibration_frames = calibration_frames
+        self.margin = margin
+        self.collapse_threshold = collapse_threshold
+        self.patience = patience
+
+        # Statistics
+        self.detector_frames = 0
+        self.pose_only_frames = 0
+        self.set_zone(zone)
+
+    def set_zone(self, zone):
+        """Use a marked zone (relative x1, y1, x2, y2), None calibrates one automatically"""
+        self.user_zone = zone is not None
+        self.zone = tuple(float(v) for v in zone) if zone is not None else None
+        self.low_frames = 0
+        self.person_left = False  # Detector found nobody since the confidence collapsed
+        self._union = None
+        self._calibrated_frames = 0
+
+    def recalibrate(self):
+        """Forget the zone and calibrate a new one from the next frames"""
+        self.set_zone(None)
+
+    def is_calibrated(self):
+        return self.zone is not None
+
+    def zone_pixels(self, image):
+        """Get the zone as an xyxy box in pixels of image"""
+        h, w = image.shape[:2]
+        x1, y1, x2, y2 = self.zone
+        return np.array([x1 * w, y1 * h, x2 * w, y2 * h], dtype=np.float32)
+
+    def detector_skip_ratio(self):
+        """Fraction of frames that needed no detector run"""
+        total = self.detector_frames + self.pose_only_frames
+        return self.pose_only_frames / total if total else 0.0
+
+    def report(self):
+        """Print how many frames ran without the detector"""
+        total = self.detector_frames + self.pose_only_frames
+        print(f"Fixed zone: detector skipped on {self.detector_skip_ratio():.0%} of {total} frames")
+
+    def _pose(self, session_set, image, pose_image, bboxes):
+        if pose_image is None:
+            return session_set.batcher.estimate(image, bboxes)
+        return estimate_full_resolution(session_set.batcher.estimate, image, pose_image, bboxes)
+
+    def _add_to_union(self, bboxes, image):
+        # Largest box is the trainee
+        bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        box = bboxes[np.argmax((bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1]))]
+        h, w = image.shape[:2]
+        box = box / [w, h, w, h]
+        if self._union is None:
+            self._union = box
+        else:
+            self._union = np.concatenate((np.minimum(self._union[:2], box[:2]),
+                                          np.maximum(self._union[2:], box[2:])))
+
+    def _move_zone(self, bboxes, image):
+        """Center the marked zone on the largest detected box, grown to fit it with margin"""
+        bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        box = bboxes[np.argmax((bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1]))]
+        h, w = image.shape[:2]
+        bx1, by1, bx2, by2 = box / [w, h, w, h]
+        x1, y1, x2, y2 = self.zone
+        if bx1 >= x1 and by1 >= y1 and bx2 <= x2 and by2 <= y2:
+            return
+        width = min(1.0, max(x2 - x1, (bx2 - bx1) * (1 + 2 * self.margin)))
+        height = min(1.0, max(y2 - y1, (by2 - by1) * (1 + 2 * self.margin)))
+        cx = min(max((bx1 + bx2) / 2, width / 2), 1.0 - width / 2)
+        cy = min(max((by1 + by2) / 2, height / 2), 1.0 - height / 2)
+        self.zone = (float(cx - width / 2), float(cy - height / 2), float(cx + width / 2), float(cy + height / 2))
+        print(f"Person outside the marked zone, moved it to "
+              f"({self.zone[0]:.2f}, {self.zone[1]:.2f}, {self.zone[2]:.2f}, {self.zone[3]:.2f})")
+
+    def _finish_calibration(self):
+        x1, y1, x2, y2 = self._union
+        pad_x, pad_y = (x2 - x1) * self.margin, (y2 - y1) * self.margin
+        self.zone = (float(max(0.0, x1 - pad_x)), float(max(0.0, y1 - pad_y)),
+                     float(min(1.0, x2 + pad_x)), float(min(1.0, y2 + pad_y)))
+        print(f"Fixed zone calibrated: ({self.zone[0]:.2f}, {self.zone[1]:.2f}, {self.zone[2]:.2f}, {self.zone[3]:.2f})")
+
+    def _detect(self, session_set, image, pose_image):
+        """Full detector + pose run, feeding the calibration"""
+        bboxes = session_set.det_model(image)
+        self.detector_frames += 1
+        if len(bboxes) > 0:
+            self._add_to_union(bboxes, image)
+            self._calibrated_frames += 1
+            if self.zone is None and self._calibrated_frames >= self.calibration_frames:
+                self._finish_calibration()
+        return self._pose(session_set, image, pose_image, bboxes)
+
+    def __call__(self, session_set, image, pose_image=None):
+        """Estimate poses, called like PoseSessionSet with the sessions to use"""
+        if self.zone is None:
+            return self._detect(session_set, image, pose_image)
+
+        if self.low_frames >= self.patience:
+            # Confidence collapsed: the trainee moved or left, look for them again.
+            # Pose estimation falls back to the whole frame without boxes, so check the boxes
+            bboxes = session_set.det_model(image)
+            self.detector_frames += 1
+            if len(bboxes) == 0:
+                if not self.person_left:
+                    print("Fixed zone: nobody found, detecting on every frame until someone returns")
+                    self.person_left = True
+                return (np.zeros((0, 17, 2), dtype=np.float32), np.zeros((0, 17), dtype=np.float32))
+            self.person_left = False
+            self.low_frames = 0
+            if self.user_zone:
+                self._move_zone(bboxes, image)
+            else:
+                self.recalibrate()
+                self._add_to_union(bboxes, image)
+                self._calibrated_frames += 1
+            return self._pose(session_set, image, pose_image, bboxes)
+
+        keypoints, scores = self._pose(session_set, image, pose_image, [self.zone_pixels(image)])
+        self.pose_only_frames += 1
+        if len(scores) == 0 or float(np.mean(scores[0])) < self.collapse_threshold:
+            self.low_frames += 1
+        else:
+            self.low_frames = 0
+        return keypoints, scores
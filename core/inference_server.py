@@ -0,0 +1,479 @@
+import os
+import sys
+import time
+import secrets
+import ipaddress
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client, wait
+import numpy as np
+
+
+DEFAULT_ADDRESS = ('127.0.0.1', 6150)
+AUTHKEY_FILE = "inference_server.key"
+
+
+def _get_data_directory():
+    """Get data directory path, compatible with development and packaged environments"""
+    if getattr(sys, 'frozen', False):
+        return os.path.join(os.path.dirname(sys.executable), "data")
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "data")
+
+
+def load_authkey(path=None):
+    """Get this install's server key, creating a random one readable only by the user
+
+    Connections unpickle what they receive, so only processes that can read
+    this file may talk to the server.
+    """
+    path = path or os.path.join(_get_data_directory(), AUTHKEY_FILE)
+    try:
+        with open(path, 'rb') as f:
+            key = f.read()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    key = secrets.token_bytes(32)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another instance created it first
+        with open(path, 'rb') as f:
+            return f.read()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+def check_address(address):
+    """Make sure an inference server address is on this machine
+
+    Raises:
+        ValueError: If the host is not a loopback address
+    """
+    host = address[0]
+    if host == 'localhost':
+        return tuple(address)
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError(f"Inference server address must be a loopback address, got {host}")
+    return tuple(address)
+
+
+class _AttachedSegment:
+    """Mapping of another process's POSIX shared memory segment, never tracked or unlinked here
+
+    SharedMemory(name=...) before Python 3.13 registers the segment with the
+    resource tracker, which a spawned worker shares with the client that owns it.
+    """
+
+    def __init__(self, name):
+        import mmap
+        import _posixshmem
+        fd = _posixshmem.shm_open("/" + name.lstrip("/"), os.O_RDWR, mode=0o600)
+        try:
+            self._mmap = mmap.mmap(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        self.buf.release()
+        self._mmap.close()
+
+
+def _attach_shared_memory(name):
+    """Attach to a client's ring buffer without taking ownership of it"""
+    try:
+        # Python 3.13+
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    if os.name == 'posix':
+        return _AttachedSegment(name)
+    # Windows segments are not tracked, they go away with the last handle
+    return shared_memory.SharedMemory(name=name)
+
+
+def _infer_frames(wholebody, batcher, frames):
+    """Run detection per frame and pose estimation for all frames in one batch"""
+    if wholebody is None:
+        return [(None, None)] * len(frames)
+
+    det_model = getattr(wholebody, 'det_model', None)
+    pose_model = getattr(wholebody, 'pose_model', None)
+    if det_model is None or pose_model is None:
+        return [wholebody(frame) for frame in frames]
+
+    if batcher.pose_model is not pose_model:
+        batcher.set_pose_model(pose_model)
+    requests = [(frame, det_model(frame)) for frame in frames]
+    return batcher.infer_batch(requests)
+
+
+def _serve(address, authkey, mode, backend, device, pool_memory_mb, batch_window_ms=3.0, shared_weights=False,
+           control_token=None):
+    """Inference worker process main loop
+
+    Every client has its own model mode, frames of clients on different
+    modes are batched per mode. Only the owner holding control_token may
+    shut the server down.
+    """
+    from core.rtmpose_processor import RTMPoseProcessor
+    from core.batch_pose import PoseMicroBatcher
+
+    processor = RTMPoseProcessor(None, mode=mode, backend=backend, device=device,
+                                 pool_memory_mb=pool_memory_mb, shared_weights=shared_weights)
+    batcher = PoseMicroBatcher(None)
+    batch_window = batch_window_ms / 1000.0
+    sessions = {processor.mode: processor.wholebody}  # mode -> session set used by some client
+
+    def sessions_for(mode):
+        """Get (loading if needed) the session set of a mode"""
+        if mode not in sessions:
+            pool = processor.model_pools.get(processor.backend)
+            if pool is None:
+                raise RuntimeError("No model pool to load modes from")
+            sessions[mode] = pool.get(mode)
+        return sessions[mode]
+
+    def release_unused_modes():
+        in_use = {client['mode'] for client in clients.values()} | {processor.mode}
+        for unused in [m for m in sessions if m not in in_use]:
+            del sessions[unused]
+
+    # Listen only once models are loaded, so a successful connect means ready
+    listener = Listener(address, authkey=authkey)
+    pending = []
+    pending_lock = threading.Lock()
+
+    def accept_loop():
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception:
+                continue
+            with pending_lock:
+                pending.append(conn)
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    print(f"Inference server ready on {address[0]}:{address[1]} (pid {os.getpid()})")
+
+    clients = {}  # connection -> {'shm': shared memory, 'slot_bytes': int, 'mode': model mode}
+
+    def handle(conn, batch):
+        """Handle one message, frames to infer are appended to batch"""
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            shm = clients.pop(conn)['shm']
+            if shm is not None:
+                shm.close()
+            release_unused_modes()
+            return True
+
+        command = message[0]
+        client = clients[conn]
+        try:
+            if command == 'attach':
+                _, shm_name, slot_bytes = message
+                if client['shm'] is not None:
+                    client['shm'].close()
+                client['shm'] = _attach_shared_memory(shm_name)
+                client['slot_bytes'] = slot_bytes
+                conn.send(('ok', client['mode']))
+            elif command == 'infer':
+                _, seq, slot, shape = message
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=client['shm'].buf,
+                                   offset=slot * client['slot_bytes'])
+                batch.append((conn, seq, frame))
+            elif command == 'set_mode':
+                # Only this client's mode changes, other clients keep theirs
+                mode = message[1]
+                if mode not in processor.MODEL_CONFIGS:
+                    raise ValueError(f"Unknown model mode: {mode}")
+                sessions_for(mode)
+                client['mode'] = mode
+                release_unused_modes()
+                conn.send(('ok', mode))
+            elif command == 'ping':
+                conn.send(('pong', os.getpid()))
+            elif command == 'shutdown':
+                if control_token is None or len(message) < 2 or \
+                        not secrets.compare_digest(message[1], control_token):
+                    raise PermissionError("Only the process that started the server may shut it down")
+                conn.send(('ok', None))
+                return False
+        except Exception as e:
+            print(f"Inference server error: {e}")
+            try:
+                conn.send(('error', str(e)))
+            except (EOFError, OSError):
+                pass
+        return True
+
+    while True:
+        with pending_lock:
+            for conn in pending:
+                clients[conn] = {'shm': None, 'slot_bytes': 0, 'mode': processor.mode}
+            pending.clear()
+
+        if not clients:
+            time.sleep(0.05)
+            continue
+
+        batch = []
+        for conn in wait(list(clients), timeout=0.05):
+            if not handle(conn, batch):
+                return
+
+        # Give the other streams a few ms to deliver their frame for the same tick
+        if batch and len(clients) > 1:
+            deadline = time.perf_counter() + batch_window
+            waiting = [c for c in clients if c not in {item[0] for item in batch}]
+            while waiting:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                ready = wait(waiting, timeout=remaining)
+                if not ready:
+                    break
+                for conn in ready:
+                    waiting.remove(conn)
+                    if not handle(conn, batch):
+                        return
+
+        if not batch:
+            continue
+
+        # One batched run per model mode in use
+        by_mode = {}
+        for item in batch:
+            by_mode.setdefault(clients[item[0]]['mode'], []).append(item)
+        for mode, items in by_mode.items():
+            start = time.perf_counter()
+            try:
+                results = _infer_frames(sessions_for(mode), batcher, [frame for _, _, frame in items])
+                error = None
+            except Exception as e:
+                print(f"Inference server error: {e}")
+                results, error = None, str(e)
+            server_ms = (time.perf_counter() - start) * 1000
+
+            for index, (conn, seq, _) in enumerate(items):
+                try:
+                    if error is not None:
+                        conn.send(('error', error))
+                    else:
+                        keypoints, scores = results[index]
+                        conn.send(('result', seq, keypoints, scores, server_ms))
+                except (EOFError, OSError):
+                    pass
+
+
+class InferenceServer:
+    """Runs RTMPose inference in a separate worker process"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, mode='balanced',
+                 backend='onnxruntime', device='cpu', pool_memory_mb=512, startup_timeout=60,
+                 batch_window_ms=3.0, shared_weights=False):
+        self.address = check_address(address)
+        self.authkey = authkey or load_authkey()
+        self.control_token = secrets.token_bytes(16)  # Lets only this owner shut the worker down
+        self.mode = mode
+        self.backend = backend
+        self.device = device
+        self.pool_memory_mb = pool_memory_mb
+        self.startup_timeout = startup_timeout
+        self.batch_window_ms = batch_window_ms  # How long to wait for other streams' frames
+        self.shared_weights = shared_weights  # Map model weights shared with other processes
+        self.process = None
+        self.restarts = 0
+
+    def start(self):
+        """Start the worker process and wait until it accepts connections"""
+        # spawn keeps the worker free of the GUI process's Qt state
+        ctx = mp.get_context('spawn')
+        self.process = ctx.Process(
+            target=_serve,
+            args=(self.address, self.authkey, self.mode, self.backend, self.device,
+                  self.pool_memory_mb, self.batch_window_ms, self.shared_weights, self.control_token),
+            name="pose-inference-server",
+            daemon=True
+        )
+        self.process.start()
+
+        deadline = time.time() + self.startup_timeout
+        while time.time() < deadline:
+            if not self.process.is_alive():
+                raise RuntimeError("Inference server exited during startup")
+            try:
+                conn = Client(self.address, authkey=self.authkey)
+                conn.send(('ping',))
+                conn.recv()
+                conn.close()
+                print(f"Inference server started (pid {self.process.pid})")
+                return
+            except (ConnectionRefusedError, OSError, EOFError):
+                time.sleep(0.2)
+        raise TimeoutError("Inference server did not start in time")
+
+    def is_alive(self):
+        """Check whether the worker process is running"""
+        return self.process is not None and self.process.is_alive()
+
+    def restart(self):
+        """Restart a crashed or hung worker"""
+        self.stop()
+        self.restarts += 1
+        print(f"Restarting inference server (restart #{self.restarts})")
+        self.start()
+
+    def stop(self):
+        """Stop the worker process"""
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            try:
+                conn = Client(self.address, authkey=self.authkey)
+                conn.send(('shutdown', self.control_token))
+                conn.recv()
+                conn.close()
+            except (OSError, EOFError):
+                pass
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=2)
+        self.process = None
+
+
+class InferenceClient:
+    """Sends frames to the inference server through a shared-memory ring buffer
+
+    Called like rtmlib Wholebody: client(frame) -> (keypoints, scores).
+    Only keypoints and scores travel back over the connection.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, server=None,
+                 slots=4, slot_bytes=1280 * 720 * 3):
+        self.address = check_address(address)
+        self.authkey = authkey or load_authkey()
+        self.server = server  # Owned server to restart on crash, None if shared
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.conn = None
+        self.shm = None
+        self.mode = None
+        self._seq = 0
+        self._sent = {}  # seq -> send time
+
+        # IPC latency statistics (round trip minus server compute time)
+        self.ipc_ms = 0.0
+        self.server_ms = 0.0
+        self.frames = 0
+
+        self.connect()
+
+    def connect(self):
+        """Connect to the server and hand over the ring buffer"""
+        self.conn = Client(self.address, authkey=self.authkey)
+        if self.shm is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self.conn.send(('attach', self.shm.name, self.slot_bytes))
+        _, self.mode = self.conn.recv()
+        self._sent.clear()
+
+    def _ensure_capacity(self, nbytes):
+        """Grow ring buffer slots for larger frames"""
+        if nbytes <= self.slot_bytes:
+            return
+        self.shm.close()
+        self.shm.unlink()
+        self.slot_bytes = nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self.conn.send(('attach', self.shm.name, self.slot_bytes))
+        self.conn.recv()
+
+    def submit(self, frame):
+        """Copy frame into the next ring slot and queue it for inference"""
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        self._ensure_capacity(frame.nbytes)
+        slot = self._seq % self.slots
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        view[...] = frame
+        self._sent[self._seq] = time.perf_counter()
+        self.conn.send(('infer', self._seq, slot, frame.shape))
+        self._seq += 1
+
+    def receive(self):
+        """Wait for the next result, returns (keypoints, scores)"""
+        message = self.conn.recv()
+        if message[0] == 'error':
+            raise RuntimeError(message[1])
+        _, seq, keypoints, scores, server_ms = message
+        round_trip = (time.perf_counter() - self._sent.pop(seq)) * 1000
+
+        # Exponential moving averages for display
+        alpha = 0.1 if self.frames else 1.0
+        self.ipc_ms += alpha * (max(0.0, round_trip - server_ms) - self.ipc_ms)
+        self.server_ms += alpha * (server_ms - self.server_ms)
+        self.frames += 1
+        return keypoints, scores
+
+    def __call__(self, frame):
+        try:
+            self.submit(frame)
+            return self.receive()
+        except (EOFError, OSError, ConnectionError) as e:
+            print(f"Inference server connection lost: {e}")
+            if not self.reconnect():
+                return None, None
+            self.submit(frame)
+            return self.receive()
+
+    def reconnect(self):
+        """Restart the owned server if it died and reconnect"""
+        try:
+            if self.server is not None and not self.server.is_alive():
+                self.server.restart()
+            self.connect()
+            return True
+        except Exception as e:
+            print(f"Reconnecting to inference server failed: {e}")
+            return False
+
+    def set_mode(self, mode):
+        """Switch this client's model mode, other clients of the server keep theirs"""
+        self.conn.send(('set_mode', mode))
+        reply = self.conn.recv()
+        if reply[0] == 'error':
+            raise RuntimeError(reply[1])
+        self.mode = reply[1]
+        if self.server is not None:
+            self.server.mode = self.mode
+        return self.mode
+
+    def latency_stats(self):
+        """Get IPC and server compute latency in milliseconds"""
+        return {'ipc_ms': self.ipc_ms, 'server_ms': self.server_ms, 'frames': self.frames}
+
+    def close(self):
+        """Disconnect and release the ring buffer"""
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+            self.conn = None
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
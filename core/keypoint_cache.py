@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+
+
+class KeypointCache:
+    """Per-video keypoint store so a recording is only run through the models once
+
+    Entries are keyed by the video file, the model mode and the settings
+    and model files that produced the keypoints, and hold the first
+    person's keypoints and scores of every frame. Keypoints are stored as int16 in 1/8 pixel steps and
+    scores as float16, about 100 bytes per frame.
+    """
+
+    VERSION = 2  # 2: file path and mtime in the content hash
+    KEYPOINT_STEPS = 8  # Fixed-point steps per pixel, int16 covers +-4096 px
+    HASH_SAMPLES = 16  # Chunks read for the content hash
+    HASH_CHUNK = 1024 * 1024
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.path.join(self._get_data_directory(), "keypoint_cache")
+        self.hits = 0
+        self.misses = 0
+
+    def _get_data_directory(self):
+        """Get data directory path, compatible with development and packaged environments"""
+        if getattr(sys, 'frozen', False):
+            return os.path.join(os.path.dirname(sys.executable), "data")
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, "data")
+
+    def content_hash(self, video_path):
+        """Hash the file's path, size and modification time plus evenly spaced chunks
+
+        Reading a handful of chunks keeps hashing an hour of video to
+        milliseconds. The chunks alone can miss an edit between them, the
+        modification time can't, so any rewrite of the file gets a new hash.
+        """
+        stat = os.stat(video_path)
+        size = stat.st_size
+        digest = hashlib.sha256(f"{os.path.abspath(video_path)}\0{size}\0{stat.st_mtime_ns}".encode())
+        with open(video_path, 'rb') as f:
+            if size <= self.HASH_SAMPLES * self.HASH_CHUNK:
+                digest.update(f.read())
+            else:
+                step = (size - self.HASH_CHUNK) // (self.HASH_SAMPLES - 1)
+                for i in range(self.HASH_SAMPLES):
+                    f.seek(i * step)
+                    digest.update(f.read(self.HASH_CHUNK))
+        return digest.hexdigest()
+
+    def key(self, video_path, mode, settings=None):
+        """Get cache key of a video analysed with a model mode and preprocessing settings"""
+        description = json.dumps({
+            'version': self.VERSION,
+            'content': self.content_hash(video_path),
+            'mode': mode,
+            'settings': settings or {}
+        }, sort_keys=True)
+        return hashlib.sha256(description.encode()).hexdigest()[:32]
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, key):
+        """Load a cache entry
+
+        Returns:
+            dict: keypoints (T, K, 2) and scores (T, K) as float32, present (T,)
+                  per-frame detection flags and fps, or None if not cached
+        """
+        path = self.path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            with np.load(path) as data:
+                entry = {
+                    'keypoints': data['keypoints'].astype(np.float32) / self.KEYPOINT_STEPS,
+                    'scores': data['scores'].astype(np.float32),
+                    'present': data['present'],
+                    'fps': float(data['fps'])
+                }
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Failed to load keypoint cache {os.path.basename(path)}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def save(self, key, keypoints, scores, present, fps):
+        """Store per-frame first-person keypoints (T, K, 2), scores (T, K) and presence flags"""
+        keypoints = np.round(np.asarray(keypoints, dtype=np.float32) * self.KEYPOINT_STEPS)
+        limit = np.iinfo(np.int16)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename so an interrupted run never leaves a truncated entry
+            tmp_path = self.path(key) + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(f,
+                                    keypoints=np.clip(keypoints, limit.min, limit.max).astype(np.int16),
+                                    scores=np.asarray(scores, dtype=np.float16),
+                                    present=np.asarray(present, dtype=bool),
+                                    fps=np.float64(fps))
+            os.replace(tmp_path, self.path(key))
+        except IOError as e:
+            print(f"Failed to save keypoint cache: {e}")
+
+    def clear(self):
+        """Delete all cache entries"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,102 @@
+import time
+import numpy as np
+
+
+class OneEuroKeypointFilter:
+    """Confidence-weighted One-Euro filter over all keypoints of one person at once
+
+    The One-Euro filter is a low-pass filter whose cutoff rises with speed:
+    at rest it removes the frame-to-frame jitter of small pose models, during
+    a rep it follows the joints with little lag. Speed is measured in body
+    sizes per second so the same settings work at any resolution.
+
+    Each keypoint's update is also scaled by its confidence: a barely visible
+    joint moves the estimate a little, a joint below conf_threshold not at
+    all, so a single bad frame can't make an angle cross a threshold.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=3.0, d_cutoff=1.0, conf_threshold=0.5,
+                 full_confidence=0.8, max_gap=0.5):
+        self.min_cutoff = min_cutoff  # Cutoff at rest (Hz)
+        self.beta = beta  # Cutoff increase per body size per second of speed
+        self.d_cutoff = d_cutoff  # Cutoff of the speed estimate (Hz)
+        self.conf_threshold = conf_threshold
+        self.full_confidence = full_confidence  # At or above: full One-Euro update
+        self.max_gap = max_gap  # Seconds without a result after which filtering restarts
+        self.reset()
+
+    def reset(self):
+        """Forget the filter state, the next result passes through unchanged"""
+        self.keypoints = None  # (K, 2) filtered positions
+        self.velocity = None  # (K, 2) filtered speed, pixels per second
+        self.tracked = None  # (K,) keypoints seen with enough confidence since the reset
+        self.last_time = None
+
+    @staticmethod
+    def smoothing_factor(elapsed, cutoff):
+        """Exponential smoothing factor of a first order low-pass filter"""
+        r = 2 * np.pi * cutoff * elapsed
+        return r / (r + 1)
+
+    @staticmethod
+    def body_size(keypoints, valid):
+        """Largest side of the visible keypoint extent"""
+        points = keypoints[valid]
+        if len(points) < 2:
+            return None
+        extent = points.max(axis=0) - points.min(axis=0)
+        return max(float(extent.max()), 1.0)
+
+    def filter(self, keypoints, scores, timestamp=None):
+        """Filter one person's keypoints (K, 2) with scores (K,)
+
+        Returns:
+            np.ndarray: Filtered keypoints (K, 2)
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        keypoints = np.asarray(keypoints, dtype=np.float64)
+        scores = np.asarray(scores, dtype=np.float64)
+        seen = scores > self.conf_threshold
+
+        elapsed = timestamp - self.last_time if self.last_time is not None else None
+        self.last_time = timestamp
+        if self.keypoints is None or elapsed is None or elapsed <= 0 or elapsed > self.max_gap:
+            self.keypoints = keypoints.copy()
+            self.velocity = np.zeros_like(keypoints)
+            self.tracked = seen.copy()
+            return keypoints.copy()
+
+        # Joints showing up for the first time start where they are
+        fresh = seen & ~self.tracked
+        self.keypoints[fresh] = keypoints[fresh]
+        self.velocity[fresh] = 0
+        self.tracked |= seen
+
+        # Confidence weight rises from 0 at conf_threshold to 1 at full_confidence
+        weight = np.clip((scores - self.conf_threshold) / (self.full_confidence - self.conf_threshold), 0.0, 1.0)
+        delta = (keypoints - self.keypoints) * weight[:, None]
+
+        # Weighted deltas keep low-confidence jumps from raising the cutoff as well
+        alpha_d = self.smoothing_factor(elapsed, self.d_cutoff)
+        self.velocity += alpha_d * (delta / elapsed - self.velocity)
+
+        size = self.body_size(keypoints, seen) or 1.0
+        speed = np.linalg.norm(self.velocity, axis=1) / size
+        alpha = self.smoothing_factor(elapsed, self.min_cutoff + self.beta * speed)
+        self.keypoints += alpha[:, None] * delta
+        return self.keypoints.copy()
+
+    def __call__(self, detected_keypoints, scores, timestamp=None):
+        """Filter the first person of a model result
+
+        Returns:
+            tuple: (keypoints (N, K, 2), scores (N, K)) shaped like the input
+        """
+        if detected_keypoints is None or len(detected_keypoints) == 0:
+            # Nobody there, don't carry positions over to whoever shows up next
+            self.reset()
+            return detected_keypoints, scores
+        first_scores = scores[0] if scores is not None else np.ones(len(detected_keypoints[0]))
+        filtered = np.array(detected_keypoints, dtype=np.float32)
+        filtered[0] = self.filter(detected_keypoints[0], first_scores, timestamp)
+        return filtered, scores
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class KeypointPredictor:
+    """Constant-velocity keypoint extrapolation for inference decimation
+
+    The pose model runs on every Nth frame only and the frames in between get
+    keypoints extrapolated from the last two model results. N follows how fast
+    the body moves: every frame during fast reps, up to max_interval frames
+    apart while the trainee is at rest.
+    """
+
+    def __init__(self, max_interval=4, fast_speed=0.03, rest_speed=0.005, conf_threshold=0.5):
+        self.max_interval = max_interval
+        # Keypoint speed in body sizes per frame
+        self.fast_speed = fast_speed  # At or above: run the model on every frame
+        self.rest_speed = rest_speed  # At or below: skip as much as allowed
+        self.conf_threshold = conf_threshold
+        self.reset()
+
+    def reset(self):
+        """Forget tracked keypoints, the next frame runs the model"""
+        self.frame_index = 0
+        self.last_keypoints = None  # (K, 2) of the latest model result
+        self.last_scores = None
+        self.last_index = None
+        self.velocity = None  # (K, 2) pixels per frame
+        self.speed = None
+        self.interval = 1
+        self.inferred_frames = 0
+        self.predicted_frames = 0
+
+    def body_size(self, keypoints, valid):
+        """Largest side of the visible keypoint extent, used to normalise speed"""
+        points = keypoints[valid]
+        if len(points) < 2:
+            return None
+        extent = points.max(axis=0) - points.min(axis=0)
+        return max(float(extent.max()), 1.0)
+
+    def should_infer(self):
+        """Whether the model must run on the current frame"""
+        if self.last_keypoints is None or self.velocity is None:
+            return True
+        return self.frame_index - self.last_index >= self.interval
+
+    def update(self, detected_keypoints, scores):
+        """Store a model result for the current frame and advance"""
+        if detected_keypoints is None or len(detected_keypoints) == 0:
+            # Nobody detected, keep running the model until someone shows up
+            self.last_keypoints = None
+            self.velocity = None
+            self.interval = 1
+        else:
+            keypoints = np.array(detected_keypoints[0], dtype=np.float64)
+            current_scores = np.array(scores[0]) if scores is not None else np.ones(len(keypoints))
+
+            if self.last_keypoints is not None:
+                elapsed = self.frame_index - self.last_index
+                valid = (current_scores > self.conf_threshold) & (self.last_scores > self.conf_threshold)
+                velocity = (keypoints - self.last_keypoints) / elapsed
+                velocity[~valid] = 0
+                self.velocity = velocity
+
+                size = self.body_size(keypoints, valid)
+                if size is not None and valid.any():
+                    # Fastest joint, a rep may move only the limbs
+                    self.speed = float(np.linalg.norm(velocity[valid], axis=1).max()) / size
+                    self.interval = self.interval_for_speed(self.speed)
+
+            self.last_keypoints = keypoints
+            self.last_scores = current_scores
+            self.last_index = self.frame_index
+
+        self.inferred_frames += 1
+        self.frame_index += 1
+
+    def interval_for_speed(self, speed):
+        """Map body speed to the number of frames between model runs"""
+        if speed >= self.fast_speed:
+            return 1
+        if speed <= self.rest_speed:
+            return self.max_interval
+        # Linear in between
+        fraction = (self.fast_speed - speed) / (self.fast_speed - self.rest_speed)
+        return 1 + int(round(fraction * (self.max_interval - 1)))
+
+    def predict(self):
+        """Extrapolate keypoints for the current frame and advance
+
+        Returns:
+            tuple: (keypoints (1, K, 2), scores (1, K)) shaped like model output
+        """
+        elapsed = self.frame_index - self.last_index
+        keypoints = self.last_keypoints + self.velocity * elapsed
+        self.predicted_frames += 1
+        self.frame_index += 1
+        return keypoints[None].copy(), self.last_scores[None].copy()
+
+    def inference_ratio(self):
+        """Fraction of frames on which the model actually ran"""
+        total = self.inferred_frames + self.predicted_frames
+        return self.inferred_frames / total if total else 1.0
@@ -0,0 +1,350 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from rtmlib import YOLOX, RTMPose
+from core.batch_pose import PoseMicroBatcher, batch_variant_path
+from core.onnx_engine import OnnxYOLOX, OnnxRTMPose
+from core.adaptive_detector import AdaptiveDetector
+
+
+def configure_session_threads(tool, intra_op_threads):
+    """Recreate a model's ONNX Runtime session with its own intra-op thread count
+
+    None restores the runtime default (one thread per physical core).
+    """
+    if getattr(tool, 'backend', None) != 'onnxruntime':
+        return
+    if hasattr(tool, 'create_session'):
+        # In-house engine sessions keep their own options (e.g. shared weights)
+        tool.session = tool.create_session(intra_op_threads or 0)
+        return
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads or 0
+    options.inter_op_num_threads = 1
+    providers = tool.session.get_providers()
+    tool.session = ort.InferenceSession(tool.onnx_model, sess_options=options, providers=providers)
+
+
+def estimate_full_resolution(pose_fn, image, pose_image, bboxes):
+    """Run pose_fn(pose_image, bboxes) with bboxes detected on the downscaled image
+
+    Keypoints are returned in the coordinates of the downscaled image.
+    """
+    scale = pose_image.shape[1] / image.shape[1]
+    bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4) * scale
+    keypoints, scores = pose_fn(pose_image, bboxes)
+    return keypoints / scale, scores
+
+
+class PoseSessionSet:
+    """Detector + pose model pair, called like rtmlib Wholebody
+
+    All people found by the detector go through the pose model in one batched run.
+    Given a higher resolution copy of the frame, pose crops are cut from it while
+    detection stays on the small frame.
+    """
+
+    def __init__(self, mode, det_model, pose_model):
+        self.mode = mode
+        self.det_model = det_model
+        self.pose_model = pose_model
+        self.batcher = PoseMicroBatcher(pose_model)
+
+    def __call__(self, image, pose_image=None):
+        bboxes = self.det_model(image)
+        if pose_image is None:
+            return self.batcher.estimate(image, bboxes)
+        return estimate_full_resolution(self.batcher.estimate, image, pose_image, bboxes)
+
+
+class ModelPool:
+    """Pool of preloaded, pre-warmed inference sessions for one backend
+
+    The person detector is shared by every mode that uses the same file, pose
+    models are kept in LRU order and evicted once the memory cap is exceeded.
+
+    With ONNX Runtime the in-house engine (core/onnx_engine.py) runs the
+    models, engine='rtmlib' keeps rtmlib's YOLOX and RTMPose wrappers.
+    Given a SharedWeightStore, the in-house engine memory-maps weights so
+    several processes holding the same models share them.
+    """
+
+    DET_INPUT_SIZE = (416, 416)  # Full detector input size (h, w)
+
+    def __init__(self, models_dir, model_configs, backend='onnxruntime', device='cpu',
+                 max_memory_mb=512, warmup_size=(360, 640), engine='builtin', registry=None,
+                 shared_weights=None):
+        self.models_dir = models_dir
+        self.model_configs = model_configs
+        self.backend = backend
+        self.engine = engine
+        self.registry = registry  # ModelRegistry, files are looked up in models_dir only without one
+        self.shared_weights = shared_weights  # SharedWeightStore, only used by the in-house engine
+        if shared_weights is not None and not self.use_builtin_engine():
+            print("Shared model weights need the built-in ONNX Runtime engine, loading private copies")
+        self.device = device
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024 if max_memory_mb else None
+        self.warmup_size = warmup_size
+        self.det_input_size = self.DET_INPUT_SIZE
+        self.det_threads = None  # Intra-op threads per stage, None = runtime default
+        self.pose_threads = None
+
+        self._detectors = {}  # det file -> YOLOX, or AdaptiveDetector if reduced-size files exist
+        self._pose_models = OrderedDict()  # mode -> RTMPose, least recently used first
+        self._lock = threading.RLock()
+        self._loading = {}  # mode -> Event set when its in-flight pose model load finishes
+        self._preload_thread = None
+
+    def _model_path(self, name):
+        path = self.registry.locate(name) if self.registry is not None else None
+        return path or os.path.join(self.models_dir, name)
+
+    def model_paths(self, mode):
+        """Get (det_path, pose_path) for a mode"""
+        config = self.model_configs[mode]
+        return self._model_path(config['det']), self._model_path(config['pose'])
+
+    def verified_paths(self, mode):
+        """Get (det_path, pose_path) checked against the registry manifest
+
+        Raises:
+            FileNotFoundError: If a file is missing or fails its checksum
+        """
+        if self.registry is not None:
+            return self.registry.resolve_mode(self.model_configs[mode])
+        det_path, pose_path = self.model_paths(mode)
+        if not (os.path.exists(det_path) and os.path.exists(pose_path)):
+            raise FileNotFoundError(f"Model files for {mode} mode not found")
+        return det_path, pose_path
+
+    def has_local_models(self, mode):
+        """Check whether both model files of a mode exist locally"""
+        if mode not in self.model_configs:
+            return False
+        return all(os.path.exists(p) for p in self.model_paths(mode))
+
+    def _warmup_frame(self):
+        h, w = self.warmup_size
+        rng = np.random.default_rng(0)
+        return rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+
+    def use_builtin_engine(self):
+        """Check whether sessions are run by the in-house ONNX Runtime engine"""
+        return self.backend == 'onnxruntime' and self.engine == 'builtin'
+
+    def _load_detector_session(self, det_path, input_size):
+        if self.use_builtin_engine():
+            detector = OnnxYOLOX(det_path, model_input_size=input_size, device=self.device,
+                                 shared_weights=self.shared_weights)
+        else:
+            detector = YOLOX(det_path, model_input_size=input_size,
+                             backend=self.backend, device=self.device)
+        if self.det_threads:
+            configure_session_threads(detector, self.det_threads)
+        # One dummy inference so the first real frame doesn't pay for allocations
+        detector(self._warmup_frame())
+        return detector
+
+    def _load_detector(self, det_path):
+        detector = self._detectors.get(det_path)
+        if detector is None:
+            if AdaptiveDetector.has_variants(det_path, self.det_input_size):
+                detector = AdaptiveDetector(det_path, self.det_input_size, self._load_detector_session)
+                print(f"Adaptive detector input sizes: {sorted(detector.sessions)}")
+            else:
+                detector = self._load_detector_session(det_path, self.det_input_size)
+            self._detectors[det_path] = detector
+        return detector
+
+    def _detector_sessions(self):
+        """Iterate all YOLOX sessions, including every size of adaptive detectors"""
+        for detector in self._detectors.values():
+            if isinstance(detector, AdaptiveDetector):
+                yield from detector.sessions.values()
+            else:
+                yield detector
+
+    def pose_session_path(self, pose_path):
+        """Get the file a pose model is run from, its dynamic-batch copy if one was built"""
+        if self.backend == 'onnxruntime' and os.path.exists(batch_variant_path(pose_path)):
+            return batch_variant_path(pose_path)
+        return pose_path
+
+    def _load_pose_model(self, mode, pose_path):
+        config = self.model_configs[mode]
+        pose_path = self.pose_session_path(pose_path)
+        if self.use_builtin_engine():
+            pose_model = OnnxRTMPose(pose_path, model_input_size=config['pose_input_size'], device=self.device,
+                                     shared_weights=self.shared_weights)
+        else:
+            pose_model = RTMPose(pose_path, model_input_size=config['pose_input_size'],
+                                 backend=self.backend, device=self.device)
+        if self.pose_threads:
+            configure_session_threads(pose_model, self.pose_threads)
+        frame = self._warmup_frame()
+        h, w = frame.shape[:2]
+        pose_model(frame, bboxes=[[w * 0.25, h * 0.1, w * 0.75, h * 0.9]])
+        return pose_model
+
+    def get(self, mode):
+        """Get warm session set for a mode, loading it if not cached
+
+        Pose models load outside the lock, so switching to a cached mode never
+        waits for another mode's load. A mode already being loaded (e.g. by
+        the preload thread) is waited for instead of loaded a second time.
+        """
+        while True:
+            with self._lock:
+                loading = self._loading.get(mode)
+                if loading is None:
+                    det_path, pose_path = self.verified_paths(mode)
+                    detector = self._load_detector(det_path)
+                    pose_model = self._pose_models.get(mode)
+                    if pose_model is not None:
+                        self._pose_models.move_to_end(mode)
+                        self._evict(keep=mode)
+                        return PoseSessionSet(mode, detector, pose_model)
+                    self._loading[mode] = threading.Event()
+                    break
+            loading.wait()
+
+        print(f"Loading {mode} pose model into pool ({self.backend})")
+        try:
+            pose_model = self._load_pose_model(mode, pose_path)
+        except Exception:
+            with self._lock:
+                self._loading.pop(mode).set()
+            raise
+        with self._lock:
+            self._pose_models[mode] = pose_model
+            self._pose_models.move_to_end(mode)
+            self._evict(keep=mode)
+            self._loading.pop(mode).set()
+        return PoseSessionSet(mode, detector, pose_model)
+
+    def is_loading(self, mode):
+        """Check whether a mode's pose model is being loaded right now"""
+        with self._lock:
+            return mode in self._loading
+
+    def load_async(self, mode):
+        """Load a mode with get() in a background thread, returns the thread"""
+        def worker():
+            try:
+                self.get(mode)
+            except Exception as e:
+                print(f"Loading {mode} mode failed: {e}")
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
+
+    def _file_size(self, path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def memory_usage(self):
+        """Estimate pool memory from model file sizes (bytes)"""
+        with self._lock:
+            total = 0
+            for det_path, detector in self._detectors.items():
+                paths = detector.model_paths() if isinstance(detector, AdaptiveDetector) else [det_path]
+                total += sum(self._file_size(p) for p in paths)
+            total += sum(self._file_size(self.model_paths(m)[1]) for m in self._pose_models)
+            return total
+
+    def _evict(self, keep=None):
+        """Drop least recently used pose models until under the memory cap"""
+        if self.max_memory_bytes is None:
+            return
+        while self.memory_usage() > self.max_memory_bytes:
+            victim = next((m for m in self._pose_models if m != keep), None)
+            if victim is None:
+                break
+            del self._pose_models[victim]
+            print(f"Evicted {victim} pose model from pool")
+
+            # Drop detectors no cached mode uses anymore
+            in_use = {self.model_paths(m)[0] for m in self._pose_models}
+            if keep is not None:
+                in_use.add(self.model_paths(keep)[0])
+            for det_path in list(self._detectors):
+                if det_path not in in_use:
+                    del self._detectors[det_path]
+
+    def set_thread_budget(self, det_threads, pose_threads):
+        """Give detector and pose sessions separate intra-op thread budgets"""
+        with self._lock:
+            self.det_threads = det_threads
+            self.pose_threads = pose_threads
+            frame = self._warmup_frame()
+            for detector in self._detector_sessions():
+                configure_session_threads(detector, det_threads)
+                detector(frame)
+            for pose_model in self._pose_models.values():
+                configure_session_threads(pose_model, pose_threads)
+                pose_model(frame)
+
+    def session_threads(self):
+        """Get (model file, intra-op threads) of every loaded ONNX Runtime session"""
+        with self._lock:
+            models = list(self._detector_sessions()) + list(self._pose_models.values())
+        return [(os.path.basename(model.onnx_model), model.session.get_session_options().intra_op_num_threads)
+                for model in models if getattr(model, 'backend', None) == 'onnxruntime']
+
+    def cached_modes(self):
+        """Get modes currently held in the pool"""
+        with self._lock:
+            return list(self._pose_models)
+
+    def preload(self, modes):
+        """Load and warm up modes in a background thread"""
+        def worker():
+            for mode in modes:
+                if not self.has_local_models(mode):
+                    continue
+                loading = None
+                try:
+                    with self._lock:
+                        if mode in self._pose_models or mode in self._loading:
+                            continue
+                        det_path, pose_path = self.verified_paths(mode)
+                        # Don't preload what would immediately be evicted again
+                        if (self.max_memory_bytes is not None and
+                                self.memory_usage() + self._file_size(pose_path) > self.max_memory_bytes):
+                            print(f"Skipping preload of {mode} mode, pool memory cap reached")
+                            continue
+                        self._load_detector(det_path)
+                        # get() for this mode now waits for this load instead of starting its own
+                        loading = self._loading[mode] = threading.Event()
+
+                    # Load outside the lock so mode switches aren't blocked
+                    pose_model = self._load_pose_model(mode, pose_path)
+
+                    with self._lock:
+                        if mode not in self._pose_models:
+                            self._pose_models[mode] = pose_model
+                            # Preloaded modes are the least recently used ones
+                            self._pose_models.move_to_end(mode, last=False)
+                    print(f"Preloaded {mode} mode ({self.backend})")
+                except Exception as e:
+                    print(f"Preloading {mode} mode failed: {e}")
+                finally:
+                    if loading is not None:
+                        with self._lock:
+                            self._loading.pop(mode, None)
+                        loading.set()
+
+        self._preload_thread = threading.Thread(target=worker, daemon=True)
+        self._preload_thread.start()
+        return self._preload_thread
+
+    def clear(self):
+        """Release all sessions"""
+        with self._lock:
+            self._pose_models.clear()
+            self._detectors.clear()
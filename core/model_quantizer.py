@@ -0,0 +1,299 @@
+import os
+import time
+import argparse
+import cv2
+import numpy as np
+from onnxruntime import InferenceSession
+from onnxruntime.quantization import (quantize_static, QuantFormat, QuantType,
+                                      CalibrationMethod, CalibrationDataReader)
+from rtmlib import YOLOX, RTMPose
+
+from core.rtmpose_processor import RTMPoseProcessor
+
+
+class FrameCalibrationReader(CalibrationDataReader):
+    """Feeds preprocessed model inputs to the ONNX Runtime static quantizer"""
+
+    def __init__(self, input_name, tensors):
+        self.input_name = input_name
+        self.tensors = tensors
+        self._iter = iter(tensors)
+
+    def get_next(self):
+        """Return next calibration sample or None when exhausted"""
+        tensor = next(self._iter, None)
+        if tensor is None:
+            return None
+        return {self.input_name: tensor}
+
+    def rewind(self):
+        """Restart iteration from the first sample"""
+        self._iter = iter(self.tensors)
+
+
+class ModelQuantizer:
+    """Static INT8 quantization of the RTMPose and YOLOX models
+
+    Calibration data is taken from our own recorded workout clips so the
+    activation ranges match what the models see in the application.
+    """
+
+    # FP32 modes that get an INT8 twin
+    SOURCE_MODES = ['lightweight', 'balanced', 'performance']
+
+    # Percentage of the image diagonal below which a keypoint counts as correct
+    PCK_THRESHOLD = 0.05
+
+    def __init__(self, models_dir=None, max_frames=200, device='cpu'):
+        self.models_dir = models_dir or RTMPoseProcessor.get_models_dir()
+        self.max_frames = max_frames
+        self.device = device
+        self.det_input_size = (416, 416)
+
+    @staticmethod
+    def int8_name(filename):
+        """Get INT8 model filename for a FP32 model filename"""
+        root, ext = os.path.splitext(filename)
+        return f"{root}_int8{ext}"
+
+    def collect_frames(self, sources, max_frames=None):
+        """Collect evenly spaced frames from video files or image directories
+
+        Args:
+            sources (list): Video file paths or directories containing images
+            max_frames (int): Maximum number of frames over all sources
+
+        Returns:
+            list: BGR frames
+        """
+        max_frames = max_frames or self.max_frames
+        per_source = max(1, max_frames // max(1, len(sources)))
+        frames = []
+
+        for source in sources:
+            if os.path.isdir(source):
+                names = sorted(n for n in os.listdir(source)
+                               if n.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')))
+                step = max(1, len(names) // per_source)
+                for name in names[::step][:per_source]:
+                    img = cv2.imread(os.path.join(source, name))
+                    if img is not None:
+                        frames.append(img)
+                continue
+
+            cap = cv2.VideoCapture(source)
+            if not cap.isOpened():
+                print(f"Error: Cannot open calibration video {source}")
+                continue
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or per_source
+            step = max(1, total // per_source)
+            index = 0
+            collected = 0
+            while collected < per_source:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if index % step == 0:
+                    frames.append(frame)
+                    collected += 1
+                index += 1
+            cap.release()
+
+        print(f"Collected {len(frames)} calibration frames from {len(sources)} sources")
+        return frames[:max_frames]
+
+    def build_detector_inputs(self, detector, frames):
+        """Preprocess frames into YOLOX input tensors"""
+        tensors = []
+        for frame in frames:
+            img, _ = detector.preprocess(frame)
+            tensors.append(np.ascontiguousarray(img.transpose(2, 0, 1)[None], dtype=np.float32))
+        return tensors
+
+    def build_pose_inputs(self, detector, pose_model, frames):
+        """Preprocess person crops (found by the FP32 detector) into RTMPose input tensors"""
+        tensors = []
+        for frame in frames:
+            bboxes = detector(frame)
+            if len(bboxes) == 0:
+                bboxes = [[0, 0, frame.shape[1], frame.shape[0]]]
+            img, _, _ = pose_model.preprocess(frame, bboxes[0])
+            tensors.append(np.ascontiguousarray(img.transpose(2, 0, 1)[None], dtype=np.float32))
+        return tensors
+
+    def quantize_model(self, fp32_path, int8_path, tensors):
+        """Run ONNX Runtime static quantization with the given calibration tensors"""
+        input_name = InferenceSession(fp32_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+        reader = FrameCalibrationReader(input_name, tensors)
+
+        # Per-channel weight scales need DequantizeLinear with an axis (opset >= 13)
+        model_input = fp32_path
+        preprocessed = int8_path + '.prep.onnx'
+        try:
+            import onnx
+            from onnx import version_converter
+            from onnxruntime.quantization.shape_inference import quant_pre_process
+            model = onnx.load(fp32_path)
+            opset = max(o.version for o in model.opset_import if o.domain in ('', 'ai.onnx'))
+            if opset < 13:
+                model = version_converter.convert_version(model, 13)
+            onnx.save(model, preprocessed)
+            quant_pre_process(preprocessed, preprocessed, skip_symbolic_shape=True)
+            model_input = preprocessed
+        except Exception as e:
+            print(f"Quantization pre-processing skipped: {e}")
+
+        try:
+            quantize_static(
+                model_input,
+                int8_path,
+                reader,
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=model_input == preprocessed,
+                calibrate_method=CalibrationMethod.Percentile
+            )
+        finally:
+            if os.path.exists(preprocessed):
+                os.remove(preprocessed)
+
+        print(f"Quantized {os.path.basename(fp32_path)} -> {os.path.basename(int8_path)}")
+        return int8_path
+
+    def quantize_all(self, sources):
+        """Quantize the detector and every RTMPose model that exists locally
+
+        Returns:
+            dict: FP32 path -> INT8 path for every quantized model
+        """
+        frames = self.collect_frames(sources)
+        if not frames:
+            raise RuntimeError("No calibration frames collected")
+
+        det_file = RTMPoseProcessor.DET_MODEL
+        det_path = os.path.join(self.models_dir, det_file)
+        detector = YOLOX(det_path, model_input_size=self.det_input_size,
+                         backend='onnxruntime', device=self.device)
+
+        results = {}
+        results[det_path] = self.quantize_model(
+            det_path, os.path.join(self.models_dir, self.int8_name(det_file)),
+            self.build_detector_inputs(detector, frames)
+        )
+
+        for mode in self.SOURCE_MODES:
+            config = RTMPoseProcessor.MODEL_CONFIGS[mode]
+            pose_path = os.path.join(self.models_dir, config['pose'])
+            if not os.path.exists(pose_path):
+                print(f"Skipping {mode} mode, model file not found: {pose_path}")
+                continue
+            pose_model = RTMPose(pose_path, model_input_size=config['pose_input_size'],
+                                 backend='onnxruntime', device=self.device)
+            results[pose_path] = self.quantize_model(
+                pose_path, os.path.join(self.models_dir, self.int8_name(config['pose'])),
+                self.build_pose_inputs(detector, pose_model, frames)
+            )
+
+        return results
+
+    def _run_pipeline(self, detector, pose_model, frames):
+        """Run detector + pose on frames, return per-frame results and mean latency"""
+        results = []
+        start = time.perf_counter()
+        for frame in frames:
+            bboxes = detector(frame)
+            if len(bboxes) == 0:
+                results.append(None)
+                continue
+            keypoints, scores = pose_model(frame, bboxes=bboxes[:1])
+            results.append((keypoints[0], scores[0]))
+        elapsed = time.perf_counter() - start
+        return results, elapsed / max(1, len(frames))
+
+    def compare_accuracy(self, sources, mode='balanced'):
+        """Compare the INT8 models of a mode against FP32 on the same clips
+
+        Returns:
+            dict: Keypoint error, PCK, detection agreement and latency figures
+        """
+        frames = self.collect_frames(sources)
+        config = RTMPoseProcessor.MODEL_CONFIGS[mode]
+        det_file = config['det']
+        pose_file = config['pose']
+
+        pipelines = {}
+        for precision, det_name, pose_name in [('fp32', det_file, pose_file),
+                                               ('int8', self.int8_name(det_file), self.int8_name(pose_file))]:
+            detector = YOLOX(os.path.join(self.models_dir, det_name),
+                             model_input_size=self.det_input_size,
+                             backend='onnxruntime', device=self.device)
+            pose_model = RTMPose(os.path.join(self.models_dir, pose_name),
+                                 model_input_size=config['pose_input_size'],
+                                 backend='onnxruntime', device=self.device)
+            pipelines[precision] = self._run_pipeline(detector, pose_model, frames)
+
+        fp32_results, fp32_latency = pipelines['fp32']
+        int8_results, int8_latency = pipelines['int8']
+
+        errors = []
+        agree = 0
+        for frame, ref, test in zip(frames, fp32_results, int8_results):
+            if (ref is None) == (test is None):
+                agree += 1
+            if ref is None or test is None:
+                continue
+            # Only compare keypoints the FP32 model is confident about
+            mask = ref[1] > 0.3
+            if not np.any(mask):
+                continue
+            diag = np.hypot(frame.shape[0], frame.shape[1])
+            dist = np.linalg.norm(ref[0][mask] - test[0][mask], axis=1) / diag
+            errors.append(dist)
+
+        errors = np.concatenate(errors) if errors else np.array([])
+        report = {
+            'mode': mode,
+            'frames': len(frames),
+            'detection_agreement': agree / max(1, len(frames)),
+            'mean_error': float(errors.mean()) if errors.size else None,
+            'pck': float(np.mean(errors < self.PCK_THRESHOLD)) if errors.size else None,
+            'fp32_ms': fp32_latency * 1000,
+            'int8_ms': int8_latency * 1000,
+            'speedup': fp32_latency / int8_latency if int8_latency > 0 else None
+        }
+        self.print_report(report)
+        return report
+
+    @staticmethod
+    def print_report(report):
+        """Print accuracy comparison report"""
+        print(f"INT8 vs FP32 ({report['mode']} mode, {report['frames']} frames)")
+        print(f"  Detection agreement: {report['detection_agreement']:.1%}")
+        if report['mean_error'] is not None:
+            print(f"  Mean keypoint error: {report['mean_error']:.4f} of image diagonal")
+            print(f"  PCK@{ModelQuantizer.PCK_THRESHOLD}: {report['pck']:.1%}")
+        print(f"  Latency: FP32 {report['fp32_ms']:.1f} ms, INT8 {report['int8_ms']:.1f} ms"
+              + (f" ({report['speedup']:.2f}x)" if report['speedup'] else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build INT8 RTMPose/YOLOX models from recorded workout clips")
+    parser.add_argument('sources', nargs='+', help="Calibration videos or image directories")
+    parser.add_argument('--frames', type=int, default=200, help="Number of calibration frames")
+    parser.add_argument('--models-dir', default=None, help="Model directory (default: ./models)")
+    parser.add_argument('--skip-quantize', action='store_true', help="Only run the accuracy report")
+    args = parser.parse_args()
+
+    quantizer = ModelQuantizer(models_dir=args.models_dir, max_frames=args.frames)
+    if not args.skip_quantize:
+        quantizer.quantize_all(args.sources)
+
+    for mode in ModelQuantizer.SOURCE_MODES:
+        config = RTMPoseProcessor.MODEL_CONFIGS[mode]
+        if os.path.exists(os.path.join(quantizer.models_dir, ModelQuantizer.int8_name(config['pose']))):
+            quantizer.compare_accuracy(args.sources, mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+
+
+class ModelRegistry:
+    """Finds and verifies model files without ever touching the network
+
+    models/manifest.json lists every known model file with its role, input
+    size, SHA-256 and where to get it. Files are looked up in the bundled
+    models directory, then data/models, then an optional local mirror
+    directory. A file is hashed the first time it is used and again only
+    when its size or modification time changes, the results are kept in
+    data/model_checksums.json so later startups skip hashing entirely.
+    """
+
+    MANIFEST = "manifest.json"
+    CHECKSUM_CACHE = "model_checksums.json"
+
+    def __init__(self, models_dir, mirror_dir=None, data_dir=None):
+        self.models_dir = models_dir
+        self.data_dir = data_dir or self._get_data_directory()
+        self.search_dirs = [models_dir, os.path.join(self.data_dir, "models")]
+        if mirror_dir:
+            self.search_dirs.append(mirror_dir)
+        self.manifest = self._load_json(os.path.join(models_dir, self.MANIFEST)).get('models', {})
+        self.checksum_file = os.path.join(self.data_dir, self.CHECKSUM_CACHE)
+        self.checksums = self._load_json(self.checksum_file)
+        self._lock = threading.Lock()  # Preloading verifies files from a background thread
+        self._unpinned_reported = set()
+
+    def _get_data_directory(self):
+        """Get data directory path, compatible with development and packaged environments"""
+        if getattr(sys, 'frozen', False):
+            return os.path.join(os.path.dirname(sys.executable), "data")
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, "data")
+
+    def _load_json(self, path):
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Failed to load {os.path.basename(path)}: {e}")
+            return {}
+
+    def _save_checksums(self):
+        try:
+            os.makedirs(self.data_dir, exist_ok=True)
+            with open(self.checksum_file, 'w', encoding='utf-8') as f:
+                json.dump(self.checksums, f, indent=2)
+        except IOError as e:
+            print(f"Failed to save model checksums: {e}")
+
+    def entry(self, name):
+        """Get manifest entry of a model file, empty for unlisted files (e.g. generated INT8 models)"""
+        return self.manifest.get(name, {})
+
+    def candidates(self, name):
+        """Get existing copies of a model file in search order"""
+        paths = [os.path.join(d, name) for d in self.search_dirs]
+        return [p for p in paths if os.path.isfile(p)]
+
+    def locate(self, name):
+        """Get the first existing copy of a model file without verifying it, None if missing"""
+        candidates = self.candidates(name)
+        return candidates[0] if candidates else None
+
+    def sha256(self, path):
+        """Get a file's SHA-256, hashing only if size or mtime changed since last time"""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            cached = self.checksums.get(key)
+            if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+                return cached['sha256']
+
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            self.checksums[key] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest.hexdigest()}
+            self._save_checksums()
+            return digest.hexdigest()
+
+    def verify(self, path, name=None):
+        """Check a file against its manifest checksum
+
+        Unlisted files (generated models) pass. Listed files without a pinned
+        checksum pass too, with a warning once per file.
+        """
+        name = name or os.path.basename(path)
+        entry = self.entry(name)
+        expected = entry.get('sha256')
+        if expected is None:
+            if entry and name not in self._unpinned_reported:
+                self._unpinned_reported.add(name)
+                print(f"Warning: {name} has no pinned checksum in {self.MANIFEST} and is used unverified, "
+                      f"'python -m core.model_registry --pin' records the checksum of the official file")
+            return True
+        return self.sha256(path) == expected
+
+    def resolve(self, name):
+        """Get the path of the first verified copy of a model file
+
+        Raises:
+            FileNotFoundError: No copy exists or none matches its checksum
+        """
+        rejected = []
+        for path in self.candidates(name):
+            if self.verify(path, name):
+                return path
+            print(f"Checksum mismatch, ignoring {path}")
+            rejected.append(path)
+        raise FileNotFoundError(self.describe_missing(name, rejected))
+
+    def describe_missing(self, name, rejected=()):
+        """Explain where a model file was looked for and how to provide it"""
+        lines = [f"Model file {name} is not available."]
+        if rejected:
+            lines.append("Checksum mismatch (corrupt or different version): " + ", ".join(rejected))
+        lines.append("Searched: " + ", ".join(os.path.abspath(d) for d in self.search_dirs))
+        source = self.entry(name).get('source')
+        if source:
+            lines.append(f"Download {source} on a machine with internet access and "
+                         f"copy the .onnx file into one of these directories.")
+        return "\n".join(lines)
+
+    def resolve_mode(self, config):
+        """Get verified (det_path, pose_path) for a mode config of RTMPoseProcessor.MODEL_CONFIGS"""
+        return self.resolve(config['det']), self.resolve(config['pose'])
+
+    def status(self):
+        """Get (name, path or None, state) for every manifest file"""
+        rows = []
+        for name, entry in self.manifest.items():
+            path = self.locate(name)
+            if path is None:
+                state = "missing"
+            elif entry.get('sha256') is None:
+                state = "not pinned"
+            else:
+                state = "ok" if self.verify(path, name) else "checksum mismatch"
+            rows.append((name, path, state))
+        return rows
+
+    def pin_checksums(self):
+        """Write the SHA-256 of every present manifest file into the manifest"""
+        path = os.path.join(self.models_dir, self.MANIFEST)
+        manifest = self._load_json(path)
+        for name, entry in manifest.get('models', {}).items():
+            model_path = self.locate(name)
+            if model_path is not None:
+                entry['sha256'] = self.sha256(model_path)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+            f.write("\n")
+        self.manifest = manifest.get('models', {})
+
+
+def main():
+    from core.rtmpose_processor import RTMPoseProcessor
+
+    parser = argparse.ArgumentParser(description="Check local model files against the manifest")
+    parser.add_argument('--mirror', default=None, help="Local mirror directory to search as well")
+    parser.add_argument('--pin', action='store_true', help="Record checksums of present files in the manifest")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(RTMPoseProcessor.get_models_dir(), mirror_dir=args.mirror)
+    if args.pin:
+        registry.pin_checksums()
+    for name, path, state in registry.status():
+        print(f"{state:>18}  {name}" + (f"  ({path})" if path else ""))
+
+
+if __name__ == "__main__":
+    main()
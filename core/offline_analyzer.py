@@ -0,0 +1,348 @@
+import os
+import time
+import queue
+import argparse
+import threading
+import cv2
+import numpy as np
+
+from core.rtmpose_processor import RTMPoseProcessor
+from core.model_pool import ModelPool
+from core.model_registry import ModelRegistry
+from core.batch_pose import PoseMicroBatcher, batch_variant_path
+from core.keypoint_predictor import KeypointPredictor
+from core.keypoint_filter import OneEuroKeypointFilter
+from core.keypoint_cache import KeypointCache
+from core.adaptive_detector import AdaptiveDetector
+from core.onnx_engine import OnnxYOLOX
+from core.shared_weights import SharedWeightStore
+from exercise_counters import ExerciseCounter
+
+
+class OfflineVideoAnalyzer:
+    """Throughput-oriented rep counting for recorded videos
+
+    A decoder thread reads batch_frames frames ahead. Each chunk goes through
+    the pose model as batched runs, and the results are fed to ExerciseCounter
+    in frame order using video timestamps. The bundled detector has its NMS
+    in the graph and a batch size of 1, so it runs frame by frame unless its
+    batched copy was built (python -m core.detector_variants --batched).
+
+    Keypoints of every analysed video go to a KeypointCache, counting the
+    same recording again (another exercise, changed thresholds) reads them
+    from there and loads no models at all.
+    """
+
+    def __init__(self, mode='balanced', backend='onnxruntime', device='cpu', batch_frames=16,
+                 max_size=640, conf_threshold=0.5, cache=True, cache_dir=None, shared_weights=False,
+                 engine='builtin'):
+        self.mode = mode
+        self.backend = backend
+        self.engine = engine
+        self.device = device
+        self.batch_frames = batch_frames
+        self.max_size = max_size  # Same input size limit as live processing
+        self.conf_threshold = conf_threshold
+
+        self.cache = KeypointCache(cache_dir) if cache else None
+        # Parallel analysis processes map one copy of the weights
+        self.shared_weights = SharedWeightStore() if shared_weights else None
+
+        self.models_dir = RTMPoseProcessor.get_models_dir()
+        self.registry = ModelRegistry(self.models_dir)
+        self._cache_settings = None
+
+        # Loaded on the first video that isn't cached
+        self.sessions = None
+        self.batcher = None
+        self.batch_detector = None  # OnnxYOLOX on the detector's batched copy
+
+    def ensure_sessions(self):
+        """Load the model sessions if not done yet"""
+        if self.sessions is None:
+            self.sessions = self.load_sessions()
+            self.batcher = PoseMicroBatcher(self.sessions.pose_model, max_batch=self.batch_frames)
+            self.batch_detector = self.load_batch_detector()
+
+    def cache_settings(self):
+        """Settings and model files that change the keypoints, part of the cache key
+
+        Model files are identified by checksum, including reduced-size
+        detector files that turn on the adaptive detector and dynamic-batch
+        copies that are run instead of the originals.
+        """
+        if self._cache_settings is None:
+            config = RTMPoseProcessor.MODEL_CONFIGS[self.mode]
+            det_path = self.registry.locate(config['det'])
+            pose_path = self.registry.locate(config['pose'])
+            paths = [path for path in (det_path, pose_path) if path is not None]
+            if pose_path is not None:
+                paths.append(batch_variant_path(pose_path))
+            if det_path is not None:
+                paths.append(batch_variant_path(det_path))
+                full_size = ModelPool.DET_INPUT_SIZE
+                paths += [AdaptiveDetector.variant_path(det_path, size, full_size)
+                          for size in AdaptiveDetector.all_sizes() if tuple(size) != full_size]
+            self._cache_settings = {
+                'backend': self.backend,
+                'engine': self.engine,
+                'max_size': self.max_size,
+                'models': {os.path.basename(path): self.registry.sha256(path)
+                           for path in paths if os.path.exists(path)}
+            }
+        return self._cache_settings
+
+    def load_sessions(self):
+        """Load detector and pose sessions for the mode"""
+        pool = ModelPool(self.models_dir, RTMPoseProcessor.MODEL_CONFIGS, backend=self.backend, device=self.device,
+                         max_memory_mb=None, engine=self.engine, registry=self.registry,
+                         shared_weights=self.shared_weights)
+        return pool.get(self.mode)
+
+    def load_batch_detector(self):
+        """Load the detector's dynamic-batch copy, None if it wasn't built"""
+        if self.backend != 'onnxruntime':
+            return None
+        det_path = self.registry.locate(RTMPoseProcessor.MODEL_CONFIGS[self.mode]['det'])
+        path = batch_variant_path(det_path) if det_path is not None else None
+        if path is None or not os.path.exists(path):
+            print("Detector runs one frame at a time, "
+                  "'python -m core.detector_variants --batched' builds its batched copy")
+            return None
+        return OnnxYOLOX(path, model_input_size=ModelPool.DET_INPUT_SIZE, device=self.device,
+                         shared_weights=self.shared_weights, max_batch=self.batch_frames)
+
+    def detect_batch(self, frames):
+        """Run the person detector on a chunk of frames, batched if the batched copy exists"""
+        if self.batch_detector is None:
+            return [self.sessions.det_model(frame) for frame in frames]
+        return self.batch_detector.detect_batch(frames)
+
+    def _resize(self, frame):
+        h, w = frame.shape[:2]
+        if w > self.max_size or h > self.max_size:
+            scale = min(self.max_size / w, self.max_size / h)
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)))
+        return frame
+
+    def _decode(self, cap, chunks):
+        """Decoder thread, puts lists of (timestamp, frame) on the queue"""
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        index = 0
+        chunk = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            chunk.append((index / fps, self._resize(frame)))
+            index += 1
+            if len(chunk) == self.batch_frames:
+                chunks.put(chunk)
+                chunk = []
+        if chunk:
+            chunks.put(chunk)
+        chunks.put(None)
+
+    def _count(self, counter, detected_keypoints, scores, exercise_type):
+        """Feed the first person's keypoints to a counter, returns the angle"""
+        if detected_keypoints is None or len(detected_keypoints) == 0:
+            return None
+        keypoints = detected_keypoints[0].copy()
+        keypoints[scores[0] <= self.conf_threshold] = [0, 0]
+        return counter.count_exercise(keypoints, exercise_type)
+
+    def _count_cached(self, entry, video_path, exercise_type):
+        """Count a cached keypoint series in one ExerciseCounter.count_batch call"""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        keypoints = entry['keypoints'].copy()
+        keypoints[entry['scores'] <= self.conf_threshold] = 0
+        keypoints[~entry['present']] = 0  # No angle on frames without a person
+        timestamps = np.arange(len(keypoints)) / entry['fps']
+        counted = ExerciseCounter().count_batch(keypoints, timestamps, exercise_type)
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        frames = len(keypoints)
+        return {
+            'video': video_path,
+            'exercise': exercise_type,
+            'reps': counted['reps'],
+            'rep_times': counted['rep_times'],
+            'frames': frames,
+            'angles': [None if np.isnan(a) else a for a in counted['angles'].tolist()],
+            'wall_seconds': wall_seconds,
+            'fps': frames / wall_seconds if wall_seconds > 0 else 0.0,
+            'frames_per_cpu_second': frames / cpu_seconds if cpu_seconds > 0 else 0.0,
+            'cached': True
+        }
+
+    def _inferred_frames(self, video_path, record):
+        """Run the models over a video, yields (timestamp, keypoints, scores) per frame
+
+        The first person of every frame is appended to record for the cache.
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Cannot open video file: {video_path}")
+        self.ensure_sessions()
+        record['fps'] = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+        # Two chunks in flight: one being decoded while the other is inferred
+        chunks = queue.Queue(maxsize=2)
+        decoder = threading.Thread(target=self._decode, args=(cap, chunks), daemon=True)
+        decoder.start()
+
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            timestamps, frames = zip(*chunk)
+            bboxes = self.detect_batch(frames)
+            results = self.batcher.infer_batch(list(zip(frames, bboxes)))
+
+            for timestamp, (detected_keypoints, scores) in zip(timestamps, results):
+                present = len(detected_keypoints) > 0
+                record['present'].append(present)
+                record['keypoints'].append(detected_keypoints[0] if present else np.zeros((17, 2)))
+                record['scores'].append(scores[0] if present else np.zeros(17))
+                yield timestamp, detected_keypoints, scores
+
+        decoder.join()
+        cap.release()
+
+    def _cached_frames(self, entry):
+        """Yield (timestamp, keypoints, scores) per frame from a cache entry"""
+        keypoints, scores = entry['keypoints'], entry['scores']
+        empty_keypoints = np.zeros((0, *keypoints.shape[1:]), dtype=np.float32)
+        empty_scores = np.zeros((0, scores.shape[1]), dtype=np.float32)
+        for index, present in enumerate(entry['present']):
+            if present:
+                yield index / entry['fps'], keypoints[index:index + 1], scores[index:index + 1]
+            else:
+                yield index / entry['fps'], empty_keypoints, empty_scores
+
+    def analyze(self, video_path, exercise_type, exercise_counter=None, compare_decimation=False,
+                compare_filter=False):
+        """Count repetitions in a video file
+
+        With compare_decimation, a second counter is fed the keypoints live
+        inference decimation would produce (model results on the frames the
+        predictor picks, extrapolation in between) to check both counts agree.
+        With compare_filter, another counter gets One-Euro filtered keypoints,
+        to measure how close a small model gets to a larger one with filtering.
+
+        Returns:
+            dict: Rep count, per-frame angles and throughput figures
+        """
+        entry = None
+        if self.cache is not None:
+            cache_key = self.cache.key(video_path, self.mode, self.cache_settings())
+            entry = self.cache.load(cache_key)
+        if entry is not None and exercise_counter is None and not (compare_decimation or compare_filter):
+            # Cached keypoints of a plain recount need no per-frame replay
+            return self._count_cached(entry, video_path, exercise_type)
+        record = {'keypoints': [], 'scores': [], 'present': []}
+
+        counter = exercise_counter or ExerciseCounter()
+        video_time = [0.0]
+        # A caller's counter gets its own clock back afterwards, it may be counting live
+        original_clock = counter.clock
+        counter.clock = lambda: video_time[0]
+        if compare_decimation:
+            decimated_counter = ExerciseCounter()
+            decimated_counter.clock = counter.clock
+            predictor = KeypointPredictor(conf_threshold=self.conf_threshold)
+        if compare_filter:
+            filtered_counter = ExerciseCounter()
+            filtered_counter.clock = counter.clock
+            keypoint_filter = OneEuroKeypointFilter(conf_threshold=self.conf_threshold)
+
+        angles = []
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        frames_iter = self._cached_frames(entry) if entry is not None else self._inferred_frames(video_path, record)
+
+        try:
+            for timestamp, detected_keypoints, scores in frames_iter:
+                video_time[0] = timestamp
+                angles.append(self._count(counter, detected_keypoints, scores, exercise_type))
+
+                if compare_decimation:
+                    if predictor.should_infer():
+                        predictor.update(detected_keypoints, scores)
+                        self._count(decimated_counter, detected_keypoints, scores, exercise_type)
+                    else:
+                        self._count(decimated_counter, *predictor.predict(), exercise_type)
+                if compare_filter:
+                    self._count(filtered_counter, *keypoint_filter(detected_keypoints, scores, timestamp),
+                                exercise_type)
+        finally:
+            counter.clock = original_clock
+
+        if entry is None and self.cache is not None:
+            self.cache.save(cache_key, record['keypoints'], record['scores'], record['present'], record['fps'])
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        frames = len(angles)
+
+        result = {
+            'video': video_path,
+            'exercise': exercise_type,
+            'reps': counter.counter,
+            'frames': frames,
+            'angles': angles,
+            'wall_seconds': wall_seconds,
+            'fps': frames / wall_seconds if wall_seconds > 0 else 0.0,
+            'frames_per_cpu_second': frames / cpu_seconds if cpu_seconds > 0 else 0.0,
+            'cached': entry is not None
+        }
+        if compare_decimation:
+            result['decimated_reps'] = decimated_counter.counter
+            result['decimation_inference_ratio'] = predictor.inference_ratio()
+        if compare_filter:
+            result['filtered_reps'] = filtered_counter.counter
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count repetitions in recorded workout videos")
+    parser.add_argument('videos', nargs='+', help="Video files to analyse")
+    parser.add_argument('--exercise', default='squat', help="Exercise type (default: squat)")
+    parser.add_argument('--mode', default='balanced', help="Model mode (default: balanced)")
+    parser.add_argument('--backend', default='onnxruntime', help="Inference backend (default: onnxruntime)")
+    parser.add_argument('--engine', default='builtin', choices=['builtin', 'rtmlib'],
+                        help="ONNX Runtime engine (default: builtin)")
+    parser.add_argument('--batch', type=int, default=16, help="Frames decoded ahead and batched per run")
+    parser.add_argument('--compare-decimation', action='store_true',
+                        help="Also count with inference decimation and report both counts")
+    parser.add_argument('--compare-filter', action='store_true',
+                        help="Also count with One-Euro filtered keypoints and report both counts")
+    parser.add_argument('--no-cache', action='store_true', help="Run the models even if keypoints are cached")
+    parser.add_argument('--clear-cache', action='store_true', help="Delete all cached keypoints first")
+    parser.add_argument('--shared-weights', action='store_true',
+                        help="Memory-map model weights shared with other analysis processes")
+    args = parser.parse_args()
+
+    if args.clear_cache:
+        KeypointCache().clear()
+    analyzer = OfflineVideoAnalyzer(mode=args.mode, backend=args.backend, batch_frames=args.batch,
+                                    cache=not args.no_cache, shared_weights=args.shared_weights,
+                                    engine=args.engine)
+    for video in args.videos:
+        if not os.path.exists(video):
+            print(f"Video not found: {video}")
+            continue
+        result = analyzer.analyze(video, args.exercise, compare_decimation=args.compare_decimation,
+                                  compare_filter=args.compare_filter)
+        print(f"{video}: {result['reps']} reps, {result['frames']} frames, "
+              f"{result['fps']:.1f} fps, {result['frames_per_cpu_second']:.1f} frames/CPU-s"
+              f"{' (cached keypoints)' if result['cached'] else ''}")
+        if args.compare_decimation:
+            print(f"  decimated: {result['decimated_reps']} reps, model ran on "
+                  f"{result['decimation_inference_ratio']:.0%} of frames")
+        if args.compare_filter:
+            print(f"  filtered: {result['filtered_reps']} reps")
+
+
+if __name__ == "__main__":
+    main()
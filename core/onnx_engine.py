@@ -0,0 +1,480 @@
+import time
+import argparse
+import threading
+import cv2
+import numpy as np
+
+
+ORT_PROVIDERS = {
+    'cpu': 'CPUExecutionProvider',
+    'cuda': 'CUDAExecutionProvider',
+    'rocm': 'ROCMExecutionProvider'
+}
+
+ORT_DTYPES = {
+    'tensor(float)': np.float32,
+    'tensor(float16)': np.float16,
+    'tensor(int64)': np.int64,
+    'tensor(int32)': np.int32
+}
+
+
+def blob_params(size, mean=None, std=None):
+    """Get OpenCV params that normalize an HWC uint8 image into an NCHW float32 blob
+
+    None when the OpenCV build predates blobFromImageWithParams (4.8).
+    """
+    if not hasattr(cv2.dnn, 'blobFromImageWithParams'):
+        return None
+    params = cv2.dnn.Image2BlobParams()
+    params.size = tuple(size)
+    params.ddepth = cv2.CV_32F
+    params.swapRB = False
+    if mean is not None:
+        params.mean = tuple(float(v) for v in mean) + (0.0,)
+        params.scalefactor = tuple(1.0 / float(v) for v in std) + (0.0,)
+    return params
+
+
+def to_blob(image, target, params, mean=None, std=None):
+    """Write image normalized and transposed to CHW into target (3, H, W) in one pass"""
+    if params is not None:
+        cv2.dnn.blobFromImageWithParams(image, target[None], params)
+        return
+    for c in range(3):
+        if mean is None:
+            target[c] = image[:, :, c]
+        else:
+            np.subtract(image[:, :, c], mean[c], out=target[c], dtype=np.float32)
+            target[c] /= std[c]
+
+
+def nms(boxes, scores, nms_thr, offset=1.):
+    """Greedy single class NMS over a precomputed IoU matrix
+
+    Same overlap convention (+1 pixel) and order as rtmlib's numpy NMS,
+    offset 0 gives ONNX NonMaxSuppression's convention.
+    """
+    order = scores.argsort()[::-1]
+    boxes = boxes[order]
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1 + offset) * (y2 - y1 + offset)
+
+    w = np.maximum(0.0, np.minimum(x2[:, None], x2[None]) - np.maximum(x1[:, None], x1[None]) + offset)
+    h = np.maximum(0.0, np.minimum(y2[:, None], y2[None]) - np.maximum(y1[:, None], y1[None]) + offset)
+    inter = w * h
+    iou = inter / (areas[:, None] + areas[None] - inter)
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        suppressed |= iou[i] > nms_thr
+    return np.array(keep, dtype=np.int64)
+
+
+def simcc_decode(simcc_x, simcc_y, centers, scales, model_input_size, simcc_split_ratio=2.0):
+    """Decode SimCC outputs of N crops to image coordinates in one pass
+
+    Same math as rtmlib's get_simcc_maximum + RTMPose.postprocess.
+
+    Returns:
+        tuple: (keypoints (N, K, 2), scores (N, K))
+    """
+    locs = np.stack((simcc_x.argmax(axis=2), simcc_y.argmax(axis=2)), axis=-1).astype(np.float32)
+    scores = 0.5 * (simcc_x.max(axis=2) + simcc_y.max(axis=2))
+    locs[scores <= 0.] = -1
+
+    centers = np.asarray(centers)[:, None, :]
+    scales = np.asarray(scales)[:, None, :]
+    keypoints = locs / simcc_split_ratio / model_input_size * scales
+    keypoints = keypoints + centers - scales / 2
+    return keypoints, scores
+
+
+class BoundSession:
+    """ONNX Runtime session run through IO binding on preallocated buffers
+
+    The input tensor and every output with a static shape are numpy arrays
+    allocated once, so a run allocates nothing but dynamic-shape outputs.
+    Those are bound afresh before every run, ONNX Runtime would otherwise
+    keep writing into the first run's output and fail once its shape changes
+    (e.g. a different number of detections).
+    Assigning a new session (e.g. configure_session_threads) rebinds them.
+    With a SharedWeightStore the weights are memory-mapped from a prepared
+    copy of the model and shared with other processes.
+    """
+
+    def __init__(self, onnx_model, device='cpu', max_batch=1, shared_weights=None):
+        self.onnx_model = onnx_model
+        self.backend = 'onnxruntime'
+        self.device = device
+        self.max_batch = max_batch
+        self.shared_weights = shared_weights
+        self.lock = threading.Lock()
+        self.provider = ORT_PROVIDERS.get(device, ORT_PROVIDERS['cpu'])
+        self.session_model = shared_weights.prepare(onnx_model, self.provider) if shared_weights else onnx_model
+        self.session = self.create_session()
+
+    def create_session(self, intra_op_threads=None):
+        """Create an ONNX Runtime session, None threads keeps the runtime default"""
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if intra_op_threads is not None:
+            options.intra_op_num_threads = intra_op_threads
+            options.inter_op_num_threads = 1
+        if self.shared_weights is not None:
+            self.shared_weights.session_options(options)
+        return ort.InferenceSession(self.session_model, sess_options=options, providers=[self.provider])
+
+    @property
+    def session(self):
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+        input_meta = session.get_inputs()[0]
+        self.input_name = input_meta.name
+        batch_dim = input_meta.shape[0]
+        self.batch_size = batch_dim if isinstance(batch_dim, int) else self.max_batch
+        self.input_buffer = np.zeros((self.batch_size, *input_meta.shape[1:]), dtype=np.float32)
+
+        # Static outputs get a buffer per batch size slot, dynamic ones are allocated by the runtime
+        self.output_names = []
+        self.output_buffers = {}
+        self.dynamic_names = []
+        for meta in session.get_outputs():
+            self.output_names.append(meta.name)
+            shape = meta.shape[1:]
+            if all(isinstance(d, int) for d in shape) and (isinstance(meta.shape[0], int) or
+                                                           batch_dim == meta.shape[0]):
+                dtype = ORT_DTYPES.get(meta.type, np.float32)
+                self.output_buffers[meta.name] = np.zeros((self.batch_size, *shape), dtype=dtype)
+            else:
+                self.dynamic_names.append(meta.name)
+
+        self.binding = session.io_binding()
+        self.bound_batch = None
+
+    def _bind(self, batch):
+        """Point the binding at the first batch rows of every buffer"""
+        self.binding.bind_input(self.input_name, 'cpu', 0, np.float32,
+                                (batch, *self.input_buffer.shape[1:]), self.input_buffer.ctypes.data)
+        for name in self.output_names:
+            buffer = self.output_buffers.get(name)
+            if buffer is None:
+                self.binding.bind_output(name, 'cpu')
+            else:
+                self.binding.bind_output(name, 'cpu', 0, buffer.dtype, (batch, *buffer.shape[1:]),
+                                         buffer.ctypes.data)
+        self.bound_batch = batch
+
+    def run_bound(self, batch=1):
+        """Run on the first batch rows of input_buffer
+
+        Returns:
+            list: Outputs in model order, static ones are views into the reused buffers
+        """
+        if batch != self.bound_batch:
+            self._bind(batch)
+        else:
+            for name in self.dynamic_names:
+                # Unallocated again, the runtime sizes it for this run
+                self.binding.bind_output(name, 'cpu')
+        self._session.run_with_iobinding(self.binding)
+
+        dynamic = None
+        outputs = []
+        for index, name in enumerate(self.output_names):
+            buffer = self.output_buffers.get(name)
+            if buffer is None:
+                if dynamic is None:
+                    dynamic = self.binding.get_outputs()
+                outputs.append(dynamic[index].numpy())
+            else:
+                outputs.append(buffer[:batch])
+        return outputs
+
+
+class OnnxYOLOX(BoundSession):
+    """YOLOX person detector, drop-in for rtmlib YOLOX in 'human' mode
+
+    Any frame size goes through one resize into a preallocated uint8 canvas
+    and one conversion pass into the bound input tensor, so raw capture
+    frames need no downscaling beforehand. Models exported without NMS are
+    decoded with precomputed anchor grids and the IoU-matrix NMS above.
+    The dynamic-batch copy from core/detector_variants.py detects several
+    frames per run with detect_batch.
+    """
+
+    # NMS of the bundled export, redone on its batched copy's outputs
+    GRAPH_NMS_THR = 0.65
+    GRAPH_SCORE_THR = 0.3
+    GRAPH_MAX_DETS = 100
+
+    def __init__(self, onnx_model, model_input_size=(416, 416), nms_thr=0.45, score_thr=0.7, device='cpu',
+                 shared_weights=None, max_batch=1):
+        super().__init__(onnx_model, device=device, max_batch=max_batch, shared_weights=shared_weights)
+        self.model_input_size = tuple(model_input_size)
+        self.nms_thr = nms_thr
+        self.score_thr = score_thr
+        h, w = self.model_input_size
+        self.padded = np.full((h, w, 3), 114, dtype=np.uint8)
+        self.blob_params = blob_params((w, h))
+
+        grids, strides = [], []
+        for stride in (8, 16, 32):
+            xv, yv = np.meshgrid(np.arange(w // stride), np.arange(h // stride))
+            grids.append(np.stack((xv, yv), 2).reshape(-1, 2))
+            strides.append(np.full((len(grids[-1]), 1), stride))
+        self.grids = np.concatenate(grids).astype(np.float32)
+        self.strides = np.concatenate(strides).astype(np.float32)
+
+    def preprocess(self, img):
+        """Letterbox into the reused canvas, returns (padded image, ratio)"""
+        h, w = self.model_input_size
+        if img.shape[:2] == (h, w):
+            self.padded[:] = img
+            return self.padded, 1.
+        ratio = min(h / img.shape[0], w / img.shape[1])
+        resized_h, resized_w = int(img.shape[0] * ratio), int(img.shape[1] * ratio)
+        self.padded[resized_h:] = 114
+        self.padded[:resized_h, resized_w:] = 114
+        cv2.resize(img, (resized_w, resized_h), dst=self.padded[:resized_h, :resized_w],
+                   interpolation=cv2.INTER_LINEAR)
+        return self.padded, ratio
+
+    def inference(self, img):
+        """Run one padded HWC image, returns the model outputs"""
+        to_blob(img, self.input_buffer[0], self.blob_params)
+        return self.run_bound(1)
+
+    def postprocess(self, outputs, ratio=1.):
+        """Get person boxes (N, 4) in image coordinates"""
+        if outputs.shape[-1] == 5:
+            # NMS inside the graph
+            boxes = outputs[0, :, :4] / ratio
+            return boxes[outputs[0, :, 4] > 0.3]
+
+        predictions = outputs[0]
+        centers = (predictions[:, :2] + self.grids) * self.strides
+        sizes = np.exp(predictions[:, 2:4]) * self.strides
+        boxes = np.concatenate((centers - sizes / 2, centers + sizes / 2), axis=1) / ratio
+        scores = predictions[:, 4:5] * predictions[:, 5:]
+
+        # Class-major like rtmlib's multiclass NMS
+        final_boxes = []
+        for cls_ind in range(scores.shape[1]):
+            valid = scores[:, cls_ind] > self.score_thr
+            if valid.any():
+                keep = nms(boxes[valid], scores[valid, cls_ind], self.nms_thr)
+                final_boxes.append(boxes[valid][keep])
+        return np.concatenate(final_boxes) if final_boxes else np.array([])
+
+    def decode_scored(self, boxes, scores, ratio=1.):
+        """Get person boxes (N, 4) of one image from decoded boxes and class scores
+
+        Same result as the bundled export's in-graph NMS: per class NMS, the
+        best GRAPH_MAX_DETS boxes, then any class above GRAPH_SCORE_THR.
+        """
+        final_boxes, final_scores = [], []
+        for cls_ind in range(scores.shape[1]):
+            valid = scores[:, cls_ind] > self.GRAPH_SCORE_THR
+            if valid.any():
+                keep = nms(boxes[valid], scores[valid, cls_ind], self.GRAPH_NMS_THR, offset=0.)
+                final_boxes.append(boxes[valid][keep])
+                final_scores.append(scores[valid, cls_ind][keep])
+        if not final_boxes:
+            return np.zeros((0, 4), dtype=np.float32)
+        order = np.concatenate(final_scores).argsort()[::-1][:self.GRAPH_MAX_DETS]
+        return np.concatenate(final_boxes)[order] / ratio
+
+    def detect_batch(self, images):
+        """Get person boxes of several images, batch_size images per run
+
+        Needs the batched copy (boxes and class scores outputs, dynamic batch).
+        """
+        results = []
+        with self.lock:
+            for start in range(0, len(images), self.batch_size):
+                ratios = []
+                for row, image in enumerate(images[start:start + self.batch_size]):
+                    padded, ratio = self.preprocess(image)
+                    to_blob(padded, self.input_buffer[row], self.blob_params)
+                    ratios.append(ratio)
+                boxes, scores = self.run_bound(len(ratios))
+                results.extend(self.decode_scored(boxes[row], scores[row], ratio)
+                               for row, ratio in enumerate(ratios))
+        return results
+
+    def __call__(self, image):
+        with self.lock:
+            padded, ratio = self.preprocess(image)
+            outputs = self.inference(padded)[0]
+            return self.postprocess(outputs, ratio)
+
+
+class OnnxRTMPose(BoundSession):
+    """RTMPose SimCC model, drop-in for rtmlib RTMPose
+
+    Every bbox is cut from the image it was given, at whatever resolution,
+    with one warpAffine into a reused crop, then normalized and transposed
+    in one pass into its row of the bound (N, 3, H, W) input. All people of
+    a frame go through one run when the batch dimension is dynamic.
+    """
+
+    def __init__(self, onnx_model, model_input_size=(192, 256), mean=(123.675, 116.28, 103.53),
+                 std=(58.395, 57.12, 57.375), device='cpu', max_batch=16, shared_weights=None):
+        super().__init__(onnx_model, device=device, max_batch=max_batch, shared_weights=shared_weights)
+        self.model_input_size = tuple(model_input_size)
+        self.mean = np.array(mean, dtype=np.float32)
+        self.std = np.array(std, dtype=np.float32)
+        w, h = self.model_input_size
+        self.crop = np.zeros((h, w, 3), dtype=np.uint8)
+        self.blob_params = blob_params((w, h), self.mean, self.std)
+
+    def crop_transform(self, bbox):
+        """Get (center, scale, 2x3 warp matrix) of an xyxy bbox, as rtmlib's top_down_affine"""
+        w, h = self.model_input_size
+        bbox = np.asarray(bbox, dtype=np.float64)
+        center = (bbox[:2] + bbox[2:4]) * 0.5
+        scale = (bbox[2:4] - bbox[:2]) * 1.25
+        # Fixed aspect ratio
+        aspect_ratio = w / h
+        if scale[0] > scale[1] * aspect_ratio:
+            scale = np.array([scale[0], scale[0] / aspect_ratio])
+        else:
+            scale = np.array([scale[1] * aspect_ratio, scale[1]])
+
+        factor = w / scale[0]
+        warp_mat = np.array([[factor, 0., w * 0.5 - factor * center[0]],
+                             [0., factor, h * 0.5 - factor * center[1]]])
+        return center, scale, warp_mat
+
+    def _warp_into(self, image, bbox, row):
+        """Warp and normalize one bbox into input_buffer[row], returns (center, scale)"""
+        w, h = self.model_input_size
+        center, scale, warp_mat = self.crop_transform(bbox)
+        cv2.warpAffine(image, warp_mat, (w, h), dst=self.crop, flags=cv2.INTER_LINEAR)
+        to_blob(self.crop, self.input_buffer[row], self.blob_params, self.mean, self.std)
+        return center, scale
+
+    def preprocess(self, img, bbox):
+        """rtmlib compatible preprocessing, returns (normalized HWC crop, center, scale)"""
+        w, h = self.model_input_size
+        center, scale, warp_mat = self.crop_transform(bbox)
+        crop = cv2.warpAffine(img, warp_mat, (w, h), flags=cv2.INTER_LINEAR)
+        return (crop - self.mean) / self.std, center, scale
+
+    def inference(self, img):
+        """Run one normalized HWC crop, returns [simcc_x, simcc_y]"""
+        self.input_buffer[0] = img.transpose(2, 0, 1)
+        return [output.copy() for output in self.run_bound(1)]
+
+    def postprocess(self, outputs, center, scale, simcc_split_ratio=2.0):
+        simcc_x, simcc_y = outputs
+        return simcc_decode(simcc_x, simcc_y, [center], [scale], self.model_input_size, simcc_split_ratio)
+
+    def infer_batch(self, requests, simcc_split_ratio=2.0):
+        """Estimate poses for several (image, bboxes) requests, batch_size crops per run
+
+        Returns:
+            list: (keypoints, scores) per request, shapes (N, K, 2) and (N, K)
+        """
+        jobs = []
+        for index, (image, bboxes) in enumerate(requests):
+            if bboxes is None or len(bboxes) == 0:
+                bboxes = [[0, 0, image.shape[1], image.shape[0]]]
+            jobs.extend((index, image, bbox) for bbox in bboxes)
+        if not jobs:
+            return []
+
+        simcc_x, simcc_y, centers, scales = [], [], [], []
+        with self.lock:
+            for start in range(0, len(jobs), self.batch_size):
+                chunk = jobs[start:start + self.batch_size]
+                for row, (_, image, bbox) in enumerate(chunk):
+                    center, scale = self._warp_into(image, bbox, row)
+                    centers.append(center)
+                    scales.append(scale)
+                outputs = self.run_bound(len(chunk))
+                # Copy out of the reused buffers before the next chunk overwrites them
+                simcc_x.append(outputs[0].copy())
+                simcc_y.append(outputs[1].copy())
+
+        keypoints, scores = simcc_decode(np.concatenate(simcc_x), np.concatenate(simcc_y),
+                                         centers, scales, self.model_input_size, simcc_split_ratio)
+        owners = np.array([index for index, _, _ in jobs])
+        return [(keypoints[owners == i], scores[owners == i]) for i in range(len(requests))]
+
+    def __call__(self, image, bboxes=[]):
+        return self.infer_batch([(image, bboxes)])[0]
+
+
+def benchmark(det_path, pose_path, det_size=(416, 416), pose_size=(192, 256), runs=100, people=2):
+    """Compare rtmlib and the in-house engine on the same frames
+
+    Returns:
+        dict: Per-call latency (ms) of both and the largest output differences
+    """
+    from rtmlib import YOLOX, RTMPose
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    bboxes = np.array([[80 + 250 * i, 40, 300 + 250 * i, 460] for i in range(people)], dtype=np.float32)
+
+    reference = (YOLOX(det_path, model_input_size=det_size, backend='onnxruntime'),
+                 RTMPose(pose_path, model_input_size=pose_size, backend='onnxruntime'))
+    engine = (OnnxYOLOX(det_path, model_input_size=det_size), OnnxRTMPose(pose_path, model_input_size=pose_size))
+
+    result = {}
+    outputs = {}
+    for name, (det_model, pose_model) in (('rtmlib', reference), ('engine', engine)):
+        det_model(frame)
+        pose_model(frame, bboxes)
+        start = time.perf_counter()
+        for _ in range(runs):
+            boxes = det_model(frame)
+        result[f'{name}_det_ms'] = (time.perf_counter() - start) * 1000 / runs
+        start = time.perf_counter()
+        for _ in range(runs):
+            keypoints, scores = pose_model(frame, bboxes)
+        result[f'{name}_pose_ms'] = (time.perf_counter() - start) * 1000 / runs
+        outputs[name] = (np.asarray(boxes).reshape(-1, 4), keypoints, scores)
+
+    ref_boxes, ref_kps, ref_scores = outputs['rtmlib']
+    boxes, kps, scores = outputs['engine']
+    result['box_count_match'] = len(ref_boxes) == len(boxes)
+    result['max_box_diff'] = float(np.abs(ref_boxes - boxes).max()) if len(boxes) and len(ref_boxes) == len(boxes) else 0.0
+    result['max_keypoint_diff'] = float(np.abs(ref_kps - kps).max())
+    result['max_score_diff'] = float(np.abs(ref_scores - scores).max())
+    return result
+
+
+def main():
+    from core.rtmpose_processor import RTMPoseProcessor
+    import os
+
+    parser = argparse.ArgumentParser(description="Compare the in-house ONNX engine with rtmlib")
+    parser.add_argument('--mode', default='balanced', help="Model mode (default: balanced)")
+    parser.add_argument('--runs', type=int, default=100, help="Timed calls per stage")
+    parser.add_argument('--people', type=int, default=2, help="Pose crops per frame")
+    args = parser.parse_args()
+
+    config = RTMPoseProcessor.MODEL_CONFIGS[args.mode]
+    models_dir = RTMPoseProcessor.get_models_dir()
+    result = benchmark(os.path.join(models_dir, config['det']), os.path.join(models_dir, config['pose']),
+                       pose_size=config['pose_input_size'], runs=args.runs, people=args.people)
+    for stage in ('det', 'pose'):
+        before, after = result[f'rtmlib_{stage}_ms'], result[f'engine_{stage}_ms']
+        print(f"{stage}: rtmlib {before:.2f} ms, engine {after:.2f} ms ({(before - after) / before:+.0%} saved)")
+    print(f"max box diff {result['max_box_diff']:.4f} px (same count: {result['box_count_match']}), "
+          f"max keypoint diff {result['max_keypoint_diff']:.4f} px, "
+          f"max score diff {result['max_score_diff']:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import queue
+import threading
+from core.model_pool import estimate_full_resolution
+
+
+class PipelinedPoseEstimator:
+    """Two-stage detector/pose pipeline overlapping consecutive frames
+
+    The detector thread works on frame N+1 while the pose thread works on
+    frame N. Both stages are single threads fed by FIFO queues, so results
+    come back in submission order with one frame of added latency.
+    """
+
+    _STOP = object()
+
+    def __init__(self, session_set):
+        self.session_set = session_set  # Object with det_model and pose_model
+        self._det_queue = queue.Queue(maxsize=1)
+        self._pose_queue = queue.Queue(maxsize=1)
+        self._result_queue = queue.Queue()
+        self._next_seq = 0
+        self._pending = 0
+        self._running = True
+
+        self._det_thread = threading.Thread(target=self._det_worker, name="pose-pipeline-det", daemon=True)
+        self._pose_thread = threading.Thread(target=self._pose_worker, name="pose-pipeline-pose", daemon=True)
+        self._det_thread.start()
+        self._pose_thread.start()
+
+    def set_sessions(self, session_set):
+        """Swap detector/pose sessions (e.g. after a model mode change)"""
+        self.session_set = session_set
+
+    def _det_worker(self):
+        while True:
+            item = self._det_queue.get()
+            if item is self._STOP:
+                self._pose_queue.put(self._STOP)
+                break
+            seq, frame, pose_frame, meta = item
+            try:
+                bboxes = self.session_set.det_model(frame)
+                error = None
+            except Exception as e:
+                bboxes, error = None, e
+            self._pose_queue.put((seq, frame, pose_frame, meta, bboxes, error))
+
+    def _pose_worker(self):
+        while True:
+            item = self._pose_queue.get()
+            if item is self._STOP:
+                break
+            seq, frame, pose_frame, meta, bboxes, error = item
+            keypoints, scores = None, None
+            if error is None:
+                try:
+                    if pose_frame is None:
+                        keypoints, scores = self.session_set.pose_model(frame, bboxes=bboxes)
+                    else:
+                        keypoints, scores = estimate_full_resolution(
+                            self.session_set.pose_model, frame, pose_frame, bboxes)
+                except Exception as e:
+                    error = e
+            if error is not None:
+                print(f"Pipelined pose estimation failed: {error}")
+            self._result_queue.put((seq, frame, meta, keypoints, scores))
+
+    def process(self, frame, meta=None, pose_frame=None):
+        """Submit a frame and return the result of the previous one
+
+        pose_frame is an optional full-resolution copy to cut pose crops from.
+
+        Returns:
+            tuple: (frame, meta, keypoints, scores) of the previously submitted
+                   frame, or the submitted frame with no keypoints on the first call
+        """
+        self._det_queue.put((self._next_seq, frame, pose_frame, meta))
+        self._next_seq += 1
+        self._pending += 1
+
+        # Prime the pipeline: the first frame has nothing to return yet
+        if self._pending < 2:
+            return frame, meta, None, None
+
+        _, out_frame, out_meta, keypoints, scores = self._result_queue.get()
+        self._pending -= 1
+        return out_frame, out_meta, keypoints, scores
+
+    def flush(self):
+        """Wait for all submitted frames and return their results in order"""
+        results = []
+        while self._pending > 0:
+            _, out_frame, out_meta, keypoints, scores = self._result_queue.get()
+            self._pending -= 1
+            results.append((out_frame, out_meta, keypoints, scores))
+        return results
+
+    def stop(self):
+        """Stop stage threads"""
+        if not self._running:
+            return
+        self._running = False
+        self.flush()
+        self._det_queue.put(self._STOP)
+        self._det_thread.join(timeout=2)
+        self._pose_thread.join(timeout=2)
@@ -0,0 +1,74 @@
+import time
+from collections import deque
+import numpy as np
+
+
+class QoSController:
+    """Picks the model mode from measured per-frame inference latency
+
+    Steps down to a lighter mode when the recent median latency exceeds the
+    budget and back up to a heavier one when there is clear headroom. The gap
+    between the two thresholds, a minimum dwell time after every switch and
+    the remembered latency of each mode keep it from flapping.
+    """
+
+    # Lightest first
+    MODES = ['lightweight', 'balanced', 'performance']
+
+    def __init__(self, budget_ms=33.0, window=30, upgrade_ratio=0.6, dwell_seconds=5.0,
+                 memory_seconds=60.0):
+        self.budget_ms = budget_ms
+        self.upgrade_ratio = upgrade_ratio  # Upgrade only below this fraction of the budget
+        self.dwell_seconds = dwell_seconds
+        self.memory_seconds = memory_seconds  # How long a mode's measured latency is trusted
+        self.samples = deque(maxlen=window)
+        self.mode_latency = {}  # mode -> (median latency ms, time measured)
+        self.current_mode = None
+        self.last_switch_time = 0.0
+        self.switches = 0
+
+    def set_mode(self, mode):
+        """Sync with a mode chosen outside the controller (e.g. by the user)"""
+        if mode != self.current_mode:
+            self.current_mode = mode
+            self.samples.clear()
+            self.last_switch_time = time.time()
+
+    def median_latency(self):
+        """Get median of recent latency samples (ms), None until the window is full"""
+        if len(self.samples) < self.samples.maxlen:
+            return None
+        return float(np.median(self.samples))
+
+    def record(self, latency_ms):
+        """Add a latency sample
+
+        Returns:
+            str: Mode to switch to, or None to keep the current one
+        """
+        if latency_ms is None or self.current_mode not in self.MODES:
+            return None
+        self.samples.append(latency_ms)
+
+        median = self.median_latency()
+        now = time.time()
+        if median is None or now - self.last_switch_time < self.dwell_seconds:
+            return None
+        self.mode_latency[self.current_mode] = (median, now)
+
+        index = self.MODES.index(self.current_mode)
+        target = None
+        if median > self.budget_ms and index > 0:
+            target = self.MODES[index - 1]
+        elif median < self.budget_ms * self.upgrade_ratio and index < len(self.MODES) - 1:
+            heavier = self.MODES[index + 1]
+            # Don't go back to a mode recently measured over budget
+            known = self.mode_latency.get(heavier)
+            if known is None or known[0] <= self.budget_ms or now - known[1] > self.memory_seconds:
+                target = heavier
+
+        if target is not None:
+            print(f"QoS: {self.current_mode} -> {target} (median {median:.1f} ms, budget {self.budget_ms:.0f} ms)")
+            self.set_mode(target)
+            self.switches += 1
+        return target
@@ -1,24 +1,89 @@
 import os
 import cv2
 import sys
-from rtmlib import Wholebody, draw_skeleton
+import time
+from rtmlib import draw_skeleton
+from core.backend_selector import BackendSelector
+from core.model_pool import ModelPool, PoseSessionSet
+from core.model_registry import ModelRegistry
+from core.shared_weights import SharedWeightStore
+from core.pose_pipeline import PipelinedPoseEstimator
+from core.keypoint_predictor import KeypointPredictor
+from core.keypoint_filter import OneEuroKeypointFilter
+from core.fixed_zone import FixedZoneEstimator
+from core.inference_server import InferenceServer, InferenceClient, DEFAULT_ADDRESS
 
 class RTMPoseProcessor:
     """RTMPose pose detection processor"""
     
-    def __init__(self, exercise_counter, mode='balanced', backend='onnxruntime', device='cpu'):
+    # Person detector shared by all modes
+    DET_MODEL = 'yolox_nano_8xb8-300e_humanart-40f6f0d0.onnx'
+    
+    # Local model files for each mode (pose_input_size is (w, h))
+    MODEL_CONFIGS = {
+        'lightweight': {
+            'det': DET_MODEL,
+            'pose': 'rtmpose-t_simcc-body7_pt-body7_420e-256x192-026a1439_20230504.onnx',
+            'pose_input_size': (192, 256)
+        },
+        'balanced': {
+            'det': DET_MODEL,
+            'pose': 'rtmpose-s_simcc-body7_pt-body7_420e-256x192-acd4a1ef_20230504.onnx',
+            'pose_input_size': (192, 256)
+        },
+        'performance': {
+            'det': DET_MODEL,
+            'pose': 'rtmpose-m_simcc-body7_pt-body7_420e-256x192-e48f03d0_20230504.onnx',
+            'pose_input_size': (192, 256)
+        },
+        # Static INT8 models produced by core/model_quantizer.py (rtmpose-s + yolox_nano)
+        'quantized': {
+            'det': 'yolox_nano_8xb8-300e_humanart-40f6f0d0_int8.onnx',
+            'pose': 'rtmpose-s_simcc-body7_pt-body7_420e-256x192-acd4a1ef_20230504_int8.onnx',
+            'pose_input_size': (192, 256)
+        }
+    }
+    
+    # Modes warmed up in the background so switching between them is instant
+    PRELOAD_MODES = ['lightweight', 'balanced', 'performance']
+    
+    def __init__(self, exercise_counter, mode='balanced', backend='onnxruntime', device='cpu',
+                 pool_memory_mb=512, engine='builtin', thread_planner=None, model_mirror_dir=None,
+                 shared_weights=False, backend_cache=None):
         self.exercise_counter = exercise_counter
         self.show_skeleton = True
         self.conf_threshold = 0.5
         self.device = device
-        self.backend = backend
+        self.requested_backend = backend  # 'auto' runs a self-benchmark
+        self.backend_cache = backend_cache  # AppConfig keeping 'auto' benchmark winners across startups
+        self.backend = backend  # Backend actually in use
+        self.wholebody = None
+        self.pool_memory_mb = pool_memory_mb
+        self.engine = engine  # 'builtin' runs ONNX Runtime models without rtmlib's wrappers
+        self.model_pools = {}  # backend -> ModelPool
+        self.pose_pipeline = None  # Overlaps detector and pose stages when enabled
+        self.inference_server = None  # Worker process owned by this processor
+        self.inference_client = None  # Set when inference runs out of process
+        self.last_inference_ms = None  # Per-frame inference latency, watched by the QoS controller
+        self.dual_resolution = False  # Detect on the downscaled frame, cut pose crops from the original
+        self.keypoint_predictor = None  # Extrapolates keypoints between model runs when decimation is on
+        self.keypoint_filter = None  # Temporal keypoint smoothing before counting when set
+        self.fused_preprocessing = False  # Models read the raw frame, the downscaled copy is for display only
+        self.thread_planner = thread_planner  # Thread budget applied to every model pool
+        plan = thread_planner.plan if thread_planner is not None else {}
+        # (detector, pose) intra-op threads for every pool, including ones created later
+        self.thread_budget = (plan.get('det_threads'), plan.get('pose_threads'))
+        self.fixed_zone = None  # Pose-only inference on a fixed workout zone when set
+        self.model_registry = ModelRegistry(self.get_models_dir(), mirror_dir=model_mirror_dir)
+        self.shared_weights = SharedWeightStore() if shared_weights else None  # Weights mmapped across processes
         
         # Initialize RTMPose model
         self.init_rtmpose(mode)
         
         self.keypoint_mapping = self.get_keypoint_mapping()
     
-    def get_models_dir(self):
+    @staticmethod
+    def get_models_dir():
         """Get model file directory, compatible with development and packaged environments"""
         if getattr(sys, 'frozen', False):
             # Packaged environment, model files are in temp directory
@@ -30,53 +95,303 @@ class RTMPoseProcessor:
         
         return models_dir
     
-    def init_rtmpose(self, mode='balanced'):
-        """Initialize RTMPose model"""
+    def get_model_pool(self, backend):
+        """Get (or create) the warm session pool for a backend"""
+        pool = self.model_pools.get(backend)
+        if pool is None:
+            pool = ModelPool(self.get_models_dir(), self.MODEL_CONFIGS, backend=backend,
+                             device=self.device, max_memory_mb=self.pool_memory_mb, engine=self.engine,
+                             registry=self.model_registry, shared_weights=self.shared_weights)
+            # Sessions are created with the current budget, e.g. after a backend switch or fallback
+            pool.det_threads, pool.pose_threads = self.thread_budget
+            self.model_pools[backend] = pool
+        return pool
+    
+    def create_wholebody(self, mode, backend):
+        """Create detector + pose pipeline for a mode on a given backend"""
+        print(f"Using local model files ({mode} mode)")
+        return self.get_model_pool(backend).get(mode)
+    
+    def check_model_files(self, mode):
+        """Make sure a mode's model files exist locally and match the manifest
+        
+        Raises:
+            FileNotFoundError: With the searched directories and where to get the file
+        """
+        if mode not in self.MODEL_CONFIGS:
+            raise FileNotFoundError(f"Unknown model mode: {mode}")
         try:
-            print(f"Initializing RTMPose model (mode: {mode}, backend: {self.backend}, device: {self.device})")
-            
-            # Check if local model files exist
-            models_dir = self.get_models_dir()
-            if os.path.exists(models_dir):
-                # Try to use local models
-                det_model = os.path.join(models_dir, 'yolox_nano_8xb8-300e_humanart-40f6f0d0.onnx')
-                
-                # Select different pose detection models based on mode
-                if mode == 'lightweight':
-                    pose_model = os.path.join(models_dir, 'rtmpose-t_simcc-body7_pt-body7_420e-256x192-026a1439_20230504.onnx')
-                    pose_input_size = (192, 256)
-                elif mode == 'performance':
-                    pose_model = os.path.join(models_dir, 'rtmpose-m_simcc-body7_pt-body7_420e-256x192-e48f03d0_20230504.onnx')
-                    pose_input_size = (192, 256)
-                else:  # balanced
-                    pose_model = os.path.join(models_dir, 'rtmpose-s_simcc-body7_pt-body7_420e-256x192-acd4a1ef_20230504.onnx')
-                    pose_input_size = (192, 256)
-                
-                if os.path.exists(det_model) and os.path.exists(pose_model):
-                    print(f"Using local model files ({mode} mode)")
-                    self.wholebody = Wholebody(
-                        det=det_model,
-                        det_input_size=(416, 416),
-                        pose=pose_model,
-                        pose_input_size=pose_input_size,
-                        backend=self.backend,
-                        device=self.device
-                    )
-                    print("RTMPose local model initialization successful")
-                    return
-                else:
-                    print("Local model files incomplete, using online download")
-            else:
-                print("models directory doesn't exist, using online download")
-                self.wholebody = Wholebody(
-                    mode=mode,
-                    backend=self.backend,
-                    device=self.device
-                )
-                print("RTMPose online model initialization successful")
+            self.model_registry.resolve_mode(self.MODEL_CONFIGS[mode])
+        except FileNotFoundError:
+            if mode == 'quantized':
+                raise FileNotFoundError("Quantized model files not found, run 'python -m core.model_quantizer' to generate them")
+            raise
+    
+    def init_rtmpose(self, mode='balanced'):
+        """Initialize RTMPose model, falling back to other backends if loading fails
+        
+        Raises:
+            FileNotFoundError: If the mode's model files are missing, before any state changes
+        """
+        print(f"Initializing RTMPose model (mode: {mode}, backend: {self.requested_backend}, device: {self.device})")
+        self.check_model_files(mode)
+        self.mode = mode
+        self.reset_tracking()
+        available = BackendSelector.available_backends()
+        
+        cached = self.cached_backend(mode, available) if self.requested_backend == 'auto' else None
+        if cached is not None:
+            # Fastest backend of an earlier benchmark on this machine, others as fallback
+            print(f"Using previously benchmarked backend: {cached}")
+            candidates = [cached] + [b for b in available if b != cached]
+        elif self.requested_backend == 'auto':
+            # Benchmark every available backend and keep the fastest one
+            ranked = BackendSelector().benchmark(lambda b: self.create_wholebody(mode, b), available)
+            if ranked:
+                _, self.backend, self.wholebody = ranked[0]
+                print(f"RTMPose initialization successful, selected fastest backend: {self.backend}")
+                self.store_backend(mode, available, self.backend)
+                self.preload_models()
+                return
+            candidates = []
+        else:
+            # Requested backend first, then the remaining ones as fallback
+            candidates = [self.requested_backend] + [b for b in available if b != self.requested_backend]
+        
+        for backend in candidates:
+            try:
+                self.wholebody = self.create_wholebody(mode, backend)
+                self.backend = backend
+                print(f"RTMPose initialization successful (backend: {backend})")
+                self.preload_models()
+                return
+            except Exception as e:
+                print(f"RTMPose initialization with {backend} backend failed: {e}")
+        
+        # Leave the processor in a defined state, frames are passed through without inference
+        self.wholebody = None
+        self.model_pools = {}
+        self.sync_pipeline()
+        print("RTMPose initialization failed on all backends")
+    
+    def cached_backend(self, mode, available):
+        """Get the backend an earlier 'auto' benchmark picked in this environment, None if unknown"""
+        if self.backend_cache is None:
+            return None
+        key = BackendSelector.environment_key(mode, available, self.device)
+        backend = (self.backend_cache.get("auto_backend_choice") or {}).get(key)
+        return backend if backend in available else None
+    
+    def store_backend(self, mode, available, backend):
+        """Remember the benchmark winner so later startups skip the benchmark"""
+        if self.backend_cache is None:
+            return
+        choices = dict(self.backend_cache.get("auto_backend_choice") or {})
+        choices[BackendSelector.environment_key(mode, available, self.device)] = backend
+        self.backend_cache.set("auto_backend_choice", choices)
+    
+    def preload_models(self):
+        """Keep only the active backend's pool and warm up the other modes in the background"""
+        pool = self.model_pools.get(self.backend)
+        self.model_pools = {self.backend: pool} if pool is not None else {}
+        if pool is not None:
+            pool.preload([m for m in self.PRELOAD_MODES if m != self.mode])
+        self.sync_pipeline()
+    
+    def sync_pipeline(self):
+        """Point the stage pipeline at the current sessions"""
+        if self.pose_pipeline is None:
+            return
+        if self.wholebody is None:
+            self.pose_pipeline.stop()
+            self.pose_pipeline = None
+        else:
+            self.pose_pipeline.set_sessions(self.wholebody)
+    
+    def set_thread_budget(self, det_threads, pose_threads):
+        """Set intra-op threads of all pools' sessions and of pools created later"""
+        self.thread_budget = (det_threads, pose_threads)
+        for pool in self.model_pools.values():
+            pool.set_thread_budget(det_threads, pose_threads)
+    
+    def set_thread_planner(self, planner):
+        """Use a ThreadPlanner's intra-op thread counts for all sessions"""
+        self.thread_planner = planner
+        if self.pose_pipeline is None:
+            self.set_thread_budget(planner.plan['det_threads'], planner.plan['pose_threads'])
+    
+    def set_pipelining(self, enabled, det_threads=None, pose_threads=None):
+        """Run detector and pose model as overlapping pipeline stages
+        
+        Args:
+            enabled (bool): Whether to pipeline consecutive frames
+            det_threads (int): Intra-op threads for the detector stage
+            pose_threads (int): Intra-op threads for the pose stage
+        """
+        if self.pose_pipeline is not None:
+            self.pose_pipeline.stop()
+            self.pose_pipeline = None
+        
+        if enabled and self.inference_client is not None:
+            print("Pipelined inference is not available while inference runs in a separate process")
+            return
+        
+        plan = self.thread_planner.plan if self.thread_planner is not None else {}
+        if not enabled:
+            self.set_thread_budget(plan.get('det_threads'), plan.get('pose_threads'))
+            print("Pipelined inference: Off")
+            return
+        
+        # Split cores between the stages so both can run at the same time
+        if self.thread_planner is not None:
+            split = self.thread_planner.pipeline_threads()
+        else:
+            cores = os.cpu_count() or 2
+            split = (max(1, cores // 2), max(1, cores - max(1, cores // 2)))
+        det_threads = det_threads or split[0]
+        pose_threads = pose_threads or split[1]
+        self.set_thread_budget(det_threads, pose_threads)
+        
+        if self.wholebody is not None:
+            self.pose_pipeline = PipelinedPoseEstimator(self.wholebody)
+        print(f"Pipelined inference: On (detector {det_threads} threads, pose {pose_threads} threads)")
+    
+    def set_backend(self, backend):
+        """Switch inference backend ('auto' to pick the fastest) and reload the current mode"""
+        self.requested_backend = backend
+        if self.inference_client is not None:
+            # Restart the worker process with the new backend
+            address = self.inference_client.address
+            self.set_process_isolation(False)
+            self.set_process_isolation(True, address)
+            return self.backend
+        self.init_rtmpose(self.mode)
+        return self.backend
+    
+    def set_decimation(self, enabled, max_interval=4):
+        """Run the model on every Nth frame only and extrapolate keypoints in between
+        
+        N adapts to motion speed, from every frame during fast reps up to max_interval at rest.
+        """
+        self.keypoint_predictor = KeypointPredictor(max_interval=max_interval,
+                                                    conf_threshold=self.conf_threshold) if enabled else None
+        if enabled and self.pose_pipeline is not None:
+            print("Inference decimation is not applied while pipelined inference is on")
+        print(f"Inference decimation: {'On' if enabled else 'Off'}")
+    
+    def reset_tracking(self):
+        """Forget keypoints of earlier frames, after an exercise or model switch"""
+        if self.keypoint_predictor is not None:
+            self.keypoint_predictor.reset()
+        if self.keypoint_filter is not None:
+            self.keypoint_filter.reset()
+    
+    def set_keypoint_filter(self, enabled):
+        """Smooth the first person's keypoints over time before they reach the counter"""
+        self.keypoint_filter = OneEuroKeypointFilter(conf_threshold=self.conf_threshold) if enabled else None
+        print(f"Keypoint filter: {'On' if enabled else 'Off'}")
+    
+    def set_dual_resolution(self, enabled):
+        """Detect on the downscaled frame but cut pose crops from the full-resolution frame"""
+        self.dual_resolution = enabled
+        if enabled and self.inference_client is not None:
+            print("Dual resolution: frames sent to the inference process stay downscaled")
+        print(f"Dual resolution: {'On' if enabled else 'Off'}")
+    
+    def set_fixed_zone(self, enabled, zone=None):
+        """Skip the person detector and run the pose model on a fixed workout zone
+        
+        Args:
+            enabled (bool): Whether fixed zone mode is on
+            zone (tuple): Relative (x1, y1, x2, y2), None calibrates from the first frames
+        """
+        if self.fixed_zone is not None:
+            self.fixed_zone.report()
+        self.fixed_zone = FixedZoneEstimator(zone) if enabled else None
+        if enabled and (self.pose_pipeline is not None or self.inference_client is not None):
+            print("Fixed zone mode is not applied while pipelined or out-of-process inference is on")
+        print(f"Fixed zone mode: {'On' if enabled else 'Off'}")
+    
+    def run_pose(self, image, pose_image=None):
+        """Run the current sessions, through the fixed zone when it applies"""
+        if self.fixed_zone is not None and isinstance(self.wholebody, PoseSessionSet):
+            return self.fixed_zone(self.wholebody, image, pose_image)
+        if pose_image is None:
+            return self.wholebody(image)
+        return self.wholebody(image, pose_image=pose_image)
+    
+    def set_fused_preprocessing(self, enabled):
+        """Feed raw frames straight to the in-house engine's letterbox and crop warps"""
+        self.fused_preprocessing = enabled
+        if enabled and not self.uses_fused_preprocessing():
+            print("Fused preprocessing needs the built-in engine without pipelined or out-of-process inference")
+        print(f"Fused preprocessing: {'On' if enabled else 'Off'}")
+    
+    def uses_fused_preprocessing(self):
+        """Check whether fused preprocessing applies to the current sessions"""
+        return (self.fused_preprocessing and self.pose_pipeline is None and
+                isinstance(self.wholebody, PoseSessionSet) and hasattr(self.wholebody.pose_model, 'infer_batch'))
+    
+    def set_process_isolation(self, enabled, address=DEFAULT_ADDRESS, authkey=None):
+        """Run inference in a separate worker process
+        
+        Connects to an already running server (e.g. started by another UI
+        instance) or starts one owned by this processor.
+        """
+        if enabled:
+            if self.inference_client is not None:
+                return True
+            try:
+                try:
+                    client = InferenceClient(address, authkey)
+                    print(f"Connected to running inference server at {address[0]}:{address[1]}")
+                except (ConnectionRefusedError, OSError):
+                    server = InferenceServer(address, authkey, mode=self.mode, backend=self.requested_backend,
+                                             device=self.device, pool_memory_mb=self.pool_memory_mb,
+                                             shared_weights=self.shared_weights is not None)
+                    server.start()
+                    self.inference_server = server
+                    client = InferenceClient(address, authkey, server=server)
+                if client.mode != self.mode:
+                    client.set_mode(self.mode)
+            except Exception as e:
+                print(f"Starting inference process failed: {e}")
+                if self.inference_server is not None:
+                    self.inference_server.stop()
+                    self.inference_server = None
+                return False
             
-        except Exception as e:
-            print(f"RTMPose initialization failed: {e}")
+            # Sessions live in the worker process now
+            self.model_pools = {}
+            self.set_pipelining(False)
+            self.inference_client = client
+            self.wholebody = client
+            print("Inference process isolation: On")
+            return True
+        
+        if self.inference_client is not None:
+            self.inference_client.close()
+            self.inference_client = None
+        if self.inference_server is not None:
+            self.inference_server.stop()
+            self.inference_server = None
+        print("Inference process isolation: Off")
+        self.init_rtmpose(self.mode)
+        return True
+    
+    def close(self):
+        """Release worker process and pipeline threads"""
+        if self.fixed_zone is not None:
+            self.fixed_zone.report()
+        if self.pose_pipeline is not None:
+            self.pose_pipeline.stop()
+            self.pose_pipeline = None
+        if self.inference_client is not None:
+            self.inference_client.close()
+            self.inference_client = None
+        if self.inference_server is not None:
+            self.inference_server.stop()
+            self.inference_server = None
 
     def get_keypoint_mapping(self):
         """Get keypoint mapping (COCO 17 keypoint format)"""
@@ -87,9 +402,41 @@ class RTMPoseProcessor:
         # 13: left_knee, 14: right_knee, 15: left_ankle, 16: right_ankle
         return list(range(17))  # 1:1 mapping
     
+    def mode_ready(self, mode):
+        """Check whether switching to a mode is instant (sessions already warm in the pool)"""
+        if self.inference_client is not None:
+            return True  # The worker process loads its own models
+        pool = self.model_pools.get(self.backend)
+        return pool is not None and mode in pool.cached_modes() and not pool.is_loading(mode)
+    
+    def load_mode_async(self, mode):
+        """Warm a mode's sessions in a background thread, None if it can't come from the pool"""
+        pool = self.model_pools.get(self.backend)
+        if self.inference_client is not None or pool is None or not pool.has_local_models(mode):
+            return None
+        return pool.load_async(mode)
+    
     def update_model(self, mode='balanced'):
-        """Update model"""
+        """Update model, served from the warm pool when possible"""
         print(f"Updating RTMPose model to mode: {mode}")
+        # Keypoints of the previous model must not be extrapolated into the new one's
+        self.reset_tracking()
+        if self.inference_client is not None:
+            self.mode = self.inference_client.set_mode(mode)
+            print(f"RTMPose processor updated to mode: {mode}")
+            return
+        
+        pool = self.model_pools.get(self.backend)
+        if pool is not None and pool.has_local_models(mode):
+            try:
+                self.wholebody = pool.get(mode)
+                self.mode = mode
+                self.sync_pipeline()
+                print(f"RTMPose processor updated to mode: {mode}")
+                return
+            except Exception as e:
+                print(f"Loading {mode} mode from pool failed: {e}")
+        
         self.init_rtmpose(mode)
         print(f"RTMPose processor updated to mode: {mode}")
     
@@ -98,15 +445,31 @@ class RTMPoseProcessor:
         # Size check, resize if frame is too large
         h, w = frame.shape[:2]
         original_size = (w, h)
+        raw_frame = frame
+        fused = self.uses_fused_preprocessing()
         
         # RTMPose is suitable for higher resolution, but limit for performance
+        full_frame = None
         if w > 640 or h > 640:
             scale = min(640/w, 640/h)
+            if self.dual_resolution:
+                full_frame = frame
             frame = cv2.resize(frame, (int(w*scale), int(h*scale)))
             scale_factor = scale
         else:
             scale_factor = 1.0
         
+        # Pose crops from the original frame only work with our own detector/pose sessions
+        if full_frame is not None and not (self.pose_pipeline is not None or isinstance(self.wholebody, PoseSessionSet)):
+            full_frame = None
+        
+        inference_start = time.perf_counter()
+        
+        # Pipelined stages return the result of the previous frame
+        if self.pose_pipeline is not None:
+            frame, (scale_factor, original_size), detected_keypoints, scores = \
+                self.pose_pipeline.process(frame, (scale_factor, original_size), pose_frame=full_frame)
+        
         # Copy frame to draw on it
         output_frame = frame.copy()
         
@@ -116,8 +479,30 @@ class RTMPoseProcessor:
         keypoints = None
         
         try:
-            # Use RTMPose for pose detection
-            detected_keypoints, scores = self.wholebody(frame)
+            # Use RTMPose for pose detection (plain video if no model could be loaded)
+            has_model = self.wholebody is not None or self.pose_pipeline is not None
+            predictor = self.keypoint_predictor if self.pose_pipeline is None and has_model else None
+            if predictor is not None and not predictor.should_infer():
+                # Decimated frame: extrapolate from the last model results
+                detected_keypoints, scores = predictor.predict()
+                has_model = False  # Nothing for the QoS controller to measure
+            elif self.pose_pipeline is None:
+                if fused:
+                    # Letterbox and crop warps read the raw frame, keypoints map to the display frame
+                    detected_keypoints, scores = self.run_pose(raw_frame)
+                    detected_keypoints = detected_keypoints * scale_factor
+                elif full_frame is not None:
+                    detected_keypoints, scores = self.run_pose(frame, pose_image=full_frame)
+                elif self.wholebody is not None:
+                    detected_keypoints, scores = self.run_pose(frame)
+                else:
+                    detected_keypoints, scores = None, None
+                if predictor is not None:
+                    predictor.update(detected_keypoints, scores)
+            self.last_inference_ms = (time.perf_counter() - inference_start) * 1000 if has_model else None
+            
+            if self.keypoint_filter is not None:
+                detected_keypoints, scores = self.keypoint_filter(detected_keypoints, scores)
             
             # Process results
             if detected_keypoints is not None and len(detected_keypoints) > 0:
@@ -130,8 +515,9 @@ class RTMPoseProcessor:
                     valid_mask = confidence_scores > self.conf_threshold
                     keypoints[~valid_mask] = [0, 0]  # Set low confidence points to (0,0)
                 
-                # If need to scale back to original size
-                if scale_factor != 1.0:
+                # If need to scale back to original size (dual resolution and fused
+                # preprocessing keep the downscaled frame for display instead of upsampling it again)
+                if scale_factor != 1.0 and not (self.dual_resolution or fused):
                     keypoints = keypoints / scale_factor
                     # Also adjust output frame size
                     output_frame = cv2.resize(output_frame, original_size)
@@ -148,6 +534,13 @@ class RTMPoseProcessor:
             # Return original frame when error occurs
             pass
         
+        # Outline the fixed workout zone
+        if self.fixed_zone is not None and self.fixed_zone.is_calibrated() and self.show_skeleton:
+            x1, y1, x2, y2 = self.fixed_zone.zone_pixels(output_frame).astype(int)
+            cv2.rectangle(output_frame, (x1, y1), (x2, y2), (255, 200, 0), 1)
+            cv2.putText(output_frame, f"detector skipped {self.fixed_zone.detector_skip_ratio():.0%}",
+                        (x1 + 4, max(y1 - 6, 12)), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 200, 0), 1)
+        
         # BGR to RGB (PyQt needs RGB format)
         output_frame = cv2.cvtColor(output_frame, cv2.COLOR_BGR2RGB)
         
@@ -159,42 +552,11 @@ class RTMPoseProcessor:
         angle_point = None
         
         try:
-            if exercise_type == "squat":
-                current_angle = self.exercise_counter.count_squat(keypoints)
-                if current_angle is not None:
-                    angle_point = [keypoints[12], keypoints[14], keypoints[16]]
-            elif exercise_type == "pushup":
-                current_angle = self.exercise_counter.count_pushup(keypoints)
-                if current_angle is not None:
-                    angle_point = [keypoints[6], keypoints[8], keypoints[10]]
-            elif exercise_type == "situp":
-                current_angle = self.exercise_counter.count_situp(keypoints)
-                if current_angle is not None:
-                    angle_point = [keypoints[5], keypoints[11], keypoints[12]]
-            elif exercise_type == "bicep_curl":
-                current_angle = self.exercise_counter.count_bicep_curl(keypoints)
-                if current_angle is not None:
-                    angle_point = [keypoints[6], keypoints[8], keypoints[10]]
-            elif exercise_type == "lateral_raise":
-                current_angle = self.exercise_counter.count_lateral_raise(keypoints)
-                if current_angle is not None:
-                    angle_point = [keypoints[12], keypoints[6], keypoints[8]]
-            elif exercise_type == "overhead_press":
-                current_angle = self.exercise_counter.count_overhead_press(keypoints)
-                if current_angle is not None:
-                    angle_point = [keypoints[12], keypoints[6], keypoints[8]]
-            elif exercise_type == "leg_raise":
-                current_angle = self.exercise_counter.count_leg_raise(keypoints)
-                if current_angle is not None:
-                    angle_point = [keypoints[12], keypoints[14], keypoints[16]]
-            elif exercise_type == "knee_raise":
-                current_angle = self.exercise_counter.count_knee_raise(keypoints)
-                if current_angle is not None:
-                    angle_point = [keypoints[12], keypoints[14], keypoints[16]]
-            elif exercise_type == "knee_press":
-                current_angle = self.exercise_counter.count_knee_press(keypoints)
-                if current_angle is not None:
-                    angle_point = [keypoints[11], keypoints[13], keypoints[15]]
+            current_angle = self.exercise_counter.count_exercise(keypoints, exercise_type)
+            if current_angle is not None:
+                # Joints the angle is drawn at, from the exercise definition
+                display = self.exercise_counter.exercise_configs[exercise_type]['display']
+                angle_point = [keypoints[i] for i in display]
         except Exception as e:
             print(f"Error calculating exercise angle: {e}")
             
@@ -0,0 +1,236 @@
+import os
+import sys
+import time
+import shutil
+import hashlib
+import platform
+import argparse
+import multiprocessing as mp
+import numpy as np
+
+
+class SharedWeightStore:
+    """ONNX models rewritten so every process maps the same weight pages
+
+    A plain .onnx file is parsed into private memory by every session, and
+    graph optimization plus weight prepacking then copy the weights again.
+    The store runs ONNX Runtime's full graph optimization once and saves the
+    result with the weights in a page-aligned external data file. Sessions
+    then load that file with optimization and prepacking off, so ONNX Runtime
+    memory-maps the weights read-only and the OS shares the pages between
+    all processes using the model (inference workers, app instances, batch
+    analysis).
+
+    Optimized models may contain CPU-specific layouts, so they are keyed by
+    the source file, ONNX Runtime version, machine and execution provider
+    and kept in data/shared_weights on the machine that made them.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.path.join(self._get_data_directory(), "shared_weights")
+
+    def _get_data_directory(self):
+        """Get data directory path, compatible with development and packaged environments"""
+        if getattr(sys, 'frozen', False):
+            return os.path.join(os.path.dirname(sys.executable), "data")
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, "data")
+
+    def key(self, model_path, provider):
+        """Get cache key of a model file optimized for a provider on this machine"""
+        import onnxruntime as ort
+        stat = os.stat(model_path)
+        description = "|".join(str(v) for v in (
+            self.VERSION, os.path.abspath(model_path), stat.st_size, stat.st_mtime_ns,
+            ort.__version__, platform.machine(), provider
+        ))
+        return hashlib.sha256(description.encode()).hexdigest()[:24]
+
+    def model_path(self, model_path, provider):
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        return os.path.join(self.cache_dir, f"{name}-{self.key(model_path, provider)}", "model.onnx")
+
+    def prepare(self, model_path, provider='CPUExecutionProvider'):
+        """Get the shareable copy of a model, creating it on first use
+
+        Returns:
+            str: Path of the optimized model with external weights
+        """
+        shared_path = self.model_path(model_path, provider)
+        if os.path.exists(shared_path):
+            return shared_path
+
+        import onnxruntime as ort
+        target_dir = os.path.dirname(shared_path)
+        # Build in a private directory, another process may be preparing the same model
+        tmp_dir = f"{target_dir}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        start = time.time()
+        try:
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.log_severity_level = 3  # Hardware-specific layout warning, the key covers it
+            options.optimized_model_filepath = os.path.join(tmp_dir, "model.onnx")
+            # Path is relative to the optimized model, small tensors stay inline
+            options.add_session_config_entry('session.optimized_model_external_initializers_file_name',
+                                             "model.onnx.data")
+            options.add_session_config_entry('session.optimized_model_external_initializers_min_size_in_bytes',
+                                             "1024")
+            options.add_session_config_entry('session.disable_prepacking', "1")
+            ort.InferenceSession(model_path, sess_options=options, providers=[provider])
+            try:
+                os.rename(tmp_dir, target_dir)
+            except OSError:
+                # Someone else finished first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        print(f"Prepared shared weights for {os.path.basename(model_path)} in {time.time() - start:.1f}s")
+        return shared_path
+
+    def session_options(self, options=None):
+        """Set up session options so the prepared weights stay memory-mapped
+
+        The model is already optimized, running the optimizers or prepacking
+        again would copy the weights into private memory.
+        """
+        import onnxruntime as ort
+        options = options or ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        options.add_session_config_entry('session.disable_prepacking', "1")
+        return options
+
+    def clear(self):
+        """Delete all prepared models"""
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+
+
+def process_memory(pid=None):
+    """Get Rss, Pss, Private and Anonymous memory of a process in bytes (Linux)"""
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    values = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return {
+        'rss': values.get('Rss', 0),
+        'pss': values.get('Pss', 0),
+        'private': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0),
+        'anonymous': values.get('Anonymous', 0)
+    }
+
+
+def _memory_worker(model_paths, shared, cache_dir, ready, done):
+    """Load sessions like an inference worker, run each once and hold them until told to stop"""
+    import onnxruntime as ort
+    store = SharedWeightStore(cache_dir)
+    sessions = []
+    for model_path in model_paths:
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        if shared:
+            model_path = store.prepare(model_path)
+            store.session_options(options)
+        session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        meta = session.get_inputs()[0]
+        shape = [d if isinstance(d, int) else 1 for d in meta.shape]
+        session.run(None, {meta.name: np.zeros(shape, dtype=np.float32)})
+        sessions.append(session)
+    ready.set()
+    done.wait()
+
+
+def measure_workers(model_paths, workers=3, shared=True, cache_dir=None):
+    """Start worker processes holding the models and measure each one
+
+    Returns:
+        list: process_memory() of every worker while all of them are running
+    """
+    if shared:
+        # Prepare up front so workers don't race on the conversion
+        store = SharedWeightStore(cache_dir)
+        for model_path in model_paths:
+            store.prepare(model_path)
+
+    ctx = mp.get_context('spawn')
+    done = ctx.Event()
+    processes = []
+    try:
+        for _ in range(workers):
+            ready = ctx.Event()
+            process = ctx.Process(target=_memory_worker, args=(model_paths, shared, cache_dir, ready, done),
+                                  daemon=True)
+            process.start()
+            processes.append((process, ready))
+        deadline = time.time() + 120
+        for process, ready in processes:
+            while not ready.wait(0.2):
+                if not process.is_alive():
+                    raise RuntimeError("Memory measurement worker exited during startup")
+                if time.time() > deadline:
+                    raise TimeoutError("Memory measurement worker did not start in time")
+        return [process_memory(process.pid) for process, _ in processes]
+    finally:
+        done.set()
+        for process, _ in processes:
+            process.join(10)
+
+
+def memory_report(model_paths, workers=3, cache_dir=None):
+    """Compare worker memory with private and shared model weights
+
+    Pages of the weight file are counted in every worker's Rss but only once
+    in the system, so the cost of an extra worker is its private memory.
+
+    Returns:
+        dict: Mean per-worker memory for 'private' and 'shared' weights and
+              'saved_per_worker', the private memory saved by each extra worker
+    """
+    report = {}
+    for shared in (False, True):
+        stats = measure_workers(model_paths, workers, shared, cache_dir)
+        report['shared' if shared else 'private'] = {
+            name: float(np.mean([s[name] for s in stats])) for name in stats[0]
+        }
+    report['saved_per_worker'] = report['private']['private'] - report['shared']['private']
+    return report
+
+
+def main():
+    from core.rtmpose_processor import RTMPoseProcessor
+    from core.model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Measure memory saved by sharing model weights between processes")
+    parser.add_argument('--mode', default='performance', help="Model mode to load (default: performance)")
+    parser.add_argument('--workers', type=int, default=3, help="Worker processes to start (default: 3)")
+    parser.add_argument('--clear', action='store_true', help="Delete prepared models first")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("Memory measurement needs Linux /proc/<pid>/smaps_rollup")
+        return
+
+    store = SharedWeightStore()
+    if args.clear:
+        store.clear()
+    registry = ModelRegistry(RTMPoseProcessor.get_models_dir())
+    model_paths = list(registry.resolve_mode(RTMPoseProcessor.MODEL_CONFIGS[args.mode]))
+
+    report = memory_report(model_paths, args.workers)
+    mb = 1024 * 1024
+    print(f"{args.workers} workers, {args.mode} mode ({', '.join(os.path.basename(p) for p in model_paths)})")
+    print(f"{'weights':>10} {'Rss':>10} {'Pss':>10} {'Private':>10}")
+    for name in ('private', 'shared'):
+        stats = report[name]
+        print(f"{name:>10} {stats['rss'] / mb:9.1f}M {stats['pss'] / mb:9.1f}M {stats['private'] / mb:9.1f}M")
+    print(f"Saved per extra worker: {report['saved_per_worker'] / mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import os
+import threading
+import cv2
+
+
+class ThreadPlanner:
+    """One thread budget for OpenCV, ONNX Runtime and the capture thread
+
+    OpenCV's pool, ONNX Runtime's intra-op pool and Qt all default to one
+    thread per core and thrash each other on small machines. The planner
+    splits the usable cores by profile: a few are reserved for capture and
+    the UI's own work, the rest go to inference. OpenCV only gets a thread
+    or two since its per-frame work (resize, cvtColor, warps) is small.
+
+    The UI thread also makes the inference calls, so it and every thread it
+    starts (ONNX Runtime workers, preloading) share the inference cores.
+    Only the capture thread is pinned elsewhere.
+    """
+
+    # reserve: cores kept out of inference from 4 cores up, inference: share
+    # of the remaining cores, opencv: OpenCV thread count
+    PROFILES = {
+        'balanced': {'reserve': 1, 'inference': 1.0, 'opencv': 1},
+        'latency': {'reserve': 1, 'inference': 1.0, 'opencv': 2},
+        'efficiency': {'reserve': 1, 'inference': 0.5, 'opencv': 1},
+        'default': None  # Leave every library at its own default
+    }
+
+    def __init__(self, profile='balanced', cores=None, affinity=False):
+        if profile not in self.PROFILES:
+            print(f"Unknown thread profile {profile}, using balanced")
+            profile = 'balanced'
+        self.profile = profile
+        self.cpus = sorted(cores if cores is not None else self.available_cpus())
+        self.affinity = affinity and hasattr(os, 'sched_setaffinity')
+        self.applied = {}  # thread role -> cpus actually pinned
+        self.plan = self.make_plan()
+
+    @staticmethod
+    def available_cpus():
+        """Get CPUs this process may run on"""
+        if hasattr(os, 'sched_getaffinity'):
+            return list(os.sched_getaffinity(0))
+        return list(range(os.cpu_count() or 1))
+
+    def make_plan(self):
+        """Work out thread counts and core sets for the profile"""
+        settings = self.PROFILES[self.profile]
+        if settings is None:
+            return {'opencv_threads': None, 'det_threads': None, 'pose_threads': None,
+                    'capture_cpus': None, 'inference_cpus': None}
+
+        count = len(self.cpus)
+        reserve = settings['reserve'] if count >= 4 else 0
+        inference_cpus = self.cpus[:count - reserve]
+        inference_threads = max(1, int(len(inference_cpus) * settings['inference']))
+        return {
+            'opencv_threads': min(settings['opencv'], count),
+            # Detector and pose run one after the other, each may use all inference cores
+            'det_threads': inference_threads,
+            'pose_threads': inference_threads,
+            'capture_cpus': self.cpus[count - reserve:] or self.cpus,
+            'inference_cpus': inference_cpus[:inference_threads]
+        }
+
+    def pipeline_threads(self):
+        """Split inference threads between concurrently running detector and pose stages"""
+        total = self.plan['det_threads'] or len(self.cpus)
+        det_threads = max(1, total // 2)
+        return det_threads, max(1, total - det_threads)
+
+    def apply(self):
+        """Apply the OpenCV thread count and pin the calling (UI) thread
+
+        Call at startup before any inference session is created so ONNX
+        Runtime's worker threads inherit the inference core set.
+        """
+        if self.plan['opencv_threads'] is not None:
+            cv2.setNumThreads(self.plan['opencv_threads'])
+        self.pin_current_thread('inference')
+        print(f"Thread plan ({self.profile}): {self.plan}")
+
+    def pin_current_thread(self, role):
+        """Pin the calling thread to the cores of a role ('inference' or 'capture')"""
+        cpus = self.plan.get(f'{role}_cpus')
+        if not self.affinity or not cpus:
+            return
+        try:
+            os.sched_setaffinity(0, cpus)
+            self.applied[role] = list(cpus)
+        except OSError as e:
+            print(f"Setting {role} thread affinity failed: {e}")
+
+    def diagnostics(self, pool=None):
+        """Get (setting, value) rows describing the applied configuration"""
+        rows = [
+            ("Profile", self.profile),
+            ("Usable CPUs", f"{len(self.cpus)} {self.cpus}"),
+            ("OpenCV threads", str(cv2.getNumThreads())),
+            ("Detector intra-op threads", str(self.plan['det_threads'] or "runtime default")),
+            ("Pose intra-op threads", str(self.plan['pose_threads'] or "runtime default")),
+            ("CPU affinity", "on" if self.affinity else "off")
+        ]
+        for role in ('inference', 'capture'):
+            rows.append((f"{role.capitalize()} cores", str(self.applied.get(role, "not pinned"))))
+        if pool is not None:
+            for name, threads in pool.session_threads():
+                rows.append((f"Session {name}", f"{threads or 'default'} intra-op threads"))
+        rows.append(("Live threads", str(threading.active_count())))
+        return rows
@@ -265,6 +265,12 @@ class Translations:
             "es": "Presión de rodillas",
             "hi": "नी प्रेस"
         },
+        "burpee": {
+            "zh": "波比跳",
+            "en": "Burpee",
+            "es": "Burpee",
+            "hi": "बर्पी"
+        },
         
         # Status bar messages
         "welcome": {
@@ -487,6 +493,96 @@ class Translations:
             "es": "Modelo de alto rendimiento",
             "hi": "उच्च प्रदर्शन मॉडल"
         },
+        "quantized": {
+            "zh": "量化模型 (INT8)",
+            "en": "Quantized (INT8)",
+            "es": "Modelo cuantizado (INT8)",
+            "hi": "क्वांटाइज़्ड मॉडल (INT8)"
+        },
+        "backend_type": {
+            "zh": "推理后端:",
+            "en": "Backend:",
+            "es": "Motor:",
+            "hi": "बैकएंड:"
+        },
+        "auto_backend": {
+            "zh": "自动 (最快)",
+            "en": "Auto (fastest)",
+            "es": "Automático (más rápido)",
+            "hi": "स्वचालित (सबसे तेज़)"
+        },
+        "pipelined_inference": {
+            "zh": "流水线推理",
+            "en": "Pipelined Inference",
+            "es": "Inferencia en cadena",
+            "hi": "पाइपलाइन अनुमान"
+        },
+        "inference_process": {
+            "zh": "独立推理进程",
+            "en": "Separate Inference Process",
+            "es": "Proceso de inferencia separado",
+            "hi": "अलग अनुमान प्रक्रिया"
+        },
+        "adaptive_quality": {
+            "zh": "自适应模型质量",
+            "en": "Adaptive Model Quality",
+            "es": "Calidad de modelo adaptativa",
+            "hi": "अनुकूली मॉडल गुणवत्ता"
+        },
+        "qos_switched": {
+            "zh": "推理延迟自适应，模型已切换为",
+            "en": "Adapted to inference latency, model changed to",
+            "es": "Adaptado a la latencia de inferencia, modelo cambiado a",
+            "hi": "अनुमान विलंबता के अनुसार, मॉडल बदला गया"
+        },
+        "dual_resolution": {
+            "zh": "全分辨率姿态裁剪",
+            "en": "Full-Resolution Pose Crops",
+            "es": "Recortes de pose en resolución completa",
+            "hi": "पूर्ण-रिज़ॉल्यूशन पोज़ क्रॉप"
+        },
+        "inference_decimation": {
+            "zh": "低功耗推理 (跳帧预测)",
+            "en": "Low-Power Inference (Frame Skipping)",
+            "es": "Inferencia de bajo consumo (salto de fotogramas)",
+            "hi": "कम-पावर अनुमान (फ़्रेम स्किपिंग)"
+        },
+        "keypoint_filter": {
+            "zh": "关键点平滑 (One-Euro 滤波)",
+            "en": "Keypoint Smoothing (One-Euro Filter)",
+            "es": "Suavizado de puntos clave (filtro One-Euro)",
+            "hi": "कीपॉइंट स्मूदिंग (वन-यूरो फ़िल्टर)"
+        },
+        "fixed_zone": {
+            "zh": "固定区域模式 (跳过人体检测)",
+            "en": "Fixed Zone Mode (Skip Detector)",
+            "es": "Modo de zona fija (sin detector)",
+            "hi": "स्थिर क्षेत्र मोड (डिटेक्टर छोड़ें)"
+        },
+        "recalibrate_zone": {
+            "zh": "重新校准区域",
+            "en": "Recalibrate Zone",
+            "es": "Recalibrar zona",
+            "hi": "क्षेत्र फिर से कैलिब्रेट करें"
+        },
+        "model_files_missing": {
+            "zh": "缺少模型文件",
+            "en": "Model Files Missing",
+            "es": "Faltan archivos de modelo",
+            "hi": "मॉडल फ़ाइलें नहीं मिलीं"
+        },
+        "thread_diagnostics": {
+            "zh": "线程配置诊断",
+            "en": "Thread Configuration",
+            "es": "Configuración de hilos",
+            "hi": "थ्रेड कॉन्फ़िगरेशन"
+        },
+        "fused_preprocessing": {
+            "zh": "融合预处理 (直接读取原始帧)",
+            "en": "Fused Preprocessing (Raw Frames)",
+            "es": "Preprocesamiento fusionado (fotogramas originales)",
+            "hi": "संयुक्त प्रीप्रोसेसिंग (मूल फ़्रेम)"
+        },
         "changing_model": {
             "zh": "正在切换模型到",
             "en": "Changing model to",
@@ -505,6 +601,12 @@ class Translations:
             "es": "Cambio de modelo fallido",
             "hi": "मॉडल परिवर्तन विफल"
         },
+        "model_loading": {
+            "zh": "正在加载模型",
+            "en": "Loading model",
+            "es": "Cargando modelo",
+            "hi": "मॉडल लोड हो रहा है"
+        },
         "severe_error": {
             "zh": "发生严重错误，请重启应用",
             "en": "Severe error occurred, please restart application",
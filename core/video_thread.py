@@ -21,6 +21,10 @@ class VideoThread(QThread):
         self.fps = 30  # Default frame rate
         self.loop_video = False  # Control whether to loop video playback
         self.video_ended = False  # Mark if video has ended
+        self.full_resolution = False  # Emit frames at capture resolution for dual-resolution pose
+        self.capture_size = (1920, 1080)  # Camera capture size when full_resolution is on
+        self.raw_frames = False  # Emit frames as captured, the pose processor reads them directly
+        self.thread_planner = None  # Pins this thread to the capture cores when set
     
     def set_camera(self, camera_id):
         """Switch camera"""
@@ -41,6 +45,19 @@ class VideoThread(QThread):
         """Set resolution"""
         self.width = width
         self.height = height
+    
+    def set_full_resolution(self, enabled, capture_size=None):
+        """Emit full-resolution frames instead of downsampling them
+        
+        Takes effect when the video source is (re)opened.
+        """
+        self.full_resolution = enabled
+        if capture_size is not None:
+            self.capture_size = tuple(capture_size)
+        
+    def set_raw_frames(self, enabled):
+        """Emit frames without downsampling, for fused preprocessing"""
+        self.raw_frames = enabled
         
     def set_video_file(self, file_path, loop=False):
         """Set video file path
@@ -124,6 +141,9 @@ class VideoThread(QThread):
     
     def run(self):
         """Main thread loop"""
+        if self.thread_planner is not None:
+            self.thread_planner.pin_current_thread('capture')
+        
         # Open video source based on mode (camera or file)
         if self.is_camera:
             self.cap = cv2.VideoCapture(self.camera_id)
@@ -132,8 +152,9 @@ class VideoThread(QThread):
                 return
                 
             # Set resolution and buffer (only applicable to camera)
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            capture_width, capture_height = self.capture_size if self.full_resolution else (self.width, self.height)
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, capture_width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, capture_height)
             self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
             
             # Camera mode defaults to rotation (default to portrait mode)
@@ -173,8 +194,10 @@ class VideoThread(QThread):
         while self._run_flag:
             ret, frame = self.cap.read()
             if ret:
-                # Downsample to smaller size for processing
-                frame = cv2.resize(frame, (self.width, self.height))
+                # Downsample to smaller size for processing (the pose processor
+                # downsamples full-resolution and raw frames itself and keeps the original for the models)
+                if not (self.full_resolution or self.raw_frames):
+                    frame = cv2.resize(frame, (self.width, self.height))
                 
                 # If rotation is needed (portrait mode)
                 if self.rotate:
@@ -3,6 +3,7 @@ import json
 import datetime
 import sys
 from collections import defaultdict
+from core.exercise_definitions import ExerciseDefinitions
 
 class WorkoutTracker:
     """Fitness record tracker, responsible for storing and managing daily exercise data"""
@@ -66,26 +67,20 @@ class WorkoutTracker:
         if os.path.exists(goals_file):
             try:
                 with open(goals_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    goals = json.load(f)
             except (json.JSONDecodeError, IOError):
                 return self._create_default_goals()
+            # Exercises defined after the goals were saved start at their default goal
+            for exercise, goal in ExerciseDefinitions.default().default_goals().items():
+                goals.setdefault("daily", {}).setdefault(exercise, goal)
+            return goals
         else:
             return self._create_default_goals()
     
     def _create_default_goals(self):
         """Create default goal data structure"""
         return {
-            "daily": {
-                "squat": 20,
-                "pushup": 30,
-                "situp": 30,
-                "bicep_curl": 15,
-                "lateral_raise": 15,
-                "overhead_press": 15,
-                "leg_raise": 15,
-                "knee_raise": 15,
-                "knee_press": 15
-            },
+            "daily": ExerciseDefinitions.default().default_goals(),
             "weekly": {
                 "total_workouts": 5  # Planned workout days per week
             }
@@ -1,111 +1,207 @@
 import numpy as np
 from collections import deque
+from bisect import bisect_left, bisect_right, insort
+import math
 import time
+from core.exercise_definitions import ExerciseDefinitions
+
+
+class JointAngleKernel:
+    """Every joint angle used by a set of exercise configs in one vectorized pass
+    
+    The (first, middle, last) keypoint triplets of all configs are collected
+    once into index arrays. A call gathers all triplets from the keypoint
+    array at once and returns float32 angles in degrees with a validity mask,
+    for one person (17, 2) or many (N, 17, 2). Triplets ending in
+    ExerciseDefinitions.UP measure a segment's tilt from vertical against a
+    unit vector pointing up (image y grows downwards).
+    """
+    
+    def __init__(self, exercise_configs):
+        self.triplets = []  # Unique (first, middle, last) keypoint indices
+        self.measure_indices = {}  # exercise -> (M, 2) angle indices, left and right of each measure
+        self.exercise_indices = {}  # exercise -> (left angle index, right angle index) of the shown angle
+        for exercise, config in exercise_configs.items():
+            measures = config.get('measures') or {'angle': config['keypoints']}
+            slots = []
+            for sides in measures.values():
+                pair = []
+                for side in ('left', 'right'):
+                    triplet = tuple(sides[side])
+                    if triplet not in self.triplets:
+                        self.triplets.append(triplet)
+                    pair.append(self.triplets.index(triplet))
+                slots.append(pair)
+            self.measure_indices[exercise] = np.array(slots, dtype=np.intp)
+            self.exercise_indices[exercise] = tuple(slots[0])
+        
+        self.upright = np.array([t[2] == ExerciseDefinitions.UP for t in self.triplets], dtype=bool)  # (A,)
+        # Tilt triplets gather their middle point in place of UP and replace the vector afterwards
+        self.indices = np.array([t[:2] + (t[1] if up else t[2],) for t, up in zip(self.triplets, self.upright)],
+                                dtype=np.intp).reshape(-1, 3)  # (A, 3)
+    
+    def __call__(self, keypoints, subset=None):
+        """Compute all angles, or only the angle indices in subset
+        
+        Returns:
+            tuple: (angles (..., A) float32 degrees, valid (..., A) bool), invalid
+                   where a point is NaN or (0, 0) or a limb has zero length
+        """
+        indices = self.indices if subset is None else self.indices[list(subset)]
+        upright = self.upright if subset is None else self.upright[list(subset)]
+        points = np.asarray(keypoints, dtype=np.float32)[..., indices, :]  # (..., A, 3, 2)
+        x, y = points[..., 0], points[..., 1]
+        ba_x, ba_y = x[..., 0] - x[..., 1], y[..., 0] - y[..., 1]
+        bc_x, bc_y = x[..., 2] - x[..., 1], y[..., 2] - y[..., 1]
+        if upright.any():
+            bc_x = np.where(upright, np.float32(0), bc_x)
+            bc_y = np.where(upright, np.float32(-1), bc_y)
+        dot = ba_x * bc_x + ba_y * bc_y
+        cross = ba_x * bc_y - ba_y * bc_x
+        
+        # NaN coordinates propagate into dot, elementwise tests instead of reductions over tiny axes
+        origin = (x == 0) & (y == 0)
+        valid = ~(np.isnan(dot) | origin[..., 0] | origin[..., 1] | origin[..., 2] |
+                  ((ba_x == 0) & (ba_y == 0)) | ((bc_x == 0) & (bc_y == 0)))
+        # atan2 stays accurate in float32 near 0 and 180 degrees, unlike arccos
+        angles = np.degrees(np.arctan2(np.abs(cross), dot))
+        angles[~valid] = 0
+        return angles, valid
+
+
+class StreamingAngleSmoother:
+    """Outlier-gated mean over a sliding window of angle samples, updated in place
+    
+    Same result as taking the median of the window, dropping samples more
+    than 2 standard deviations away from it and averaging the rest, without
+    building arrays per sample. Samples live in a preallocated ring buffer and
+    a copy of the window is kept sorted, so the median is an index lookup and
+    each update touches at most `window` floats. Samples older than span
+    seconds leave the window early, but the newest min_count always stay so
+    outliers are still rejected at low frame rates.
+    """
+    
+    def __init__(self, window=5, span=None, min_count=3):
+        self.window = window
+        self.span = span
+        self.min_count = min_count
+        self.values = [0.0] * window  # Ring buffer, oldest at self.start
+        self.times = [0.0] * window
+        self.sorted = []  # Window values in ascending order
+        self.clear()
+    
+    def clear(self):
+        self.start = 0
+        self.count = 0
+        self.sorted.clear()
+    
+    def __len__(self):
+        return self.count
+    
+    def _drop_oldest(self):
+        del self.sorted[bisect_left(self.sorted, self.values[self.start])]
+        self.start = (self.start + 1) % self.window
+        self.count -= 1
+    
+    def update(self, angle, now):
+        """Add a sample taken at time now and get the smoothed angle"""
+        if self.count == self.window:
+            self._drop_oldest()
+        slot = (self.start + self.count) % self.window
+        self.values[slot] = angle
+        self.times[slot] = now
+        self.count += 1
+        insort(self.sorted, angle)
+        
+        if self.span is not None:
+            while self.count > self.min_count and now - self.times[self.start] > self.span:
+                self._drop_oldest()
+        
+        n = self.count
+        if n < 3:
+            return angle
+        
+        values = self.sorted
+        half = n // 2
+        median = values[half] if n % 2 else (values[half - 1] + values[half]) / 2
+        mean = math.fsum(values) / n
+        variance = 0.0
+        for value in values:
+            variance += (value - mean) * (value - mean)
+        limit = 2 * math.sqrt(variance / n)
+        
+        total = 0.0
+        kept = 0
+        for value in values:
+            if abs(value - median) <= limit:
+                total += value
+                kept += 1
+        return total / kept if kept else angle
+
 
 class ExerciseCounter:
     """Basic exercise counter with angle-based detection"""
     
-    def __init__(self, smoothing_window=5):
+    # Samples further apart than this (s) start a new smoothing window and trajectory,
+    # a turning point isn't recovered across a tracking gap
+    MAX_SAMPLE_GAP = 0.25
+    RECOVERY_MARGIN = 5.0  # Degrees a recovered turning point must pass the threshold by
+    
+    def __init__(self, smoothing_window=5, definitions=None):
         # Core counting variables
         self.counter = 0
         self.stage = None
         
         # Basic features
         self.smoothing_window = smoothing_window
-        self.angle_history = deque(maxlen=smoothing_window)
+        # Samples older than 0.15 s leave the window (low fps lag), but 4 always stay to average out jitter
+        self.smoother = StreamingAngleSmoother(smoothing_window, span=0.15, min_count=4)
+        self.trajectory = deque(maxlen=3)  # Last (time, smoothed angle) samples for extremum recovery
         self.last_count_time = 0
-        self.min_rep_time = 0.5  # Minimum time between reps (seconds)
+        self.min_rep_time = 0.5  # Minimum time between reps (seconds), set per exercise while counting
+        self.clock = time.time  # Time source, offline analysis uses video timestamps
         
         # Exercise configurations
+        self.definitions = definitions or ExerciseDefinitions.default()
         self.exercise_configs = self.get_exercise_configs()
+        self.angle_kernel = JointAngleKernel(self.exercise_configs)
+        
+        # Dispatch table: exercise -> counting function of its mode
+        handlers = {
+            'bilateral': self.count_bilateral,
+            'unilateral': self.count_unilateral,
+            'phases': self.count_phases
+        }
+        self.dispatch = {exercise: handlers[config['mode']] for exercise, config in self.exercise_configs.items()}
         
         # Independent counting for leg exercises
-        self.leg_exercises = ['leg_raise', 'knee_raise', 'knee_press']
+        self.leg_exercises = [e for e, c in self.exercise_configs.items() if c['mode'] == 'unilateral']
         self.leg_stages = {'left': None, 'right': None}  # Track each leg's stage
+        
+        # Multi-phase exercises: last sequence step reached and when
+        self.phase = -1
+        self.phase_time = 0
     
     def get_exercise_configs(self):
-        """Exercise-specific angle thresholds"""
-        return {
-            'squat': {
-                'down_angle': 110,
-                'up_angle': 160,
-                'keypoints': {
-                    'left': [11, 13, 15],  # hip, knee, ankle
-                    'right': [12, 14, 16]  # hip, knee, ankle
-                }
-            },
-            'pushup': {
-                'down_angle': 110,
-                'up_angle': 160,
-                'keypoints': {
-                    'left': [5, 7, 9],    # shoulder, elbow, wrist
-                    'right': [6, 8, 10]   # shoulder, elbow, wrist
-                }
-            },
-            'situp': {
-                'down_angle': 145,
-                'up_angle': 170,
-                'keypoints': {
-                    'left': [5, 11, 15],  # shoulder, hip, ankle
-                    'right': [6, 12, 16]  # shoulder, hip, ankle
-                }
-            },
-            'bicep_curl': {
-                'down_angle': 160,
-                'up_angle': 60,
-                'keypoints': {
-                    'left': [5, 7, 9],    # shoulder, elbow, wrist
-                    'right': [6, 8, 10]   # shoulder, elbow, wrist
-                }
-            },
-            'lateral_raise': {
-                'down_angle': 30,
-                'up_angle': 80,
-                'keypoints': {
-                    'left': [11, 5, 7],    # hip, shoulder, elbow
-                    'right': [12, 6, 8]   # hip, shoulder, elbow
-                }
-            },
-            'overhead_press': {
-                'down_angle': 30,
-                'up_angle': 150,
-                'keypoints': {
-                    'left': [11, 5, 7],    # hip, shoulder, elbow
-                    'right': [12, 6, 8]   # hip, shoulder, elbow
-                }
-            },
-            'leg_raise': {
-                'down_angle': 130,
-                'up_angle': 160,
-                'keypoints': {
-                    'left': [5, 11, 13],  # shoulder, hip, knee
-                    'right': [6, 12, 14]  # shoulder, hip, knee
-                }
-            },
-            'knee_raise': {
-                'down_angle': 110,
-                'up_angle': 160,
-                'keypoints': {
-                    'left': [11, 13, 15],  # hip, knee, ankle
-                    'right': [12, 14, 16]  # hip, knee, ankle
-                }
-            },
-            'knee_press': {
-                'down_angle': 110,
-                'up_angle': 160,
-                'keypoints': {
-                    'left': [11, 13, 15],  # hip, knee, ankle
-                    'right': [12, 14, 16]  # hip, knee, ankle
-                }
-            }
-        }
+        """Exercise-specific angle thresholds, compiled from the exercise definitions"""
+        return self.definitions.configs
     
     def reset_counter(self):
         """Reset counter to initial state"""
         self.counter = 0
         self.stage = None
-        self.angle_history.clear()
+        self.clear_history()
         self.leg_stages = {'left': None, 'right': None}
+        self.phase = -1
+    
+    def clear_history(self):
+        """Forget the smoothing window and trajectory, e.g. when tracking was lost"""
+        self.smoother.clear()
+        self.trajectory.clear()
+    
+    def angle_table(self, keypoints):
+        """All joint angles of all exercises for one frame, see JointAngleKernel"""
+        return self.angle_kernel(keypoints)
     
     def calculate_angle(self, a, b, c):
         """Calculate angle between three points"""
@@ -145,86 +241,162 @@ class ExerciseCounter:
         if angle is None:
             return None
             
-        self.angle_history.append(angle)
-        
-        if len(self.angle_history) < 3:
-            return angle
-            
-        # Use median filter to remove outliers, then average
-        angles_array = np.array(list(self.angle_history))
-        median_angle = np.median(angles_array)
-        
-        # Remove outliers (angles > 2 std devs from median)
-        std_dev = np.std(angles_array)
-        filtered_angles = angles_array[np.abs(angles_array - median_angle) <= 2 * std_dev]
-        
-        return np.mean(filtered_angles) if len(filtered_angles) > 0 else angle
+        # Median filter removes outliers (> 2 std devs from median), then average
+        return self.smoother.update(float(angle), self.clock())
     
-    def check_rep_timing(self):
+    def check_rep_timing(self, current_time=None):
         """Prevent counting reps too quickly"""
-        current_time = time.time()
+        if current_time is None:
+            current_time = self.clock()
         if current_time - self.last_count_time < self.min_rep_time:
             return False
         return True
     
-    def count_exercise(self, keypoints, exercise_type):
-        """Generic exercise counting function"""
+    def crossing_time(self, threshold):
+        """Time the angle crossed threshold between the last two samples, linearly interpolated"""
+        t1, a1 = self.trajectory[-1]
+        if len(self.trajectory) < 2:
+            return t1
+        t0, a0 = self.trajectory[-2]
+        if (a0 - threshold) * (a1 - threshold) > 0 or a0 == a1:
+            return t1
+        return t0 + (t1 - t0) * (a0 - threshold) / (a0 - a1)
+    
+    @staticmethod
+    def parabola_vertex(samples):
+        """Vertex (time, angle) of the parabola through three (time, angle) samples"""
+        (t0, a0), (t1, a1), (t2, a2) = samples
+        d0, d2 = t0 - t1, t2 - t1
+        denominator = d0 * d2 * (d0 - d2)
+        if denominator == 0:
+            return t1, a1
+        # a = a1 + b*d + c*d^2 around t1
+        c = (d2 * (a0 - a1) - d0 * (a2 - a1)) / denominator
+        b = (d0 * d0 * (a2 - a1) - d2 * d2 * (a0 - a1)) / denominator
+        if c == 0:
+            return t1, a1
+        d = -b / (2 * c)
+        return t1 + d, a1 + b * d + c * d * d
+    
+    def recover_extremum(self, up_threshold, down_threshold):
+        """Recover a peak or valley that crossed a threshold between samples
+        
+        At low frame rates a fast rep's turning point can fall between two
+        samples that both stay short of the threshold. When the middle of the
+        last three samples is a turning point, the parabola through them
+        estimates the real extreme angle and when it was reached. The estimate
+        has to clear the threshold by RECOVERY_MARGIN, so keypoint jitter on
+        reps that stop just short of it isn't mistaken for a missed turn.
+        """
+        if len(self.trajectory) < 3:
+            return
+        (_, a0), (_, a1), (_, a2) = self.trajectory
+        # Angle that counts a rep, the lower of the two thresholds as in count_exercise
+        count_threshold = min(up_threshold, down_threshold)
+        
+        if a1 < a0 and a1 <= a2 and a1 >= count_threshold and self.stage == "up":
+            vertex_time, vertex_angle = self.parabola_vertex(self.trajectory)
+            if vertex_angle < count_threshold - self.RECOVERY_MARGIN and self.check_rep_timing(vertex_time):
+                self.stage = "down"
+                self.counter += 1
+                self.last_count_time = vertex_time
+        elif a1 > a0 and a1 >= a2 and a1 <= up_threshold and self.stage != "up":
+            _, vertex_angle = self.parabola_vertex(self.trajectory)
+            if vertex_angle > up_threshold + self.RECOVERY_MARGIN:
+                self.stage = "up"
+    
+    def count_exercise(self, keypoints, exercise_type, angles=None):
+        """Generic exercise counting function
+        
+        Args:
+            keypoints: (17, 2) keypoints of one person
+            exercise_type: Key of exercise_configs
+            angles: Precomputed angle_table(keypoints), shared by several exercises
+        
+        Returns:
+            float: Angle to show, None if the exercise's joints aren't visible
+        """
         try:
-            if exercise_type not in self.exercise_configs:
+            handler = self.dispatch.get(exercise_type)
+            if handler is None:
                 print(f"Unknown exercise type: {exercise_type}")
                 return None
                 
             config = self.exercise_configs[exercise_type]
-            kp = config['keypoints']
-            
-            # Calculate angles for both sides
-            left_angle = self.calculate_angle(
-                keypoints[kp['left'][0]],  # first point
-                keypoints[kp['left'][1]],  # middle point
-                keypoints[kp['left'][2]]   # last point
-            )
-            
-            right_angle = self.calculate_angle(
-                keypoints[kp['right'][0]],  # first point
-                keypoints[kp['right'][1]],  # middle point
-                keypoints[kp['right'][2]]   # last point
-            )
-            
-            if left_angle is None or right_angle is None:
-                return None
-            
-            # Handle leg exercises differently
-            if exercise_type in self.leg_exercises:
-                return self.count_leg_exercise(left_angle, right_angle, config)
+            self.min_rep_time = config['min_rep_time']
             
-            # For other exercises, use average angle
-            avg_angle = (left_angle + right_angle) / 2
-            smoothed_angle = self.smooth_angle(avg_angle)
-            
-            if smoothed_angle is None:
+            # Left and right angle of every measure from the frame's angle table
+            angles, valid = angles if angles is not None else self.angle_table(keypoints)
+            slots = self.angle_kernel.measure_indices[exercise_type]
+            if not valid[slots].all():
+                self.clear_history()
                 return None
-            
-            # Get thresholds
-            up_threshold = config['up_angle']
-            down_threshold = config['down_angle']
-            
-            # Counting logic with timing check
-            if smoothed_angle > up_threshold:
-                self.stage = "up"
-            elif (smoothed_angle < down_threshold and 
-                  self.stage == "up" and 
-                  self.check_rep_timing()):
-                
-                self.stage = "down"
-                self.counter += 1
-                self.last_count_time = time.time()
-                
-            return smoothed_angle
+            return handler(angles[slots].tolist(), config)
             
         except Exception as e:
             print(f"Exercise counting error: {e}")
             return None
     
+    def count_bilateral(self, sides, config):
+        """Count on the smoothed mean angle of both sides"""
+        left_angle, right_angle = sides[0]
+        avg_angle = (left_angle + right_angle) / 2
+        if self.trajectory and self.clock() - self.trajectory[-1][0] > self.MAX_SAMPLE_GAP:
+            self.clear_history()
+        smoothed_angle = self.smooth_angle(avg_angle)
+        
+        if smoothed_angle is None:
+            return None
+        
+        # Get thresholds
+        up_threshold = config['up_angle']
+        down_threshold = config['down_angle']
+        
+        # Turning points missed between the previous samples first
+        self.trajectory.append((self.clock(), smoothed_angle))
+        self.recover_extremum(up_threshold, down_threshold)
+        
+        # Counting logic with timing check, the rep is timed where the threshold was crossed
+        if smoothed_angle > up_threshold:
+            self.stage = "up"
+        elif (smoothed_angle < down_threshold and 
+              self.stage == "up" and 
+              self.check_rep_timing()):
+            
+            self.stage = "down"
+            self.counter += 1
+            self.last_count_time = self.crossing_time(down_threshold)
+            
+        return smoothed_angle
+    
+    def count_unilateral(self, sides, config):
+        """Count each side on its own"""
+        left_angle, right_angle = sides[0]
+        return self.count_leg_exercise(left_angle, right_angle, config)
+    
+    def count_phases(self, sides, config):
+        """Step through a phase sequence, one rep per completed sequence
+        
+        Only the next step's conditions are checked, looked up in the
+        compiled transition table by the current phase.
+        """
+        values = [(left + right) / 2 for left, right in sides]
+        now = self.clock()
+        if self.phase >= 0 and now - self.phase_time > config['max_phase_time']:
+            # Stalled mid-rep, start over
+            self.phase = -1
+            self.stage = None
+        
+        conditions, stage, counts, next_phase = config['transitions'][self.phase + 1]
+        if all(above < values[slot] < below for slot, above, below in conditions):
+            if counts and self.check_rep_timing(now):
+                self.counter += 1
+                self.last_count_time = now
+            self.phase = next_phase
+            self.phase_time = now
+            self.stage = stage
+        return values[0]
+    
     def count_leg_exercise(self, left_angle, right_angle, config):
         """Count leg exercises with complete up-down cycles"""
         up_threshold = config['up_angle']
@@ -238,7 +410,7 @@ class ExerciseCounter:
             elif (left_angle < down_threshold and 
                   self.leg_stages['left'] == "up"):
                 self.counter += 1
-                self.last_count_time = time.time()
+                self.last_count_time = self.clock()
                 self.leg_stages['left'] = "down"
             
             # Right leg
@@ -247,45 +419,320 @@ class ExerciseCounter:
             elif (right_angle < down_threshold and 
                   self.leg_stages['right'] == "up"):
                 self.counter += 1
-                self.last_count_time = time.time()
+                self.last_count_time = self.clock()
                 self.leg_stages['right'] = "down"
         
         # Return average angle for display purposes
         return (left_angle + right_angle) / 2
     
-    # Wrapper functions for different exercises
-    def count_squat(self, keypoints):
-        """Count squat repetitions"""
-        return self.count_exercise(keypoints, 'squat')
-    
-    def count_pushup(self, keypoints):
-        """Count pushup repetitions"""
-        return self.count_exercise(keypoints, 'pushup')
+    # Batch counting over recorded keypoint series
+    STAGE_CODES = {None: 0, "up": 1, "down": 2}
     
-    def count_situp(self, keypoints):
-        """Count situp repetitions"""
-        return self.count_exercise(keypoints, 'situp')
+    def sample_segments(self, frames, times):
+        """Segment number of every valid sample, a new segment starts where clear_history runs
+        
+        That is after frames without the joints and after gaps over MAX_SAMPLE_GAP.
+        """
+        breaks = (np.diff(frames) > 1) | (np.diff(times) > self.MAX_SAMPLE_GAP)
+        return np.concatenate(([0], np.cumsum(breaks)))
     
-    def count_bicep_curl(self, keypoints):
-        """Count bicep curl repetitions"""
-        return self.count_exercise(keypoints, 'bicep_curl')
+    def smooth_series(self, angles, times, segments=None):
+        """smooth_angle over a whole series of valid angles at once"""
+        window = self.smoother.window
+        count = len(angles)
+        index = np.arange(count)[:, None] - (window - 1) + np.arange(window)
+        in_window = index >= 0
+        index = np.maximum(index, 0)
+        if segments is not None:
+            in_window &= segments[index] == segments[:, None]
+        if self.smoother.span is not None:
+            # The newest min_count samples stay regardless of age
+            newest = np.arange(window) >= window - self.smoother.min_count
+            in_window &= (times[:, None] - times[index] <= self.smoother.span) | newest
+        
+        values = np.where(in_window, angles[index], np.nan)
+        values.sort(axis=1)  # NaN last
+        n = in_window.sum(1)
+        rows = np.arange(count)
+        half = n // 2
+        median = np.where(n % 2 == 1, values[rows, half],
+                          (values[rows, np.maximum(half - 1, 0)] + values[rows, half]) / 2)
+        mean = np.nansum(values, 1) / n
+        std = np.sqrt(np.nansum((values - mean[:, None]) ** 2, 1) / n)
+        keep = np.abs(values - median[:, None]) <= 2 * std[:, None]  # NaN compares False
+        kept = keep.sum(1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            smoothed = np.where(keep, values, 0).sum(1) / kept
+        return np.where((n < 3) | (kept == 0), angles, smoothed)
     
-    def count_lateral_raise(self, keypoints):
-        """Count lateral raise repetitions"""
-        return self.count_exercise(keypoints, 'lateral_raise')
+    @staticmethod
+    def parabola_vertices(times, angles):
+        """parabola_vertex of every three consecutive samples, for the middle samples"""
+        t0, t1, t2 = times[:-2], times[1:-1], times[2:]
+        a0, a1, a2 = angles[:-2], angles[1:-1], angles[2:]
+        d0, d2 = t0 - t1, t2 - t1
+        denominator = d0 * d2 * (d0 - d2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            c = (d2 * (a0 - a1) - d0 * (a2 - a1)) / denominator
+            b = (d0 * d0 * (a2 - a1) - d2 * d2 * (a0 - a1)) / denominator
+            d = -b / (2 * c)
+        flat = (denominator == 0) | (c == 0)
+        d = np.where(flat, 0.0, d)
+        return t1 + d, np.where(flat, a1, a1 + b * d + c * d * d)
     
-    def count_overhead_press(self, keypoints):
-        """Count overhead press repetitions"""
-        return self.count_exercise(keypoints, 'overhead_press')
+    def count_batch(self, keypoints, timestamps, exercise_type):
+        """Count repetitions in a recorded keypoint series without per-frame calls
+        
+        Gives the same counts as feeding every frame to count_exercise of a
+        fresh counter with the clock at the frame timestamps, including the
+        smoothing, turning point recovery and minimum rep time. Angles,
+        smoothing and turning points are computed for all frames at once and
+        the hysteresis is stepped once per rep, not per frame. The counter
+        itself is left untouched.
+        
+        Args:
+            keypoints: (T, 17, 2) first person's keypoints, low-confidence points at (0, 0)
+            timestamps: (T,) frame times in seconds
+            exercise_type: Key of exercise_configs
+        
+        Returns:
+            dict: reps, rep_times (R,), counts (T,) running count after every
+                  frame, stages (T,) or (T, 2) per leg as STAGE_CODES, angles (T,)
+                  as count_exercise returns them (NaN where not computed)
+        """
+        config = self.exercise_configs[exercise_type]
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        frame_count = len(timestamps)
+        # Only the angles this exercise reads, left and right of each measure
+        table, valid = self.angle_kernel(keypoints, self.angle_kernel.measure_indices[exercise_type].ravel())
+        table = table.astype(np.float64)
+        left, right = table[:, 0::2], table[:, 1::2]
+        frames = np.flatnonzero(valid.all(axis=1))
+        times = timestamps[frames]
+        
+        if config['mode'] == 'phases':
+            values = (left[frames] + right[frames]) / 2
+            count_frames, rep_times, stages = self._count_phases_batch(values, times, config)
+            angles = values[:, 0]
+        elif config['mode'] == 'unilateral':
+            left, right = left[:, 0], right[:, 0]
+            count_frames, rep_times, stages = self._count_legs_batch(left[frames], right[frames], times, config)
+            angles = (left[frames] + right[frames]) / 2
+        else:
+            left, right = left[:, 0], right[:, 0]
+            segments = self.sample_segments(frames, times)
+            angles = self.smooth_series((left[frames] + right[frames]) / 2, times, segments)
+            count_frames, rep_times, stages = self._count_stages_batch(angles, times, segments, config)
+        
+        # Back to all frames: counts and stages carry over frames without an angle
+        counts = np.zeros(frame_count, dtype=np.int64)
+        np.add.at(counts, frames[count_frames], 1)
+        last_valid = np.searchsorted(frames, np.arange(frame_count), side='right') - 1
+        stage_codes = np.where((last_valid >= 0)[:, None] if stages.ndim > 1 else last_valid >= 0,
+                               stages[np.maximum(last_valid, 0)], 0).astype(np.int8)
+        all_angles = np.full(frame_count, np.nan)
+        all_angles[frames] = angles
+        return {
+            'reps': len(rep_times),
+            'rep_times': np.asarray(rep_times, dtype=np.float64),
+            'counts': np.cumsum(counts),
+            'stages': stage_codes,
+            'angles': all_angles
+        }
     
-    def count_leg_raise(self, keypoints):
-        """Count leg raise repetitions"""
-        return self.count_exercise(keypoints, 'leg_raise')
+    def _count_stages_batch(self, angles, times, segments, config):
+        """Hysteresis of count_exercise over smoothed angles of valid samples
+        
+        Events are ordered by position 2 * sample for turning points found when
+        a sample arrives and 2 * sample + 1 for its own threshold checks.
+        Crossing times and turning points only use samples of one segment.
+        """
+        up_threshold = config['up_angle']
+        down_threshold = config['down_angle']
+        count_threshold = min(up_threshold, down_threshold)
+        count = len(angles)
+        
+        above = angles > up_threshold
+        positions = [2 * np.flatnonzero(above) + 1]
+        candidates = np.flatnonzero(~above & (angles < down_threshold))
+        candidate_positions = [2 * candidates + 1]
+        check_times = [times[candidates]]
+        # Direct counts are timed where the threshold was crossed
+        previous = np.maximum(candidates - 1, 0)
+        a0, a1 = angles[previous], angles[candidates]
+        crossed = ((candidates > 0) & (segments[previous] == segments[candidates]) &
+                   ((a0 - down_threshold) * (a1 - down_threshold) <= 0) & (a0 != a1))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            crossing = times[previous] + (times[candidates] - times[previous]) * (a0 - down_threshold) / (a0 - a1)
+        set_times = [np.where(crossed, crossing, times[candidates])]
+        
+        if count >= 3:
+            a0, a1, a2 = angles[:-2], angles[1:-1], angles[2:]
+            vertex_times, vertex_angles = self.parabola_vertices(times, angles)
+            arrival = np.arange(2, count)
+            margin = self.RECOVERY_MARGIN
+            same = segments[:-2] == segments[2:]
+            peaks = same & (a1 > a0) & (a1 >= a2) & (a1 <= up_threshold) & (vertex_angles > up_threshold + margin)
+            positions.append(2 * arrival[peaks])
+            valleys = (same & (a1 < a0) & (a1 <= a2) & (a1 >= count_threshold) &
+                       (vertex_angles < count_threshold - margin))
+            candidate_positions.append(2 * arrival[valleys])
+            check_times.append(vertex_times[valleys])
+            set_times.append(vertex_times[valleys])
+        
+        # Lists for the per-rep stepping, bisect on lists beats scalar numpy calls
+        up_positions = np.sort(np.concatenate(positions)).tolist()
+        candidate_positions = np.concatenate(candidate_positions)
+        order = np.argsort(candidate_positions, kind='stable')
+        check_times = np.concatenate(check_times)[order].tolist()
+        set_times = np.concatenate(set_times)[order].tolist()
+        candidate_positions = candidate_positions[order].tolist()
+        
+        # One step per rep: the first up event after the last count, then the
+        # first candidate after it that respects the minimum rep time
+        stage_events = []  # (position, stage code)
+        count_positions = []
+        rep_times = []
+        last_count_time = 0.0
+        last_position = -1
+        while True:
+            k = bisect_right(up_positions, last_position)
+            if k == len(up_positions):
+                break
+            stage_events.append((up_positions[k], self.STAGE_CODES["up"]))
+            j = bisect_right(candidate_positions, up_positions[k])
+            earliest = last_count_time + config['min_rep_time']
+            while j < len(candidate_positions) and check_times[j] < earliest:
+                j += 1
+            if j == len(candidate_positions):
+                break
+            last_position = candidate_positions[j]
+            last_count_time = set_times[j]
+            count_positions.append(last_position)
+            rep_times.append(last_count_time)
+            stage_events.append((last_position, self.STAGE_CODES["down"]))
+        
+        # Stage after each sample: latest event at or before its own checks
+        event_positions = np.array([p for p, _ in stage_events], dtype=np.int64)
+        event_codes = np.array([0] + [c for _, c in stage_events], dtype=np.int8)
+        stages = event_codes[np.searchsorted(event_positions, 2 * np.arange(count) + 1, side='right')]
+        return np.array(count_positions, dtype=np.int64) // 2, rep_times, stages
     
-    def count_knee_raise(self, keypoints):
-        """Count knee raise repetitions"""
-        return self.count_exercise(keypoints, 'knee_raise')
+    def _count_legs_batch(self, left, right, times, config):
+        """count_leg_exercise over raw angles of valid samples
+        
+        Each leg counts on its own, but a count blocks both legs' updates for
+        min_rep_time, so the series is stepped from count to count.
+        """
+        up_threshold = config['up_angle']
+        down_threshold = config['down_angle']
+        count = len(times)
+        legs = []
+        for angles in (left, right):
+            above = angles > up_threshold
+            legs.append((np.flatnonzero(above).tolist(), np.flatnonzero(~above & (angles < down_threshold)).tolist()))
+        times_list = times.tolist()
+        
+        leg_stages = [None, None]
+        stage_events = ([], [])  # per leg (sample, stage code)
+        count_samples = []
+        rep_times = []
+        last_count_time = 0.0
+        while True:
+            # Samples within min_rep_time of the last count are skipped entirely
+            start = bisect_left(times_list, last_count_time + config['min_rep_time'])
+            if start >= count:
+                break
+            next_counts = []
+            for leg, (ups, candidates) in enumerate(legs):
+                from_sample = start
+                if leg_stages[leg] != "up":
+                    k = bisect_left(ups, start)
+                    if k == len(ups):
+                        next_counts.append((None, None))
+                        continue
+                    from_sample = ups[k]
+                j = bisect_left(candidates, from_sample)
+                next_counts.append((from_sample, candidates[j] if j < len(candidates) else None))
+            
+            counting = [c for _, c in next_counts if c is not None]
+            if not counting:
+                # No more reps, record legs going up for the stage output
+                for leg, (up_sample, _) in enumerate(next_counts):
+                    if up_sample is not None and leg_stages[leg] != "up":
+                        stage_events[leg].append((up_sample, self.STAGE_CODES["up"]))
+                break
+            sample = min(counting)
+            for leg, (up_sample, candidate) in enumerate(next_counts):
+                if up_sample is None or up_sample > sample:
+                    continue
+                if leg_stages[leg] != "up":
+                    stage_events[leg].append((up_sample, self.STAGE_CODES["up"]))
+                    leg_stages[leg] = "up"
+                if candidate == sample:
+                    leg_stages[leg] = "down"
+                    stage_events[leg].append((sample, self.STAGE_CODES["down"]))
+                    count_samples.append(sample)
+                    rep_times.append(times_list[sample])
+            last_count_time = times_list[sample]
+        
+        stages = np.zeros((count, 2), dtype=np.int8)
+        for leg, events in enumerate(stage_events):
+            event_samples = np.array([s for s, _ in events], dtype=np.int64)
+            event_codes = np.array([0] + [c for _, c in events], dtype=np.int8)
+            stages[:, leg] = event_codes[np.searchsorted(event_samples, np.arange(count), side='right')]
+        return np.array(count_samples, dtype=np.int64), rep_times, stages
     
-    def count_knee_press(self, keypoints):
-        """Count knee press repetitions"""
-        return self.count_exercise(keypoints, 'knee_press')
+    def _count_phases_batch(self, values, times, config):
+        """count_phases over the mean measure values (N, M) of valid samples
+        
+        The samples meeting each step's conditions are found up front, then
+        the sequence is stepped from transition to transition.
+        """
+        transitions = config['transitions']
+        max_phase_time = config['max_phase_time']
+        count = len(times)
+        matches = []
+        for conditions, _, _, _ in transitions:
+            met = np.ones(count, dtype=bool)
+            for slot, above, below in conditions:
+                met &= (values[:, slot] > above) & (values[:, slot] < below)
+            matches.append(np.flatnonzero(met).tolist())
+        times_list = times.tolist()
+        
+        phase = -1
+        phase_time = 0.0
+        sample = 0  # First sample not yet checked
+        stage_events = []  # (sample, stage code)
+        count_samples = []
+        rep_times = []
+        last_count_time = 0.0
+        while sample < count:
+            candidates = matches[phase + 1]
+            j = bisect_left(candidates, sample)
+            hit = candidates[j] if j < len(candidates) else count
+            if phase >= 0:
+                # First sample past the phase's time limit resets before its own check
+                timeout = bisect_right(times_list, phase_time + max_phase_time)
+                if timeout < count and timeout <= hit:
+                    phase = -1
+                    stage_events.append((timeout, self.STAGE_CODES[None]))
+                    sample = timeout
+                    continue
+            if hit == count:
+                break
+            _, stage, counts, next_phase = transitions[phase + 1]
+            now = times_list[hit]
+            if counts and now - last_count_time >= config['min_rep_time']:
+                count_samples.append(hit)
+                rep_times.append(now)
+                last_count_time = now
+            phase = next_phase
+            phase_time = now
+            stage_events.append((hit, self.STAGE_CODES[stage]))
+            sample = hit + 1
+        
+        event_samples = np.array([s for s, _ in stage_events], dtype=np.int64)
+        event_codes = np.array([0] + [c for _, c in stage_events], dtype=np.int8)
+        stages = event_codes[np.searchsorted(event_samples, np.arange(count), side='right')]
+        return np.array(count_samples, dtype=np.int64), rep_times, stages
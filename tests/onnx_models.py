@@ -0,0 +1,37 @@
+"""Small generated ONNX models standing in for model files the repo doesn't ship"""
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper, TensorProto
+
+
+def simcc_pose_model(path, keypoints=17, input_size=(192, 256), split_ratio=2, batch='N', seed=0):
+    """RTMPose-shaped model: (B, 3, H, W) image in, SimCC x (B, K, W*r) and y (B, K, H*r) out
+
+    A 1x1 convolution gives one map per keypoint, its column and row maxima
+    repeated split_ratio times stand in for the SimCC vectors, so outputs
+    depend on the crop contents like a real model's. A fixed integer batch is
+    baked into a Reshape target as well, like the published exports do.
+    """
+    w, h = input_size
+    rng = np.random.default_rng(seed)
+    weights = numpy_helper.from_array(rng.normal(0, 0.05, (keypoints, 3, 1, 1)).astype(np.float32), 'weights')
+    target = numpy_helper.from_array(
+        np.array([batch if isinstance(batch, int) else 0, keypoints, h, w], dtype=np.int64), 'target')
+    nodes = [
+        helper.make_node('Conv', ['input', 'weights'], ['conv']),
+        helper.make_node('Reshape', ['conv', 'target'], ['maps']),
+        helper.make_node('ReduceMax', ['maps'], ['columns'], axes=[2], keepdims=0),
+        helper.make_node('ReduceMax', ['maps'], ['rows'], axes=[3], keepdims=0),
+        helper.make_node('Concat', ['columns'] * split_ratio, ['simcc_x'], axis=2),
+        helper.make_node('Concat', ['rows'] * split_ratio, ['simcc_y'], axis=2)
+    ]
+    graph = helper.make_graph(
+        nodes, 'simcc_pose',
+        [helper.make_tensor_value_info('input', TensorProto.FLOAT, [batch, 3, h, w])],
+        [helper.make_tensor_value_info('simcc_x', TensorProto.FLOAT, [batch, keypoints, w * split_ratio]),
+         helper.make_tensor_value_info('simcc_y', TensorProto.FLOAT, [batch, keypoints, h * split_ratio])],
+        [weights, target])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+    return path
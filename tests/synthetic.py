@@ -0,0 +1,114 @@
+"""Synthetic keypoint series for counter tests, COCO 17 keypoints in pixels"""
+import numpy as np
+
+LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE = 11, 12, 13, 14, 15, 16
+
+
+def squat_pose(knee_angle):
+    """Standing figure whose knees bend to knee_angle degrees"""
+    keypoints = np.zeros((17, 2))
+    angle = np.radians(knee_angle)
+    for hip, knee, ankle, x_offset in ((LEFT_HIP, LEFT_KNEE, LEFT_ANKLE, -40),
+                                       (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE, 40)):
+        keypoints[ankle] = [300 + x_offset, 500]
+        keypoints[knee] = [300 + x_offset, 400]
+        keypoints[hip] = keypoints[knee] + 100 * np.array([np.sin(angle), np.cos(angle)])
+    # Head and arms stacked above the hips
+    keypoints[:11] = keypoints[LEFT_HIP] + np.arange(1, 12)[:, None] * [2, -15]
+    return keypoints
+
+
+def _turn(direction, degrees):
+    radians = np.radians(degrees)
+    c, s = np.cos(radians), np.sin(radians)
+    return np.array([c * direction[0] - s * direction[1], s * direction[0] + c * direction[1]])
+
+
+def body_pose(knee, hip, shoulder, elbow=180.0, tilt=0.0):
+    """Figure built up from the ankles with the given joint angles in degrees
+
+    Each angle is a number or a (left, right) pair. shoulder is the angle
+    between torso and upper arm, tilt leans the whole body forward from
+    vertical, 90 lies it down head first.
+    """
+    keypoints = np.zeros((17, 2))
+    sides = ((LEFT_ANKLE, LEFT_KNEE, LEFT_HIP, 5, 7, 9, -20), (RIGHT_ANKLE, RIGHT_KNEE, RIGHT_HIP, 6, 8, 10, 20))
+    for side, (ankle, knee_index, hip_index, shoulder_index, elbow_index, wrist_index, x_offset) in enumerate(sides):
+        knee_angle, hip_angle, shoulder_angle, elbow_angle = (
+            np.broadcast_to(value, 2)[side] for value in (knee, hip, shoulder, elbow))
+        # Each segment turns away from the previous one by 180 - joint angle
+        direction = _turn(np.array([0.0, -1.0]), tilt)
+        point = np.array([300.0 + x_offset, 500.0])
+        keypoints[ankle] = point
+        point = point + 100 * direction
+        keypoints[knee_index] = point
+        direction = _turn(direction, 180 - knee_angle)
+        point = point + 100 * direction
+        keypoints[hip_index] = point
+        direction = _turn(direction, hip_angle - 180)
+        point = point + 120 * direction
+        keypoints[shoulder_index] = point
+        arm = _turn(-direction, -shoulder_angle)
+        keypoints[elbow_index] = point + 50 * arm
+        keypoints[wrist_index] = keypoints[elbow_index] + 50 * _turn(arm, elbow_angle - 180)
+    head = (keypoints[5] + keypoints[6]) / 2 + 30 * _turn(direction, 0)
+    keypoints[:5] = head + np.arange(5)[:, None] * [1, 1]
+    return keypoints
+
+
+BURPEE_POSES = {
+    # (knee, hip, shoulder, elbow, tilt)
+    'stand': (175, 175, 15, 180, 0),
+    'squat': (70, 60, 60, 180, 20),
+    'plank': (175, 175, 85, 180, 80),
+    'jump': (175, 175, 170, 180, 0)
+}
+
+
+def pose_sequence(steps, fps, step_time=0.45, poses=BURPEE_POSES, noise=0.0, seed=0):
+    """Move through named poses, step_time seconds between two
+
+    Returns:
+        tuple: (keypoints (T, 17, 2), timestamps (T,))
+    """
+    rng = np.random.default_rng(seed)
+    frames_per_step = int(step_time * fps)
+    keypoints = []
+    for start, end in zip(steps[:-1], steps[1:]):
+        for frame in range(frames_per_step):
+            f = frame / frames_per_step
+            keypoints.append(body_pose(*(np.array(poses[start]) * (1 - f) + np.array(poses[end]) * f)))
+    keypoints = np.array(keypoints)
+    keypoints += rng.normal(0, noise, keypoints.shape) if noise else 0
+    return keypoints, np.arange(len(keypoints)) / fps
+
+
+def squat_series(fps, reps=10, period=2.0, bottom=90.0, top=170.0, noise=0.0, seed=0):
+    """Squats as a cosine of the knee angle between top and bottom
+
+    Returns:
+        tuple: (keypoints (T, 17, 2), timestamps (T,))
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(int(reps * period * fps)) / fps
+    middle, amplitude = (top + bottom) / 2, (top - bottom) / 2
+    keypoints = np.array([squat_pose(middle + amplitude * np.cos(2 * np.pi * t / period)) for t in timestamps])
+    keypoints += rng.normal(0, noise, keypoints.shape) if noise else 0
+    return keypoints, timestamps
+
+
+def drop_frames(keypoints, timestamps, start, duration):
+    """Zero out the keypoints of frames in [start, start + duration), a tracking gap"""
+    keypoints = keypoints.copy()
+    keypoints[(timestamps >= start) & (timestamps < start + duration)] = 0
+    return keypoints
+
+
+def replay(counter, keypoints, timestamps, exercise_type):
+    """Feed a series to count_exercise frame by frame with the clock at the timestamps"""
+    now = [0.0]
+    counter.clock = lambda: now[0]
+    for frame, timestamp in zip(keypoints, timestamps):
+        now[0] = timestamp
+        counter.count_exercise(frame, exercise_type)
+    return counter.counter
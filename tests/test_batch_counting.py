@@ -0,0 +1,100 @@
+"""count_batch must give exactly what per-frame count_exercise gives, for every exercise mode"""
+import numpy as np
+
+from exercise_counters import ExerciseCounter
+from synthetic import body_pose, pose_sequence, drop_frames
+
+STAGE_CODES = ExerciseCounter.STAGE_CODES
+
+
+def moving_series(seed, frames=600):
+    """Every joint swinging on its own period, left and right out of step, irregular frame times"""
+    rng = np.random.default_rng(seed)
+    dt = rng.choice([1 / 30, 1 / 15, 1 / 10, 1 / 8])
+    jitter = rng.uniform(0, 0.3)
+    timestamps = np.cumsum(np.full(frames, dt) * (1 + rng.uniform(-jitter, jitter, frames)))
+    # (low, high) of knee, hip, shoulder and elbow angles
+    ranges = np.array([(80, 175), (60, 178), (15, 170), (40, 178)], dtype=np.float64)
+    periods = rng.uniform(0.6, 2.5, (4, 2))
+    phases = rng.uniform(0, 2 * np.pi, (4, 2))
+    middle, amplitude = ranges.mean(axis=1)[:, None], np.ptp(ranges, axis=1)[:, None] / 2
+    keypoints = np.array([body_pose(*(middle + amplitude * np.cos(2 * np.pi * t / periods + phases)))
+                          for t in timestamps])
+    return keypoints, timestamps
+
+
+def degrade(keypoints, timestamps, seed):
+    """Keypoint noise, single lost joints, a tracking gap and a pause in the frame times"""
+    rng = np.random.default_rng(seed + 1000)
+    keypoints = keypoints + rng.normal(0, rng.uniform(0, 4), keypoints.shape)
+    lost = rng.random(len(keypoints)) < 0.05
+    keypoints[lost, rng.integers(0, 17, lost.sum())] = 0
+    gap_start = timestamps[rng.integers(len(timestamps) // 10, len(timestamps) // 2)]
+    keypoints = drop_frames(keypoints, timestamps, gap_start, rng.uniform(0.1, 2.0))
+    timestamps = timestamps.copy()
+    timestamps[rng.integers(len(timestamps) // 2, len(timestamps)):] += rng.choice([0.2, 0.3, 2.0])
+    return keypoints, timestamps
+
+
+def replay_all(keypoints, timestamps, exercise_type):
+    """Per-frame counts, stages, angles and rep times of count_exercise"""
+    counter = ExerciseCounter()
+    now = [0.0]
+    counter.clock = lambda: now[0]
+    unilateral = exercise_type in counter.leg_exercises
+    counts, stages, angles, rep_times = [], [], [], []
+    for frame, timestamp in zip(keypoints, timestamps):
+        now[0] = timestamp
+        before = counter.counter
+        angle = counter.count_exercise(frame.copy(), exercise_type)
+        rep_times += [counter.last_count_time] * (counter.counter - before)
+        counts.append(counter.counter)
+        angles.append(np.nan if angle is None else angle)
+        if unilateral:
+            stages.append((STAGE_CODES[counter.leg_stages['left']], STAGE_CODES[counter.leg_stages['right']]))
+        else:
+            stages.append(STAGE_CODES[counter.stage])
+    return np.array(counts), np.array(stages), np.array(angles), np.array(rep_times)
+
+
+def assert_batch_matches_replay(keypoints, timestamps, exercise_type):
+    counts, stages, angles, rep_times = replay_all(keypoints, timestamps, exercise_type)
+    result = ExerciseCounter().count_batch(keypoints, timestamps, exercise_type)
+    assert result['reps'] == counts[-1]
+    np.testing.assert_array_equal(result['counts'], counts)
+    np.testing.assert_array_equal(result['stages'], stages)
+    np.testing.assert_allclose(result['angles'], angles, atol=1e-9)
+    np.testing.assert_allclose(result['rep_times'], rep_times)
+    return counts[-1]
+
+
+def test_every_mode_is_covered():
+    modes = {config['mode'] for config in ExerciseCounter().exercise_configs.values()}
+    assert modes == {'bilateral', 'unilateral', 'phases'}
+
+
+def test_batch_matches_replay_on_moving_series():
+    counter = ExerciseCounter()
+    for exercise_type, config in counter.exercise_configs.items():
+        if config['mode'] == 'phases':
+            continue
+        reps = 0
+        for seed in range(6):
+            keypoints, timestamps = degrade(*moving_series(seed), seed)
+            reps += assert_batch_matches_replay(keypoints, timestamps, exercise_type)
+        assert reps > 0, exercise_type
+
+
+def test_batch_matches_replay_on_phase_sequences():
+    counter = ExerciseCounter()
+    sequence = ['stand', 'squat', 'plank', 'squat', 'stand', 'jump'] * 6 + ['stand']
+    for exercise_type, config in counter.exercise_configs.items():
+        if config['mode'] != 'phases':
+            continue
+        reps = 0
+        for seed in range(6):
+            fps = (30, 15, 10, 8)[seed % 4]
+            keypoints, timestamps = pose_sequence(sequence, fps, noise=2.0, seed=seed)
+            keypoints, timestamps = degrade(keypoints, timestamps, seed)
+            reps += assert_batch_matches_replay(keypoints, timestamps, exercise_type)
+        assert reps > 0, exercise_type
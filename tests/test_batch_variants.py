@@ -0,0 +1,72 @@
+"""Dynamic-batch copies of batch-1 exports must give the original model's results"""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from core.batch_pose import PoseMicroBatcher, batch_variant_path
+from core.onnx_engine import OnnxYOLOX, OnnxRTMPose
+
+pytest.importorskip('onnx')
+from core.batch_variants import BatchVariantBuilder
+from core.detector_variants import DetectorVariantBuilder
+from onnx_models import simcc_pose_model
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DETECTOR = os.path.join(ROOT, 'models', 'yolox_nano_8xb8-300e_humanart-40f6f0d0.onnx')
+
+
+def requests(count, seed=0):
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    bboxes = [[40 + 90 * i, 20 + 10 * i, 160 + 90 * i, 330 - 5 * i] for i in range(count)]
+    return [(image, bboxes)]
+
+
+def test_pose_batch_variant_matches_fixed_export(tmp_path):
+    fixed_path = simcc_pose_model(str(tmp_path / 'pose.onnx'), batch=1)
+    fixed = OnnxRTMPose(fixed_path)
+    assert not PoseMicroBatcher(fixed).supports_batching()
+
+    variant_path = BatchVariantBuilder().build(fixed_path)
+    assert variant_path == batch_variant_path(fixed_path)
+    variant = OnnxRTMPose(variant_path, max_batch=4)
+    batcher = PoseMicroBatcher(variant)
+    assert batcher.supports_batching()
+
+    keypoints, scores = batcher.infer_batch(requests(6))[0]
+    expected_keypoints, expected_scores = fixed.infer_batch(requests(6))[0]
+    np.testing.assert_allclose(keypoints, expected_keypoints)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+    # Six crops in runs of four and two instead of six single runs
+    assert batcher.batches == 2
+
+
+def test_dynamic_export_is_rejected(tmp_path):
+    path = simcc_pose_model(str(tmp_path / 'pose.onnx'))
+    with pytest.raises(ValueError):
+        BatchVariantBuilder().build(path)
+
+
+@pytest.mark.skipif(not os.path.exists(DETECTOR), reason="bundled detector missing")
+def test_batched_detector_matches_in_graph_nms(tmp_path):
+    path = DetectorVariantBuilder(DETECTOR).build_batched(str(tmp_path / 'det_batch.onnx'))
+    frames = [cv2.imread(os.path.join(ROOT, 'assets', name))
+              for name in sorted(os.listdir(os.path.join(ROOT, 'assets'))) if name.endswith('.png')]
+    single = OnnxYOLOX(DETECTOR)
+    batched = OnnxYOLOX(path, max_batch=4)
+
+    for boxes, frame in zip(batched.detect_batch(frames), frames):
+        np.testing.assert_allclose(boxes, single(frame).reshape(-1, 4), atol=1e-3)
+
+    # Down to the NMS score threshold every box of the graph's own output is reproduced
+    batched.GRAPH_SCORE_THR = 0.01
+    boxes_found = 0
+    for boxes, frame in zip(batched.detect_batch(frames), frames):
+        padded, ratio = single.preprocess(frame)
+        dets = single.inference(padded)[0][0]
+        expected = dets[dets[:, 4] > 0.01, :4] / ratio
+        np.testing.assert_allclose(boxes, expected, atol=1e-3)
+        boxes_found += len(expected)
+    assert boxes_found > len(frames)
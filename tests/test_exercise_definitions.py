@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from core.exercise_definitions import ExerciseDefinitions
+from exercise_counters import ExerciseCounter, JointAngleKernel
+from synthetic import BURPEE_POSES, body_pose, pose_sequence, replay
+
+
+def test_segment_tilt_from_vertical():
+    definitions = ExerciseDefinitions.default()
+    torso = {'left': definitions._joints(['left_hip', 'left_shoulder']),
+             'right': definitions._joints(['right_hip', 'right_shoulder'])}
+    kernel = JointAngleKernel({'torso': {'measures': {'torso': torso}}})
+    for tilt in (0, 30, 90, 150):
+        angles, valid = kernel(body_pose(175, 175, 15, tilt=tilt))
+        assert valid.all()
+        np.testing.assert_allclose(angles, tilt, atol=1e-3)
+
+
+def test_shown_angle_needs_three_keypoints():
+    definition = {'joints': {'left': ['left_hip', 'left_shoulder'], 'right': ['right_hip', 'right_shoulder']},
+                  'up_angle': 60, 'down_angle': 20}
+    with pytest.raises(ValueError):
+        ExerciseDefinitions.default().compile(definition)
+
+
+def test_burpees_count_and_look_alikes_do_not():
+    poses = dict(BURPEE_POSES, stand_arms_forward=(175, 175, 90, 180, 0), squat_arms_forward=(70, 60, 90, 180, 20))
+    burpees = ['stand', 'squat', 'plank', 'squat', 'stand', 'jump'] * 10 + ['stand']
+    air_squats = ['stand_arms_forward', 'squat_arms_forward'] * 5 + ['stand_arms_forward']
+    jump_squats = ['stand', 'squat', 'jump', 'squat'] * 5 + ['stand']
+    for fps in (30, 15, 8):
+        for steps, reps in ((burpees, 10), (air_squats, 0), (jump_squats, 0)):
+            keypoints, timestamps = pose_sequence(steps, fps, poses=poses, noise=2.0, seed=fps)
+            assert replay(ExerciseCounter(), keypoints, timestamps, 'burpee') == reps
+            assert ExerciseCounter().count_batch(keypoints, timestamps, 'burpee')['reps'] == reps
@@ -0,0 +1,79 @@
+"""Cached keypoints must come back as stored and never outlive the video or settings they came from"""
+import os
+
+import numpy as np
+
+from core.keypoint_cache import KeypointCache
+
+
+def video(tmp_path, name='clip.mp4', size=4096, seed=0):
+    path = tmp_path / name
+    path.write_bytes(np.random.default_rng(seed).integers(0, 255, size, dtype=np.uint8).tobytes())
+    return str(path)
+
+
+def series(frames=50, seed=0):
+    rng = np.random.default_rng(seed)
+    keypoints = rng.uniform(0, 1920, (frames, 17, 2)).astype(np.float32)
+    scores = rng.uniform(0, 1, (frames, 17)).astype(np.float32)
+    present = rng.random(frames) > 0.2
+    return keypoints, scores, present
+
+
+def test_round_trip(tmp_path):
+    cache = KeypointCache(str(tmp_path / 'cache'))
+    key = cache.key(video(tmp_path), 'balanced', {'max_size': 640})
+    assert cache.load(key) is None
+
+    keypoints, scores, present = series()
+    cache.save(key, keypoints, scores, present, 29.97)
+    entry = cache.load(key)
+    # 1/8 pixel steps and float16 scores
+    np.testing.assert_allclose(entry['keypoints'], keypoints, atol=0.5 / KeypointCache.KEYPOINT_STEPS)
+    np.testing.assert_allclose(entry['scores'], scores, atol=1e-3)
+    np.testing.assert_array_equal(entry['present'], present)
+    assert entry['fps'] == 29.97
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_follows_video_mode_and_settings(tmp_path):
+    cache = KeypointCache(str(tmp_path / 'cache'))
+    path = video(tmp_path)
+    key = cache.key(path, 'balanced', {'max_size': 640})
+    assert cache.key(path, 'balanced', {'max_size': 640}) == key
+    assert cache.key(path, 'performance', {'max_size': 640}) != key
+    assert cache.key(path, 'balanced', {'max_size': 480}) != key
+    assert cache.key(video(tmp_path, name='copy.mp4'), 'balanced', {'max_size': 640}) != key
+
+    # Same size rewritten in place, and a touch without any change
+    video(tmp_path, seed=1)
+    rewritten = cache.key(path, 'balanced', {'max_size': 640})
+    assert rewritten != key
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    assert cache.key(path, 'balanced', {'max_size': 640}) != rewritten
+
+
+def test_large_video_edit_between_sampled_chunks(tmp_path):
+    cache = KeypointCache(str(tmp_path / 'cache'))
+    cache.HASH_SAMPLES, cache.HASH_CHUNK = 4, 16
+    path = video(tmp_path, size=4096)
+    before = cache.content_hash(path)
+    stat = os.stat(path)
+    with open(path, 'r+b') as f:
+        # Between the first two sampled chunks, only the mtime gives it away
+        f.seek(200)
+        f.write(b'edited')
+    # A later write, whatever the filesystem's timestamp granularity
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    assert cache.content_hash(path) != before
+
+
+def test_clear(tmp_path):
+    cache = KeypointCache(str(tmp_path / 'cache'))
+    key = cache.key(video(tmp_path), 'balanced')
+    cache.save(key, *series(), 30.0)
+    assert cache.load(key) is not None
+    cache.clear()
+    assert cache.load(key) is None
+    assert os.listdir(cache.cache_dir) == []
@@ -0,0 +1,46 @@
+import numpy as np
+
+from core.keypoint_predictor import KeypointPredictor
+from exercise_counters import ExerciseCounter
+from synthetic import squat_series, replay
+
+
+def decimated_replay(keypoints, timestamps, exercise_type, predictor):
+    """Count like live decimation: model keypoints on picked frames, extrapolated ones in between"""
+    counter = ExerciseCounter()
+    now = [0.0]
+    counter.clock = lambda: now[0]
+    scores = np.full((1, keypoints.shape[1]), 0.9)
+    for frame, timestamp in zip(keypoints, timestamps):
+        now[0] = timestamp
+        if predictor.should_infer():
+            predictor.update(frame[None], scores)
+        else:
+            frame = predictor.predict()[0][0]
+        counter.count_exercise(frame, exercise_type)
+    return counter.counter
+
+
+def test_decimated_counts_match_every_frame():
+    for fps in (30, 15):
+        for noise in (0.0, 2.0):
+            keypoints, timestamps = squat_series(fps, reps=10, noise=noise, seed=fps)
+            predictor = KeypointPredictor(max_interval=4)
+            full = replay(ExerciseCounter(), keypoints, timestamps, 'squat')
+            decimated = decimated_replay(keypoints, timestamps, 'squat', predictor)
+            assert full == 10
+            assert decimated == full
+            assert predictor.inference_ratio() < 1.0
+
+
+def test_reset_forgets_stale_keypoints():
+    keypoints, _ = squat_series(30, reps=1)
+    predictor = KeypointPredictor(max_interval=4)
+    scores = np.full((1, 17), 0.9)
+    for frame in keypoints[:10]:
+        predictor.update(frame[None], scores)
+    assert predictor.last_keypoints is not None
+
+    predictor.reset()
+    assert predictor.should_infer()
+    assert predictor.last_keypoints is None and predictor.velocity is None
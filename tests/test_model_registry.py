@@ -0,0 +1,79 @@
+"""Model files are only used if they match the checksums pinned in the manifest"""
+import json
+import hashlib
+
+import pytest
+
+from core.model_registry import ModelRegistry
+
+PINNED = 'pinned.onnx'
+UNPINNED = 'unpinned.onnx'
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    models_dir, data_dir, mirror_dir = tmp_path / 'models', tmp_path / 'data', tmp_path / 'mirror'
+    for d in (models_dir, data_dir, mirror_dir):
+        d.mkdir()
+    manifest = {'version': 1, 'models': {
+        PINNED: {'role': 'det', 'sha256': hashlib.sha256(b'official').hexdigest()},
+        UNPINNED: {'role': 'pose', 'sha256': None}
+    }}
+    (models_dir / ModelRegistry.MANIFEST).write_text(json.dumps(manifest))
+    return models_dir, data_dir, mirror_dir
+
+
+def test_pinned_file_is_verified(dirs):
+    models_dir, data_dir, _ = dirs
+    registry = ModelRegistry(str(models_dir), data_dir=str(data_dir))
+    path = write(models_dir / PINNED, b'official')
+    assert registry.verify(path)
+    assert registry.resolve(PINNED) == path
+
+
+def test_mismatching_copy_is_skipped(dirs):
+    models_dir, data_dir, mirror_dir = dirs
+    registry = ModelRegistry(str(models_dir), mirror_dir=str(mirror_dir), data_dir=str(data_dir))
+    corrupt = write(models_dir / PINNED, b'truncated')
+    assert not registry.verify(corrupt)
+    with pytest.raises(FileNotFoundError):
+        registry.resolve(PINNED)
+
+    # A good copy further down the search order is used instead
+    mirrored = write(mirror_dir / PINNED, b'official')
+    assert registry.resolve(PINNED) == mirrored
+
+
+def test_unpinned_file_passes_with_one_warning(dirs, capsys):
+    models_dir, data_dir, _ = dirs
+    registry = ModelRegistry(str(models_dir), data_dir=str(data_dir))
+    path = write(models_dir / UNPINNED, b'anything')
+    assert registry.verify(path)
+    assert registry.verify(path)
+    assert capsys.readouterr().out.count(UNPINNED) == 1
+
+    # Unlisted files are generated locally and pass silently
+    assert registry.verify(write(models_dir / 'generated_int8.onnx', b'int8'))
+    assert capsys.readouterr().out == ''
+
+
+def test_checksums_are_cached_and_pinned(dirs):
+    models_dir, data_dir, _ = dirs
+    registry = ModelRegistry(str(models_dir), data_dir=str(data_dir))
+    path = write(models_dir / UNPINNED, b'anything')
+    digest = hashlib.sha256(b'anything').hexdigest()
+    assert registry.sha256(path) == digest
+
+    # Later startups take the digest from the cache file while size and mtime are unchanged
+    cached = ModelRegistry(str(models_dir), data_dir=str(data_dir))
+    cached.checksums[next(iter(cached.checksums))]['sha256'] = 'from cache'
+    assert cached.sha256(path) == 'from cache'
+
+    registry.pin_checksums()
+    assert ModelRegistry(str(models_dir), data_dir=str(data_dir)).entry(UNPINNED)['sha256'] == digest
+    assert dict((name, state) for name, _, state in registry.status()) == {PINNED: 'missing', UNPINNED: 'ok'}
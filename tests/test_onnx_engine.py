@@ -0,0 +1,62 @@
+"""The in-house engine must give rtmlib's results, frame after frame"""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from core.onnx_engine import OnnxYOLOX, OnnxRTMPose
+from onnx_models import simcc_pose_model
+
+rtmlib = pytest.importorskip('rtmlib')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DETECTOR = os.path.join(ROOT, 'models', 'yolox_nano_8xb8-300e_humanart-40f6f0d0.onnx')
+# Screenshots with a person in the camera view and with different numbers of raw detections
+FRAMES = ['Screenshot-ch-1.png', 'Screenshot-ch-2.png', 'Screenshot-en-2.png', 'Screenshot-ch-3.png',
+          'Screenshot-ch-1.png']
+
+
+def load_frames():
+    return [cv2.imread(os.path.join(ROOT, 'assets', name)) for name in FRAMES]
+
+
+@pytest.mark.skipif(not os.path.exists(DETECTOR), reason="bundled detector missing")
+def test_detector_matches_rtmlib_across_detection_counts():
+    import onnxruntime as ort
+    engine = OnnxYOLOX(DETECTOR)
+    reference = rtmlib.YOLOX(DETECTOR, model_input_size=(416, 416), backend='onnxruntime')
+    session = ort.InferenceSession(DETECTOR, providers=['CPUExecutionProvider'])
+
+    raw_counts = set()
+    found = 0
+    for frame in load_frames():
+        # Raw graph outputs through IO binding, their shape changes with the detection count
+        padded, _ = engine.preprocess(frame)
+        outputs = [output.copy() for output in engine.inference(padded)]
+        expected = session.run(None, {session.get_inputs()[0].name: engine.input_buffer[:1]})
+        for output, reference_output in zip(outputs, expected):
+            np.testing.assert_allclose(output, reference_output, rtol=1e-4, atol=1e-3)
+        raw_counts.add(outputs[0].shape[1])
+
+        boxes = np.asarray(engine(frame)).reshape(-1, 4)
+        reference_boxes = np.asarray(reference(frame)).reshape(-1, 4)
+        assert len(boxes) == len(reference_boxes)
+        np.testing.assert_allclose(boxes, reference_boxes, atol=0.5)
+        found += len(boxes)
+    assert len(raw_counts) > 2
+    assert found > 0
+
+
+def test_pose_matches_rtmlib(tmp_path):
+    path = simcc_pose_model(str(tmp_path / 'pose.onnx'))
+    engine = OnnxRTMPose(path, model_input_size=(192, 256), max_batch=4)
+    reference = rtmlib.RTMPose(path, model_input_size=(192, 256), backend='onnxruntime')
+
+    for frame, people in zip(load_frames(), (1, 3, 0, 5, 2)):
+        h, w = frame.shape[:2]
+        bboxes = [[40 + 120 * i, 30 + 10 * i, 200 + 120 * i, h - 50] for i in range(people)]
+        keypoints, scores = engine(frame, bboxes)
+        reference_keypoints, reference_scores = reference(frame, bboxes)
+        np.testing.assert_allclose(keypoints, reference_keypoints, atol=1e-3)
+        np.testing.assert_allclose(scores, reference_scores, rtol=1e-4, atol=1e-5)
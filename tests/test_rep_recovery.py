@@ -0,0 +1,45 @@
+import numpy as np
+
+from exercise_counters import ExerciseCounter
+from synthetic import squat_pose, squat_series, replay
+
+
+def gap_series(fps, drop_frames):
+    """Half a squat down to 130 degrees, 2 s without tracking, back up higher"""
+    first = np.linspace(170, 130, int(0.5 * fps))
+    last = np.linspace(160, 172, int(0.5 * fps))
+    gap = int(2.0 * fps)
+    timestamps = np.arange(len(first) + gap + len(last)) / fps
+    keypoints = np.array([squat_pose(a) for a in np.concatenate((first, np.full(gap, 150.0), last))])
+    tracked = np.ones(len(timestamps), dtype=bool)
+    tracked[len(first):len(first) + gap] = False
+    if drop_frames:
+        return keypoints[tracked], timestamps[tracked]
+    keypoints[~tracked] = 0
+    return keypoints, timestamps
+
+
+def test_no_rep_across_tracking_gap():
+    for fps in (30, 10):
+        for drop_frames in (False, True):
+            keypoints, timestamps = gap_series(fps, drop_frames)
+            assert replay(ExerciseCounter(), keypoints, timestamps, 'squat') == 0
+            assert ExerciseCounter().count_batch(keypoints, timestamps, 'squat')['reps'] == 0
+
+
+def test_shallow_jittered_reps_stay_uncounted_at_low_fps():
+    # Bottoming at 115 degrees never reaches the 110 degree squat threshold
+    for fps in (10, 15):
+        false_counts = 0
+        for seed in range(10):
+            keypoints, timestamps = squat_series(fps, reps=12, bottom=115, noise=4.0, seed=seed)
+            false_counts += replay(ExerciseCounter(), keypoints, timestamps, 'squat')
+        assert false_counts <= 1
+
+
+def test_fast_reps_recovered_at_low_fps():
+    counted = 0
+    for seed in range(5):
+        keypoints, timestamps = squat_series(10, reps=10, period=1.0, bottom=95, noise=2.0, seed=seed)
+        counted += replay(ExerciseCounter(), keypoints, timestamps, 'squat')
+    assert counted >= 35
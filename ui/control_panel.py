@@ -5,6 +5,7 @@ from PyQt5.QtGui import QFont
 from .styles import AppStyles
 from .custom_widgets import SwitchControl
 from core.translations import Translations as T
+from core.exercise_definitions import ExerciseDefinitions
 
 class ControlPanel(QWidget):
     """Control panel component"""
@@ -19,30 +20,32 @@ class ControlPanel(QWidget):
     counter_decrease = pyqtSignal(int)
     record_confirmed = pyqtSignal(str)
     model_changed = pyqtSignal(str)  # Add model switching signal
+    backend_changed = pyqtSignal(str)
     mirror_toggled = pyqtSignal(bool)
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.exercise_colors = AppStyles.EXERCISE_COLORS
-        
-        # Initialize exercise type mappings
-        self.exercise_display_map = {
-            "overhead_press": T.get("overhead_press"),
-            "bicep_curl": T.get("bicep_curl"),
-            "squat": T.get("squat"),
-            "pushup": T.get("pushup"),
-            "situp": T.get("situp"),
-            "lateral_raise": T.get("lateral_raise"),
-            "leg_raise": T.get("leg_raise"),
-            "knee_raise": T.get("knee_raise"),
-            "knee_press": T.get("knee_press")
-        }
+        self.exercise_definitions = ExerciseDefinitions.default()
+        self.exercise_colors = dict(AppStyles.EXERCISE_COLORS)
+        self.exercise_colors.update(self.exercise_definitions.colors())
+        
+        # Initialize exercise type mappings from the exercise definitions
+        self.exercise_display_map = self.exercise_definitions.display_names()
         
         # Initialize model type mappings - only keep RTMPose options
         self.model_display_map = {
             "lightweight": T.get("lightweight"),
             "balanced": T.get("balanced"),
-            "performance": T.get("performance")
+            "performance": T.get("performance"),
+            "quantized": T.get("quantized")
+        }
+        
+        # Initialize inference backend mappings
+        self.backend_display_map = {
+            "auto": T.get("auto_backend"),
+            "onnxruntime": "ONNX Runtime",
+            "openvino": "OpenVINO",
+            "opencv": "OpenCV DNN"
         }
         
         # Initialize reverse mappings
@@ -169,6 +172,21 @@ class ControlPanel(QWidget):
         model_layout.addWidget(self.model_combo, 1)
         controls_layout.addLayout(model_layout)
         
+        # Inference backend selection
+        backend_layout = QHBoxLayout()
+        self.backend_label = QLabel(T.get("backend_type"))
+        self.backend_label.setStyleSheet("color: #2c3e50; font-size: 16pt; font-weight: bold;")
+        
+        self.backend_combo = QComboBox()
+        self.backend_combo.setStyleSheet(AppStyles.get_exercise_combo_style())
+        for backend_code, backend_display in self.backend_display_map.items():
+            self.backend_combo.addItem(backend_display, backend_code)
+        self.backend_combo.currentIndexChanged.connect(self._on_backend_changed)
+        
+        backend_layout.addWidget(self.backend_label)
+        backend_layout.addWidget(self.backend_combo, 1)
+        controls_layout.addLayout(backend_layout)
+        
         # Camera selection
         camera_layout = QHBoxLayout()
         self.camera_label = QLabel(T.get("camera"))
@@ -402,6 +420,30 @@ class ControlPanel(QWidget):
         # Emit signal to notify main application
         self.model_changed.emit(model_mode)
     
+    def _on_backend_changed(self, index):
+        """Inference backend change handler"""
+        backend = self.backend_combo.currentData()
+        if backend:
+            self.backend_changed.emit(backend)
+    
+    def set_model_mode(self, model_mode):
+        """Select model mode in combo box without emitting change signal"""
+        self.model_combo.blockSignals(True)
+        for i in range(self.model_combo.count()):
+            if self.model_combo.itemData(i) == model_mode:
+                self.model_combo.setCurrentIndex(i)
+                break
+        self.model_combo.blockSignals(False)
+    
+    def set_backend(self, backend):
+        """Select backend in combo box without emitting change signal"""
+        self.backend_combo.blockSignals(True)
+        for i in range(self.backend_combo.count()):
+            if self.backend_combo.itemData(i) == backend:
+                self.backend_combo.setCurrentIndex(i)
+                break
+        self.backend_combo.blockSignals(False)
+    
     def _on_mirror_toggled(self, checked):
         """Mirror mode toggle handler"""
         self.mirror_toggled.emit(checked)
@@ -429,20 +471,8 @@ class ControlPanel(QWidget):
                 current_exercise = self.exercise_display_map.get(exercise_type, "bicep_curl")
                 current_color = self.exercise_colors.get(current_exercise, "#3498db")
                 
-                # Determine if highlighting is needed
-                highlight = False
-                angle_value = float(angle_text)
-                
-                if exercise_type == "squat" and angle_value < 120:  # Squat lower limit point
-                    highlight = True
-                elif exercise_type == "pushup" and angle_value < 100:  # Pushup lower limit point
-                    highlight = True
-                elif exercise_type == "leg_raise" and angle_value > 90:  # Leg raise upper limit point
-                    highlight = True
-                elif exercise_type == "knee_raise" and angle_value > 100:  # Knee raise upper limit point
-                    highlight = True
-                elif exercise_type == "knee_press" and (angle_value < 100 or angle_value > 160):  # Knee press key points
-                    highlight = True
+                # Highlight at the exercise's key points (limits from its definition)
+                highlight = self.exercise_definitions.highlight(exercise_type, float(angle_text))
                 
                 # Set style
                 self.angle_value.setStyleSheet(AppStyles.get_angle_value_style(current_color, highlight))
@@ -476,8 +506,8 @@ class ControlPanel(QWidget):
             current_exercise = self.exercise_display_map.get(exercise_type, "")
             
             # If preset color not found, use default color
-            if current_exercise in AppStyles.EXERCISE_COLORS:
-                current_color = AppStyles.EXERCISE_COLORS[current_exercise]
+            if current_exercise in self.exercise_colors:
+                current_color = self.exercise_colors[current_exercise]
             else:
                 current_color = "#3498db"  # Default use blue
             
@@ -503,8 +533,8 @@ class ControlPanel(QWidget):
             current_exercise = self.exercise_display_map.get(self.current_exercise, "")
             
             # If preset color not found, use default color
-            if current_exercise in AppStyles.EXERCISE_COLORS:
-                current_color = AppStyles.EXERCISE_COLORS[current_exercise]
+            if current_exercise in self.exercise_colors:
+                current_color = self.exercise_colors[current_exercise]
             else:
                 current_color = "#3498db"  # Default use blue
                 
@@ -521,8 +551,8 @@ class ControlPanel(QWidget):
             current_exercise = self.exercise_display_map.get(self.current_exercise, "")
             
             # If preset color not found, use default color
-            if current_exercise in AppStyles.EXERCISE_COLORS:
-                current_color = AppStyles.EXERCISE_COLORS[current_exercise]
+            if current_exercise in self.exercise_colors:
+                current_color = self.exercise_colors[current_exercise]
             else:
                 current_color = "#3498db"  # Default use blue
                 
@@ -535,25 +565,19 @@ class ControlPanel(QWidget):
     def update_language(self):
         """Update interface language"""
         # Update exercise type mappings
-        self.exercise_display_map = {
-            "overhead_press": T.get("overhead_press"),
-            "bicep_curl": T.get("bicep_curl"),
-            "squat": T.get("squat"),
-            "pushup": T.get("pushup"),
-            "situp": T.get("situp"),
-            "lateral_raise": T.get("lateral_raise"),
-            "leg_raise": T.get("leg_raise"),
-            "knee_raise": T.get("knee_raise"),
-            "knee_press": T.get("knee_press")
-        }
+        self.exercise_display_map = self.exercise_definitions.display_names()
+        self.exercise_colors.update(self.exercise_definitions.colors())
         
         # Update model type mappings
         self.model_display_map = {
             "lightweight": T.get("lightweight"),
             "balanced": T.get("balanced"),
-            "performance": T.get("performance")
+            "performance": T.get("performance"),
+            "quantized": T.get("quantized")
         }
         
+        self.backend_display_map["auto"] = T.get("auto_backend")
+        
         # Update reverse mappings
         self.exercise_code_map = {v: k for k, v in self.exercise_display_map.items()}
         
@@ -566,6 +590,7 @@ class ControlPanel(QWidget):
         self.counter_label.setText(T.get("count_completed"))
         self.exercise_label.setText(T.get("exercise_type"))
         self.model_label.setText(T.get("model_type"))  
+        self.backend_label.setText(T.get("backend_type"))
         self.camera_label.setText(T.get("camera"))
         
         # Update switch text
@@ -585,6 +610,9 @@ class ControlPanel(QWidget):
         # Update combo boxes
         self._update_combo_items(self.exercise_combo, self.exercise_display_map)
         self._update_combo_items(self.model_combo, self.model_display_map)  # Update model selection box
+        self.backend_combo.blockSignals(True)
+        self._update_combo_items(self.backend_combo, self.backend_display_map)
+        self.backend_combo.blockSignals(False)
 
     def _update_combo_items(self, combo_box, item_map):
         """Update combo box content"""
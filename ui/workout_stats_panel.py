@@ -4,6 +4,7 @@ from PyQt5.QtCore import Qt, pyqtSignal
 import datetime
 
 from core.translations import Translations as T
+from core.exercise_definitions import ExerciseDefinitions
 
 from .stats_components.today_tab import TodayProgressTab
 from .stats_components.week_tab import WeekStatsTab
@@ -21,7 +22,7 @@ class WorkoutStatsPanel(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.exercise_colors = AppStyles.EXERCISE_COLORS
+        self.exercise_colors = dict(AppStyles.EXERCISE_COLORS)
         
         # Use translation module to generate exercise name mappings
         self.update_exercise_mappings()
@@ -31,17 +32,10 @@ class WorkoutStatsPanel(QWidget):
     
     def update_exercise_mappings(self):
         """Update exercise name mappings"""
-        self.exercise_name_map = {
-            "squat": T.get("squat"),
-            "pushup": T.get("pushup"),
-            "situp": T.get("situp"),
-            "bicep_curl": T.get("bicep_curl"),
-            "lateral_raise": T.get("lateral_raise"),
-            "overhead_press": T.get("overhead_press"),
-            "leg_raise": T.get("leg_raise"),
-            "knee_raise": T.get("knee_raise"),
-            "knee_press": T.get("knee_press")
-        }
+        definitions = ExerciseDefinitions.default()
+        self.exercise_name_map = definitions.display_names()
+        # Tabs share this dict, keep it and add colors for the current names
+        self.exercise_colors.update(definitions.colors())
         self.exercise_code_map = {v: k for k, v in self.exercise_name_map.items()}
     
     def setup_ui(self):
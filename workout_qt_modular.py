@@ -1,7 +1,9 @@
 import sys
 import os
+import multiprocessing
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, 
-                             QSplitter, QStatusBar, QMessageBox, QAction, QActionGroup, QMenu, QTableWidgetItem, QFileDialog)
+                             QSplitter, QStatusBar, QMessageBox, QAction, QActionGroup, QMenu, QTableWidgetItem, QFileDialog,
+                             QLabel)
 from PyQt5.QtCore import Qt, QTimer
 
 # Import custom modules
@@ -10,6 +12,9 @@ from core.rtmpose_processor import RTMPoseProcessor
 from core.sound_manager import SoundManager
 from core.workout_tracker import WorkoutTracker
 from core.translations import Translations as T
+from core.app_config import AppConfig
+from core.qos_controller import QoSController
+from core.thread_planner import ThreadPlanner
 from exercise_counters import ExerciseCounter
 from ui.video_display import VideoDisplay
 from ui.control_panel import ControlPanel
@@ -29,18 +34,57 @@ class WorkoutTrackerApp(QMainWindow):
         
         # Set default model mode
         self.model_mode = 'balanced'
+        self.pending_model_mode = None  # Mode being loaded in the background before switching to it
+        
+        # Load application settings (inference backend etc.)
+        self.config = AppConfig()
         
         # Create exercise counter instance
         self.exercise_counter = ExerciseCounter()
         
+        # Thread budget first, sessions created afterwards inherit the inference cores
+        self.thread_planner = ThreadPlanner(profile=self.config.get("thread_profile"),
+                                            affinity=bool(self.config.get("thread_affinity")))
+        self.thread_planner.apply()
+        
         # Initialize RTMPose pose processor
         print(f"Initializing RTMPose processor (mode: {self.model_mode}, device: {self.device})")
-        self.pose_processor = RTMPoseProcessor(
-            exercise_counter=self.exercise_counter,
-            mode=self.model_mode,
-            backend='onnxruntime',
-            device=self.device
-        )
+        try:
+            self.pose_processor = RTMPoseProcessor(
+                exercise_counter=self.exercise_counter,
+                mode=self.model_mode,
+                backend=self.config.get("backend"),
+                device=self.device,
+                pool_memory_mb=self.config.get("model_pool_max_mb"),
+                engine=self.config.get("inference_engine"),
+                thread_planner=self.thread_planner,
+                model_mirror_dir=self.config.get("model_mirror_dir") or None,
+                shared_weights=bool(self.config.get("shared_model_weights")),
+                backend_cache=self.config
+            )
+        except FileNotFoundError as e:
+            # Models are never downloaded at runtime, stop with a clear message instead
+            print(f"Startup failed: {e}")
+            QMessageBox.critical(None, T.get("model_files_missing"), str(e))
+            sys.exit(1)
+        if self.config.get("inference_process"):
+            self.pose_processor.set_process_isolation(True, self.config.get_address("inference_server_address"))
+        elif self.config.get("pipelined_inference"):
+            self.pose_processor.set_pipelining(True)
+        self.pose_processor.set_dual_resolution(bool(self.config.get("dual_resolution")))
+        if self.config.get("inference_decimation"):
+            self.pose_processor.set_decimation(True, self.config.get("decimation_max_interval"))
+        if self.config.get("keypoint_filter"):
+            self.pose_processor.set_keypoint_filter(True)
+        if self.config.get("fused_preprocessing"):
+            self.pose_processor.set_fused_preprocessing(True)
+        if self.config.get("fixed_zone"):
+            self.pose_processor.set_fixed_zone(True, self.config.get("fixed_zone_rect"))
+        
+        # Adaptive model mode driven by measured inference latency
+        self.qos = QoSController(budget_ms=self.config.get("latency_budget_ms"))
+        self.qos.set_mode(self.model_mode)
+        self.qos_enabled = bool(self.config.get("adaptive_quality"))
         
         # Set default exercise type
         self.exercise_type = "overhead_press"
@@ -60,6 +104,12 @@ class WorkoutTrackerApp(QMainWindow):
         # Create timer for animation effects
         self.setup_animation_timer()
         
+        # Periodically report inference process IPC latency
+        self.ipc_stats_timer = QTimer()
+        self.ipc_stats_timer.timeout.connect(self.show_ipc_stats)
+        if self.pose_processor.inference_client is not None:
+            self.ipc_stats_timer.start(2000)
+        
         # Initialize fitness stats panel
         self.init_workout_stats()
         
@@ -79,7 +129,7 @@ class WorkoutTrackerApp(QMainWindow):
         self.stats_panel.setVisible(False)
         
         # Show welcome message on first startup
-        self.statusBar.showMessage(f"{T.get('welcome')} - RTMPose ({self.model_mode}) on {self.device}")
+        self.statusBar.showMessage(f"{T.get('welcome')} - RTMPose ({self.model_mode}) on {self.device}, backend: {self.pose_processor.backend}")
         
         # Add mirror mode related attributes
         self.mirror_mode = True
@@ -116,12 +166,20 @@ class WorkoutTrackerApp(QMainWindow):
         self.setStatusBar(self.statusBar)
         self.statusBar.showMessage(T.get("ready"))
         
+        # QoS indicator (current mode and latency) on the right of the status bar
+        self.qos_label = QLabel()
+        self.statusBar.addPermanentWidget(self.qos_label)
+        self.qos_label.setVisible(self.qos_enabled)
+        
         # Setup menu bar
         self.setup_menu_bar()
         
         # Current language
         self.current_language = "zh"
         
+        # Show configured backend
+        self.control_panel.set_backend(self.config.get("backend"))
+        
         # Connect control panel signals
         self.connect_signals()
     
@@ -134,6 +192,7 @@ class WorkoutTrackerApp(QMainWindow):
         self.control_panel.rotation_toggled.connect(self.toggle_rotation)
         self.control_panel.skeleton_toggled.connect(self.toggle_skeleton)
         self.control_panel.model_changed.connect(self.change_model)  # Connect model switching signal
+        self.control_panel.backend_changed.connect(self.change_backend)
         self.control_panel.mirror_toggled.connect(self.toggle_mirror)
         
         # Connect new button signals
@@ -157,6 +216,9 @@ class WorkoutTrackerApp(QMainWindow):
             height=360,
             rotate=True
         )
+        self.video_thread.set_full_resolution(bool(self.config.get("dual_resolution")), self.config.get("capture_size"))
+        self.video_thread.set_raw_frames(bool(self.config.get("fused_preprocessing")))
+        self.video_thread.thread_planner = self.thread_planner
         self.video_thread.change_pixmap_signal.connect(self.update_image)
         
         # Initialize FPS value
@@ -183,6 +245,14 @@ class WorkoutTrackerApp(QMainWindow):
                 frame, self.exercise_type
             )
             
+            # Let the QoS controller adjust the model mode to the latency budget
+            if self.qos_enabled:
+                latency_ms = self.pose_processor.last_inference_ms
+                target_mode = self.qos.record(latency_ms)
+                if target_mode is not None:
+                    self.apply_qos_mode(target_mode)
+                self.update_qos_indicator(latency_ms)
+            
             # If mirror mode is enabled, apply mirror processing
             if self.mirror_mode:
                 import cv2
@@ -235,6 +305,7 @@ class WorkoutTrackerApp(QMainWindow):
         """Change exercise type"""
         self.exercise_type = exercise_type
         self.exercise_counter.reset_counter()
+        self.pose_processor.reset_tracking()
         self.current_count = 0
         self.statusBar.showMessage(f"Switched to {self.control_panel.exercise_display_map[exercise_type]} exercise")
     
@@ -442,6 +513,64 @@ class WorkoutTrackerApp(QMainWindow):
         camera_mode_action.triggered.connect(self.switch_to_camera_mode)
         tools_menu.addAction(camera_mode_action)
         
+        # Pipelined inference option
+        tools_menu.addSeparator()
+        self.pipelined_action = QAction(T.get("pipelined_inference"), self, checkable=True)
+        self.pipelined_action.setChecked(bool(self.config.get("pipelined_inference")))
+        self.pipelined_action.triggered.connect(self.toggle_pipelining)
+        tools_menu.addAction(self.pipelined_action)
+        
+        # Separate inference process option
+        self.inference_process_action = QAction(T.get("inference_process"), self, checkable=True)
+        self.inference_process_action.setChecked(bool(self.config.get("inference_process")))
+        self.inference_process_action.triggered.connect(self.toggle_inference_process)
+        tools_menu.addAction(self.inference_process_action)
+        
+        # Adaptive model quality option
+        self.adaptive_quality_action = QAction(T.get("adaptive_quality"), self, checkable=True)
+        self.adaptive_quality_action.setChecked(self.qos_enabled)
+        self.adaptive_quality_action.triggered.connect(self.toggle_adaptive_quality)
+        tools_menu.addAction(self.adaptive_quality_action)
+        
+        # Full-resolution pose crops option
+        self.dual_resolution_action = QAction(T.get("dual_resolution"), self, checkable=True)
+        self.dual_resolution_action.setChecked(bool(self.config.get("dual_resolution")))
+        self.dual_resolution_action.triggered.connect(self.toggle_dual_resolution)
+        tools_menu.addAction(self.dual_resolution_action)
+        
+        # Inference decimation option
+        self.decimation_action = QAction(T.get("inference_decimation"), self, checkable=True)
+        self.decimation_action.setChecked(self.pose_processor.keypoint_predictor is not None)
+        self.decimation_action.triggered.connect(self.toggle_decimation)
+        tools_menu.addAction(self.decimation_action)
+        
+        # Keypoint smoothing option
+        self.keypoint_filter_action = QAction(T.get("keypoint_filter"), self, checkable=True)
+        self.keypoint_filter_action.setChecked(self.pose_processor.keypoint_filter is not None)
+        self.keypoint_filter_action.triggered.connect(self.toggle_keypoint_filter)
+        tools_menu.addAction(self.keypoint_filter_action)
+        
+        # Fused preprocessing option
+        self.fused_preprocessing_action = QAction(T.get("fused_preprocessing"), self, checkable=True)
+        self.fused_preprocessing_action.setChecked(self.pose_processor.fused_preprocessing)
+        self.fused_preprocessing_action.triggered.connect(self.toggle_fused_preprocessing)
+        tools_menu.addAction(self.fused_preprocessing_action)
+        
+        # Fixed zone mode options
+        self.fixed_zone_action = QAction(T.get("fixed_zone"), self, checkable=True)
+        self.fixed_zone_action.setChecked(self.pose_processor.fixed_zone is not None)
+        self.fixed_zone_action.triggered.connect(self.toggle_fixed_zone)
+        tools_menu.addAction(self.fixed_zone_action)
+        self.recalibrate_zone_action = QAction(T.get("recalibrate_zone"), self)
+        self.recalibrate_zone_action.setEnabled(self.pose_processor.fixed_zone is not None)
+        self.recalibrate_zone_action.triggered.connect(self.recalibrate_zone)
+        tools_menu.addAction(self.recalibrate_zone_action)
+        
+        # Thread configuration diagnostics
+        thread_diagnostics_action = QAction(T.get("thread_diagnostics"), self)
+        thread_diagnostics_action.triggered.connect(self.show_thread_diagnostics)
+        tools_menu.addAction(thread_diagnostics_action)
+        
         # Mode menu
         mode_menu = menubar.addMenu(T.get("mode_menu"))
         
@@ -659,6 +788,7 @@ class WorkoutTrackerApp(QMainWindow):
         """Clean up resources when closing window"""
         if self.video_thread.isRunning():
             self.video_thread.stop()
+        self.pose_processor.close()
         event.accept()
 
 
@@ -692,15 +822,37 @@ class WorkoutTrackerApp(QMainWindow):
             self.statusBar.showMessage(T.get("language_changed"))
 
     def change_model(self, model_mode):
+        """Switch RTMPose model mode, loading it in the background if it isn't warm yet"""
+        if model_mode == self.model_mode:
+            # If it's the same mode, no need to reload
+            self.pending_model_mode = None
+            return
+        if model_mode == self.pending_model_mode:
+            return
+        
+        if not self.pose_processor.mode_ready(model_mode):
+            thread = self.pose_processor.load_mode_async(model_mode)
+            if thread is not None:
+                # Keep the video running on the current mode until the new one is warm
+                self.pending_model_mode = model_mode
+                self.statusBar.showMessage(f"{T.get('model_loading')} {model_mode}...")
+                self.wait_for_model(thread, model_mode)
+                return
+        self.pending_model_mode = None
+        self.switch_model(model_mode)
+    
+    def wait_for_model(self, thread, model_mode):
+        """Switch once a background model load has finished, unless another mode was picked meanwhile"""
+        if thread.is_alive():
+            QTimer.singleShot(100, lambda: self.wait_for_model(thread, model_mode))
+            return
+        if self.pending_model_mode == model_mode:
+            self.pending_model_mode = None
+            self.switch_model(model_mode)
+    
+    def switch_model(self, model_mode):
         """Switch RTMPose model mode"""
         try:
-            if model_mode == self.model_mode:
-                # If it's the same mode, no need to reload
-                return
-                
-            # Stop video processing
-            self.video_thread.stop()
-            
             # Show status information
             self.statusBar.showMessage(f"Switching RTMPose mode to: {model_mode}...")
             
@@ -710,14 +862,14 @@ class WorkoutTrackerApp(QMainWindow):
             
             print(f"Switching RTMPose mode: {old_model_mode} -> {model_mode}")
             
-            # Update RTMPose processor mode
+            # Sessions come pre-warmed from the model pool, so the video keeps running
             self.pose_processor.update_model(model_mode)
             
-            # Reinitialize video thread
-            self.setup_video_thread()
+            if self.pose_processor.wholebody is None:
+                raise RuntimeError(f"{model_mode} model could not be loaded")
             
-            # Restart video processing
-            QTimer.singleShot(500, self.start_video)  # Delay 500ms before starting video
+            # Keep the QoS controller in sync with manual choices
+            self.qos.set_mode(model_mode)
             
             # Update status bar
             self.statusBar.showMessage(f"Switched to RTMPose {model_mode} mode")
@@ -732,20 +884,169 @@ class WorkoutTrackerApp(QMainWindow):
             try:
                 self.model_mode = old_model_mode
                 self.pose_processor.update_model(old_model_mode)
-                self.setup_video_thread()
-                QTimer.singleShot(500, self.start_video)
                 self.statusBar.showMessage(f"Rolled back to RTMPose {old_model_mode} mode")
                 
             except:
                 # If rollback also fails, show critical error
                 self.statusBar.showMessage("Critical error in RTMPose mode switching")
 
+    def change_backend(self, backend):
+        """Switch inference backend"""
+        try:
+            # Stop video processing while sessions are rebuilt
+            self.video_thread.stop()
+            self.statusBar.showMessage(f"Switching inference backend to: {backend}...")
+            
+            # Save choice and reload models
+            self.config.set("backend", backend)
+            active_backend = self.pose_processor.set_backend(backend)
+            
+            # Restart video processing
+            self.setup_video_thread()
+            QTimer.singleShot(500, self.start_video)
+            
+            if self.pose_processor.wholebody is None:
+                self.statusBar.showMessage(T.get("model_change_failed"))
+            else:
+                self.statusBar.showMessage(f"Inference backend: {active_backend}")
+        except Exception as e:
+            error_msg = f"Backend switching failed: {str(e)}"
+            self.statusBar.showMessage(error_msg)
+            print(error_msg)
+    
+    def toggle_pipelining(self, enabled):
+        """Toggle overlapping detector/pose execution"""
+        self.config.set("pipelined_inference", enabled)
+        if self.pose_processor.inference_client is not None:
+            # Stages can't be split while inference runs out of process
+            self.pipelined_action.setChecked(False)
+            return
+        self.pose_processor.set_pipelining(enabled)
+        self.statusBar.showMessage(f"{T.get('pipelined_inference')}: {'On' if enabled else 'Off'}")
+    
+    def toggle_inference_process(self, enabled):
+        """Toggle running inference in a separate worker process"""
+        self.statusBar.showMessage(f"{T.get('inference_process')}...")
+        address = self.config.get_address("inference_server_address")
+        if not self.pose_processor.set_process_isolation(enabled, address):
+            self.inference_process_action.setChecked(False)
+            self.statusBar.showMessage(T.get("model_change_failed"))
+            return
+        
+        self.config.set("inference_process", enabled)
+        if enabled:
+            self.pipelined_action.setChecked(False)
+            self.ipc_stats_timer.start(2000)
+        else:
+            self.ipc_stats_timer.stop()
+            if self.config.get("pipelined_inference"):
+                self.pose_processor.set_pipelining(True)
+                self.pipelined_action.setChecked(True)
+        self.statusBar.showMessage(f"{T.get('inference_process')}: {'On' if enabled else 'Off'}")
+    
+    def show_ipc_stats(self):
+        """Show inference process latency in the status bar"""
+        client = self.pose_processor.inference_client
+        if client is None:
+            self.ipc_stats_timer.stop()
+            return
+        stats = client.latency_stats()
+        restarts = self.pose_processor.inference_server.restarts if self.pose_processor.inference_server else 0
+        self.statusBar.showMessage(
+            f"Inference process: IPC {stats['ipc_ms']:.1f} ms, inference {stats['server_ms']:.1f} ms, restarts {restarts}"
+        )
+    
+    def toggle_decimation(self, enabled):
+        """Toggle running the model on every Nth frame with keypoint extrapolation in between"""
+        self.config.set("inference_decimation", enabled)
+        self.pose_processor.set_decimation(enabled, self.config.get("decimation_max_interval"))
+        self.statusBar.showMessage(f"{T.get('inference_decimation')}: {'On' if enabled else 'Off'}")
+    
+    def toggle_keypoint_filter(self, enabled):
+        """Toggle One-Euro keypoint smoothing before counting"""
+        self.config.set("keypoint_filter", enabled)
+        self.pose_processor.set_keypoint_filter(enabled)
+        self.statusBar.showMessage(f"{T.get('keypoint_filter')}: {'On' if enabled else 'Off'}")
+    
+    def toggle_fixed_zone(self, enabled):
+        """Toggle pose-only inference on a fixed workout zone"""
+        self.config.set("fixed_zone", enabled)
+        self.pose_processor.set_fixed_zone(enabled, self.config.get("fixed_zone_rect"))
+        self.recalibrate_zone_action.setEnabled(enabled)
+        self.statusBar.showMessage(f"{T.get('fixed_zone')}: {'On' if enabled else 'Off'}")
+    
+    def recalibrate_zone(self):
+        """Calibrate the fixed zone again from the next frames"""
+        if self.pose_processor.fixed_zone is None:
+            return
+        self.config.set("fixed_zone_rect", None)
+        self.pose_processor.fixed_zone.recalibrate()
+        self.statusBar.showMessage(T.get("recalibrate_zone"))
+    
+    def show_thread_diagnostics(self):
+        """Show the applied thread budget and per-session thread counts"""
+        pool = self.pose_processor.model_pools.get(self.pose_processor.backend)
+        rows = self.thread_planner.diagnostics(pool)
+        text = "<table>" + "".join(f"<tr><td><b>{name}</b></td><td>&nbsp;{value}</td></tr>" for name, value in rows) + "</table>"
+        QMessageBox.information(self, T.get("thread_diagnostics"), text)
+    
+    def toggle_fused_preprocessing(self, enabled):
+        """Toggle feeding raw capture frames straight to the models"""
+        self.config.set("fused_preprocessing", enabled)
+        self.pose_processor.set_fused_preprocessing(enabled)
+        self.video_thread.set_raw_frames(enabled)
+        self.statusBar.showMessage(f"{T.get('fused_preprocessing')}: {'On' if enabled else 'Off'}")
+    
+    def toggle_dual_resolution(self, enabled):
+        """Toggle detection on downscaled frames with pose crops from full resolution"""
+        self.config.set("dual_resolution", enabled)
+        self.pose_processor.set_dual_resolution(enabled)
+        self.video_thread.set_full_resolution(enabled, self.config.get("capture_size"))
+        
+        # Camera capture size only changes when the camera is reopened
+        if self.video_thread.is_camera and self.video_thread.isRunning():
+            self.video_thread.set_camera(self.video_thread.camera_id)
+        self.statusBar.showMessage(f"{T.get('dual_resolution')}: {'On' if enabled else 'Off'}")
+    
+    def toggle_adaptive_quality(self, enabled):
+        """Toggle latency-driven model mode selection"""
+        self.config.set("adaptive_quality", enabled)
+        self.qos_enabled = enabled
+        self.qos.set_mode(self.model_mode)
+        self.qos.samples.clear()
+        self.qos_label.setVisible(enabled)
+        self.statusBar.showMessage(f"{T.get('adaptive_quality')}: {'On' if enabled else 'Off'}")
+    
+    def apply_qos_mode(self, model_mode):
+        """Switch to the model mode picked by the QoS controller"""
+        old_model_mode = self.model_mode
+        self.change_model(model_mode)
+        if self.pending_model_mode == model_mode:
+            # Loading in the background, switches when warm
+            self.control_panel.set_model_mode(model_mode)
+            return
+        if self.model_mode != model_mode:
+            # Switch failed and was rolled back
+            self.qos.set_mode(old_model_mode)
+            return
+        self.control_panel.set_model_mode(model_mode)
+        self.statusBar.showMessage(f"{T.get('qos_switched')} {self.control_panel.model_display_map.get(model_mode, model_mode)}")
+    
+    def update_qos_indicator(self, latency_ms):
+        """Show current mode, latency and switch count next to the status bar"""
+        median = self.qos.median_latency()
+        latency = median if median is not None else latency_ms
+        latency_text = f"{latency:.0f}/{self.qos.budget_ms:.0f} ms" if latency is not None else "-"
+        self.qos_label.setText(f"QoS: {self.model_mode} {latency_text} ({self.qos.switches} switches)")
+    
     def toggle_mirror(self, mirror):
         """Toggle mirror mode"""
         self.mirror_mode = mirror
 
 
 if __name__ == "__main__":
+    # The inference worker is spawned, frozen builds must dispatch to it before any UI starts
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = WorkoutTrackerApp()
     window.show()